@@ -0,0 +1,3 @@
+"""
+Local load and benchmark tools. Not imported by the bot; run as `python -m benchmarks.<tool>`.
+"""
@@ -0,0 +1,52 @@
+"""
+Shared helpers for the benchmark tools: bot environment for a throwaway database, percentiles.
+"""
+import os
+import sys
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BENCH_TOKEN = "123456:benchmark"
+BENCH_OWNER_ID = 900001
+
+
+def bench_env(database_path: str, real_limits: bool = False, extra: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    Environment for a bot process under benchmark. Must be applied before config.py is imported.
+    Without real_limits the Telegram flood limits are lifted so the numbers show our own overhead.
+    """
+    env = {
+        "DATABASE_PATH": database_path,
+        "BOT_TOKEN": BENCH_TOKEN,
+        "OWNER_ID": str(BENCH_OWNER_ID),
+        "LOG_LEVEL": "WARNING",
+        "METRICS_PORT": "0",
+        # Injected errors are retried quickly instead of after minutes
+        "OUTBOX_BACKOFF_BASE": "0.05",
+        "OUTBOX_BACKOFF_MAX": "0.5",
+        "OUTBOX_POLL_SECONDS": "0.2",
+        "CATCHUP_GRACE_MINUTES": "0",
+    }
+    if not real_limits:
+        env.update({
+            "TELEGRAM_GLOBAL_RATE": "1000000",
+            "TELEGRAM_GROUP_RATE_PER_MIN": "60000000",
+            "TELEGRAM_PRIVATE_RATE": "1000000",
+            "TELEGRAM_PRIVATE_BURST": "1000000",
+        })
+    env.update(extra or {})
+    return env
+
+
+def apply_env(env: Dict[str, str]) -> None:
+    os.environ.update(env)
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
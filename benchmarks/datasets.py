@@ -0,0 +1,80 @@
+"""
+Seeded SQLite datasets for the benchmarks: N posts with history, target groups, one schedule with posts
+attached and admin preview messages. Written with executemany on a freshly migrated database.
+"""
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import List
+
+import aiosqlite
+
+MAIN_GROUP_ID = -1001000000000
+
+
+@dataclass
+class Dataset:
+    posts: int
+    groups: int
+    schedule_id: int
+    slot_post_ids: List[int] = field(default_factory=list)
+    # Order for the delete_post scenario: newest first (they have admin preview messages)
+    delete_order: List[int] = field(default_factory=list)
+
+
+async def seed(database_path: str, posts: int, admin_id: int, groups: int = 5, slot_posts: int = 10, seed: int = 1) -> Dataset:
+    """Fill a migrated database. The settings target group is the first group; the rest go to target_groups."""
+    rnd = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    group_ids = [MAIN_GROUP_ID - i for i in range(groups)]
+    async with aiosqlite.connect(database_path) as conn:
+        await conn.executemany(
+            "INSERT INTO content (id, content_type, file_id, text, caption, created_at, created_by) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    i,
+                    kind,
+                    None if kind == "text" else f"BENCH_FILE_{i}",
+                    f"Post {i} matni" if kind == "text" else None,
+                    None if kind == "text" else f"Post {i} caption",
+                    (start + timedelta(seconds=i)).strftime("%Y-%m-%d %H:%M:%S"),
+                    admin_id,
+                )
+                for i, kind in ((i, rnd.choice(("photo", "video", "text"))) for i in range(1, posts + 1))
+            ),
+        )
+        # One earlier publication per post in the main group
+        await conn.executemany(
+            "INSERT INTO posts_log (content_id, group_id, message_id, posted_at) VALUES (?, ?, ?, ?)",
+            (
+                (i, MAIN_GROUP_ID, i, (start + timedelta(days=1, seconds=i)).strftime("%Y-%m-%d %H:%M:%S"))
+                for i in range(1, posts + 1)
+            ),
+        )
+        await conn.execute(
+            "INSERT INTO settings (key, value) VALUES ('target_group_id', ?)", (str(group_ids[0]),)
+        )
+        await conn.executemany(
+            "INSERT INTO target_groups (chat_id, title) VALUES (?, ?)",
+            ((gid, f"Bench group {n}") for n, gid in enumerate(group_ids[1:], start=2)),
+        )
+        cur = await conn.execute("INSERT INTO schedules (time_str) VALUES ('09:00')")
+        schedule_id = cur.lastrowid
+        slot_post_ids = list(range(1, min(slot_posts, posts) + 1))
+        await conn.executemany(
+            "INSERT INTO content_schedule (schedule_id, content_id) VALUES (?, ?)",
+            ((schedule_id, cid) for cid in slot_post_ids),
+        )
+        # Previews of the newest posts the admin already has in chat (deleted by del_post and /start)
+        await conn.executemany(
+            "INSERT INTO content_admin_messages (content_id, admin_uid, chat_id, message_id) VALUES (?, ?, ?, ?)",
+            ((i, admin_id, admin_id, 1_000_000 + i) for i in range(max(posts - 999, 1), posts + 1)),
+        )
+        await conn.commit()
+    return Dataset(
+        posts=posts,
+        groups=groups,
+        schedule_id=schedule_id,
+        slot_post_ids=slot_post_ids,
+        delete_order=list(range(posts, 0, -1)),
+    )
@@ -0,0 +1,185 @@
+"""
+Local stand-in for the Telegram Bot API (aiohttp). Answers /bot<token>/<method> like Telegram would,
+with configurable latency, injected 429 (retry_after) and 400 errors, and per-method counters.
+Point an aiogram Bot at it with fake_session(url).
+
+    python -m benchmarks.fake_bot_api --port 8081 --latency-ms 30 --rate-429 0.01 --error-rate 0.001
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+from collections import Counter
+from typing import Optional
+
+from aiohttp import web
+
+BOT_USER = {"id": 123456, "is_bot": True, "first_name": "Benchmark", "username": "benchmark_bot"}
+
+# Methods whose result is a Message; everything else answers True
+_MESSAGE_METHODS = frozenset({
+    "sendmessage", "sendphoto", "sendvideo", "sendanimation", "senddocument", "copymessage",
+    "forwardmessage", "editmessagetext", "editmessagecaption", "editmessagereplymarkup",
+})
+
+
+class FakeBotAPI:
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        rate_429: float = 0.0,
+        retry_after: int = 1,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._message_ids = itertools.count(1)
+        self._runner: Optional[web.AppRunner] = None
+        self.calls: Counter = Counter()
+        self.throttled: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.url = ""
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self._handle)
+        app.router.add_get("/stats", self._stats)
+        return app
+
+    def stats(self) -> dict:
+        return {
+            "calls": dict(self.calls),
+            "throttled": dict(self.throttled),
+            "errors": dict(self.errors),
+            "total_calls": sum(self.calls.values()),
+        }
+
+    def reset(self) -> None:
+        self.calls.clear()
+        self.throttled.clear()
+        self.errors.clear()
+
+    async def _stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats())
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        key = method.lower()
+        self.calls[method] += 1
+        params = dict(await request.post())
+        delay = self.latency_ms + (self._random.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        roll = self._random.random()
+        if roll < self.rate_429:
+            self.throttled[method] += 1
+            return web.json_response(
+                {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": f"Too Many Requests: retry after {self.retry_after}",
+                    "parameters": {"retry_after": self.retry_after},
+                },
+                status=429,
+            )
+        if roll < self.rate_429 + self.error_rate:
+            self.errors[method] += 1
+            return web.json_response(
+                {"ok": False, "error_code": 400, "description": "Bad Request: injected error"}, status=400
+            )
+        return web.json_response({"ok": True, "result": self._result(key, params)})
+
+    def _result(self, method: str, params: dict):
+        if method == "getme":
+            return BOT_USER
+        if method == "getupdates":
+            return []
+        if method in _MESSAGE_METHODS:
+            chat_id = int(params.get("chat_id", 0) or 0)
+            message = {
+                "message_id": int(params.get("message_id", 0) or 0) or next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private" if chat_id > 0 else "supergroup"},
+                "from": BOT_USER,
+            }
+            if "text" in params:
+                message["text"] = params["text"]
+            if params.get("reply_markup"):
+                message["reply_markup"] = json.loads(params["reply_markup"])
+            return message
+        return True
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start listening; port 0 picks a free one. Returns the base URL."""
+        self._runner = web.AppRunner(self.app(), handle_signals=False, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        bound_port = self._runner.addresses[0][1]
+        self.url = f"http://{host}:{bound_port}"
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+def fake_session(url: str):
+    """aiogram session that sends every Bot API request to the fake server at url."""
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+
+    return AiohttpSession(api=TelegramAPIServer.from_base(url))
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency-ms", type=float, default=30.0, help="fake Bot API response time")
+    parser.add_argument("--jitter-ms", type=float, default=10.0, help="random extra response time")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="share of requests answered 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="retry_after seconds in injected 429s")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered 400")
+    parser.add_argument("--seed", type=int, default=1)
+
+
+def from_arguments(args: argparse.Namespace) -> FakeBotAPI:
+    return FakeBotAPI(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        rate_429=args.rate_429,
+        retry_after=args.retry_after,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    api = from_arguments(args)
+    url = await api.start(args.host, args.port)
+    print(f"Fake Bot API on {url} (stats: {url}/stats)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await api.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    add_arguments(parser)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""
+Synthetic update load for the Dispatcher: feeds dp.feed_update with a weighted mix of realistic updates
+at a controlled rate, against the fake Bot API and a seeded temp database, and shows where the time goes.
+
+Update kinds (--mix name=weight,...):
+  lead          private text from an ordinary user (rate limit, user upsert, lead, admin notification)
+  admin_text    private text from an admin (text post draft + confirm keyboard)
+  post_time_h   post_time_h_<h> callback from an admin whose draft is at the time step
+  del_post      del_post_<id> callback (delete + admin preview cleanup)
+  assign        assign_schedule_<sid>_content_<cid> callback
+  group_cmd     /set_target_group, /add_target_group or /set_admin_group in a group from a non-admin
+  group_chat    plain group message no handler matches (filters only)
+
+Per update the time is split into (from bot/metrics.py's per-update trace):
+  fsm+context   feed_update up to routing: Update parsing, user context, FSM state load
+  filters       routing and filter checks of every observer tried
+  middleware    own time of the AdminOnly/OwnerOnly checks
+  handler       the matched handler body ("db" = its @db_timed service calls, summed like svc ms/op)
+These are wall times: under load they include waiting for the event loop behind other updates.
+
+    python -m benchmarks.loadgen --rate 200 --duration 10
+    python -m benchmarks.loadgen --rate 0 --concurrency 50          # closed loop: as fast as it goes
+    python -m benchmarks.loadgen --mix lead=5,group_chat=10 --latency-ms 80 --json load.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks.common import BENCH_OWNER_ID, apply_env, bench_env, percentile
+from benchmarks import fake_bot_api
+
+DEFAULT_MIX = "lead=30,admin_text=5,post_time_h=10,del_post=5,assign=10,group_cmd=10,group_chat=30"
+# Histogram bounds (ms) for the text output
+HIST_BOUNDS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+PARTS = ("fsm+context", "filters", "middleware", "handler")
+GROUP_COMMANDS = ("/set_target_group", "/add_target_group", "/set_admin_group")
+ADMIN_BASE_ID = 800_000
+USER_BASE_ID = 1_000_000
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in UpdateFactory.KINDS:
+            raise SystemExit(f"unknown update kind {name!r}; known: {', '.join(UpdateFactory.KINDS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class UpdateFactory:
+    """Builds raw update dicts; admins and users come from fixed id pools, post ids from the dataset."""
+
+    KINDS = ("lead", "admin_text", "post_time_h", "del_post", "assign", "group_cmd", "group_chat")
+
+    def __init__(self, admins: List[int], users: int, schedule_id: int, post_ids: List[int], groups: List[int], seed: int):
+        self.admins = admins
+        self.users = users
+        self.schedule_id = schedule_id
+        self.post_ids = post_ids
+        self.delete_ids = iter(list(post_ids))
+        self.groups = groups
+        self._random = random.Random(seed)
+        self._ids = itertools.count(1)
+
+    def make(self, kind: str) -> Tuple[dict, int]:
+        """(update, sender id) for one update of this kind."""
+        r = self._random
+        admin = r.choice(self.admins)
+        if kind == "lead":
+            uid = USER_BASE_ID + r.randrange(self.users)
+            return self._message(uid, uid, "private", f"Salom, narxi qancha? #{r.randrange(10_000)}"), uid
+        if kind == "admin_text":
+            return self._message(admin, admin, "private", f"Yangi e'lon matni {r.randrange(10_000)}"), admin
+        if kind == "post_time_h":
+            return self._callback(admin, f"post_time_h_{r.randrange(24)}"), admin
+        if kind == "del_post":
+            cid = next(self.delete_ids, None) or r.choice(self.post_ids)
+            return self._callback(admin, f"del_post_{cid}"), admin
+        if kind == "assign":
+            return self._callback(admin, f"assign_schedule_{self.schedule_id}_content_{r.choice(self.post_ids)}"), admin
+        uid = USER_BASE_ID + r.randrange(self.users)
+        text = r.choice(GROUP_COMMANDS) if kind == "group_cmd" else f"guruhdagi suhbat {r.randrange(10_000)}"
+        return self._message(uid, r.choice(self.groups), "supergroup", text), uid
+
+    def _message(self, uid: int, chat_id: int, chat_type: str, text: str) -> dict:
+        update_id = next(self._ids)
+        chat = {"id": chat_id, "type": chat_type}
+        chat.update({"first_name": f"user{uid}"} if chat_type == "private" else {"title": "Bench group"})
+        return {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "date": int(time.time()),
+                "chat": chat,
+                "from": {"id": uid, "is_bot": False, "first_name": f"user{uid}"},
+                "text": text,
+            },
+        }
+
+    def _callback(self, uid: int, data: str) -> dict:
+        update_id = next(self._ids)
+        return {
+            "update_id": update_id,
+            "callback_query": {
+                "id": f"load-{update_id}",
+                "from": {"id": uid, "is_bot": False, "first_name": f"admin{uid}"},
+                "chat_instance": "load",
+                "data": data,
+                "message": {
+                    "message_id": 2_000_000 + update_id,
+                    "date": int(time.time()),
+                    "chat": {"id": uid, "type": "private"},
+                    "text": "Vaqtni tanlang",
+                },
+            },
+        }
+
+
+class Results:
+    def __init__(self) -> None:
+        self.by_kind: Dict[str, List[float]] = defaultdict(list)
+        self.by_handler: Dict[str, List[float]] = defaultdict(list)
+        self.parts: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        self.errors: Dict[str, int] = defaultdict(int)
+        # How late updates were started behind the requested rate (open loop only)
+        self.start_lag: List[float] = []
+
+    def add(self, kind: str, total: float, trace: Dict[str, Any]) -> None:
+        dispatch = trace.get("dispatch", total)
+        middleware = trace.get("middleware", 0.0)
+        handler = trace.get("handler", 0.0)
+        self.by_kind[kind].append(total)
+        self.by_handler[trace.get("handler_name", "(no handler)")].append(total)
+        parts = self.parts[kind]
+        parts["fsm+context"] += max(total - dispatch, 0.0)
+        parts["filters"] += max(dispatch - middleware - handler, 0.0)
+        parts["middleware"] += middleware
+        parts["handler"] += handler
+        parts["db"] += trace.get("db", 0.0)
+
+
+def _row(latencies: List[float]) -> dict:
+    return {
+        "count": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p90_ms": round(percentile(latencies, 90) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(max(latencies, default=0.0) * 1000, 2),
+    }
+
+
+def _histogram(latencies: List[float]) -> List[int]:
+    counts = [0] * (len(HIST_BOUNDS_MS) + 1)
+    for value in latencies:
+        ms = value * 1000
+        counts[next((i for i, bound in enumerate(HIST_BOUNDS_MS) if ms <= bound), len(HIST_BOUNDS_MS))] += 1
+    return counts
+
+
+def report(results: Results, elapsed: float, args: argparse.Namespace) -> dict:
+    total = sum(len(v) for v in results.by_kind.values())
+    out: dict = {
+        "settings": {k: v for k, v in vars(args).items() if k != "json"},
+        "updates": total,
+        "seconds": round(elapsed, 3),
+        "throughput": round(total / elapsed, 1) if elapsed else 0.0,
+        "errors": dict(results.errors),
+        "start_lag_p99_ms": round(percentile(results.start_lag, 99) * 1000, 2),
+        "kinds": {},
+        "handlers": {},
+    }
+    for kind, latencies in sorted(results.by_kind.items()):
+        n = len(latencies)
+        row = _row(latencies)
+        row["avg_ms"] = {part: round(v * 1000 / n, 3) for part, v in results.parts[kind].items()}
+        out["kinds"][kind] = row
+    for name, latencies in sorted(results.by_handler.items()):
+        row = _row(latencies)
+        row["histogram"] = _histogram(latencies)
+        out["handlers"][name] = row
+    return out
+
+
+def print_report(out: dict) -> None:
+    print(
+        f"{out['updates']} update(s) in {out['seconds']}s = {out['throughput']}/s "
+        f"(requested {out['settings']['rate'] or 'max'}/s); start lag p99 {out['start_lag_p99_ms']} ms"
+    )
+    if out["errors"]:
+        print(f"errors: {out['errors']}")
+    header = f"{'kind':<12} {'n':>6} {'p50':>8} {'p90':>8} {'p99':>8} |" + "".join(f" {p:>11}" for p in PARTS) + f" {'(db)':>8}"
+    print("\nlatency ms per update kind | average ms per update spent in")
+    print(header)
+    print("-" * len(header))
+    for kind, row in out["kinds"].items():
+        avg = row["avg_ms"]
+        print(
+            f"{kind:<12} {row['count']:>6} {row['p50_ms']:>8.2f} {row['p90_ms']:>8.2f} {row['p99_ms']:>8.2f} |"
+            + "".join(f" {avg.get(p, 0.0):>11.3f}" for p in PARTS)
+            + f" {avg.get('db', 0.0):>8.3f}"
+        )
+    labels = [f"<={b:g}" for b in HIST_BOUNDS_MS] + [f">{HIST_BOUNDS_MS[-1]:g}"]
+    print("\nlatency histogram per handler (ms buckets, update count)")
+    header = f"{'handler':<38} {'n':>6} {'p99':>8} " + " ".join(f"{label:>6}" for label in labels)
+    print(header)
+    print("-" * len(header))
+    for name, row in out["handlers"].items():
+        print(f"{name:<38} {row['count']:>6} {row['p99_ms']:>8.2f} " + " ".join(f"{c:>6}" for c in row["histogram"]))
+
+
+async def run(args: argparse.Namespace, api_url: str) -> dict:
+    from aiogram.fsm.storage.base import StorageKey
+    from aiogram.types import Update
+
+    from config import DATABASE_PATH
+    from bot.database import SQLiteStorage, close_app_connection, init_db, open_app_connection, write_buffer
+    from bot.handlers.admin import PostAddFlow
+    from bot.metrics import start_update_trace
+    from bot.services import admin_service
+    from benchmarks.datasets import MAIN_GROUP_ID, seed
+    from main import build_dispatcher, create_bot
+
+    await init_db()
+    dataset = await seed(DATABASE_PATH, args.posts, BENCH_OWNER_ID, groups=args.groups)
+    await open_app_connection()
+    admins = [BENCH_OWNER_ID] + [ADMIN_BASE_ID + i for i in range(args.admins - 1)]
+    for admin_id in admins[1:]:
+        await admin_service.add_admin(admin_id, first_name=f"admin{admin_id}")
+    await admin_service.load_admin_cache()
+
+    bot = create_bot(fake_bot_api.fake_session(api_url))
+    storage = SQLiteStorage()
+    dp = build_dispatcher(storage)
+    factory = UpdateFactory(
+        admins,
+        args.users,
+        dataset.schedule_id,
+        dataset.delete_order,
+        [MAIN_GROUP_ID - i for i in range(args.groups)],
+        args.seed,
+    )
+    mix = parse_mix(args.mix)
+    kinds, weights = list(mix), list(mix.values())
+    chooser = random.Random(args.seed)
+    results = Results()
+
+    async def prime(uid: int) -> None:
+        # post_time_h is only meaningful at the time step of a draft; set up outside the measured time
+        key = StorageKey(bot_id=bot.id, chat_id=uid, user_id=uid)
+        await storage.set_state(key, PostAddFlow.pick_time)
+        await storage.set_data(key, {"content_type": "text", "text": "Benchmark draft"})
+
+    async def one(kind: str, record: bool = True) -> None:
+        raw, uid = factory.make(kind)
+        if kind == "post_time_h":
+            await prime(uid)
+        update = Update.model_validate(raw, context={"bot": bot})
+        trace = start_update_trace()
+        started = time.perf_counter()
+        try:
+            await dp.feed_update(bot, update)
+        except Exception as e:
+            results.errors[f"{kind}: {type(e).__name__}"] += 1
+        if record:
+            results.add(kind, time.perf_counter() - started, trace)
+
+    def next_kind() -> str:
+        return chooser.choices(kinds, weights)[0]
+
+    try:
+        # Warm-up, not recorded: first-use imports, model and regex compilation, connection pool
+        for kind in kinds:
+            await one(kind, record=False)
+        started = time.perf_counter()
+        deadline = started + args.duration
+        if args.rate > 0:
+            # Open loop: updates start on schedule whether or not earlier ones are done, like Telegram
+            tasks = set()
+            for n in itertools.count():
+                due = started + n / args.rate
+                if due >= deadline:
+                    break
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                results.start_lag.append(max(time.perf_counter() - due, 0.0))
+                task = asyncio.create_task(one(next_kind()))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        else:
+            async def worker() -> None:
+                while time.perf_counter() < deadline:
+                    await one(next_kind())
+
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+    finally:
+        await write_buffer.flush()
+        await storage.close()
+        await bot.session.close()
+        await close_app_connection()
+    return report(results, elapsed, args)
+
+
+async def _main(args: argparse.Namespace) -> None:
+    api: Optional[fake_bot_api.FakeBotAPI] = None
+    api_url = args.api_url
+    if not api_url:
+        api = fake_bot_api.from_arguments(args)
+        api_url = await api.start()
+    try:
+        out = await run(args, api_url)
+        if api is not None:
+            out["fake_api"] = api.stats()
+    finally:
+        if api is not None:
+            await api.stop()
+    print_report(out)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(out, f, indent=2)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=100.0, help="updates per second; 0 = closed loop (--concurrency)")
+    parser.add_argument("--concurrency", type=int, default=20, help="closed-loop workers when --rate 0")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="update kinds and weights")
+    parser.add_argument("--posts", type=int, default=1000, help="posts in the seeded database")
+    parser.add_argument("--groups", type=int, default=5)
+    parser.add_argument("--admins", type=int, default=10, help="admins sending callbacks (the owner included)")
+    parser.add_argument("--users", type=int, default=5000, help="distinct ordinary users")
+    parser.add_argument("--real-limits", action="store_true", help="keep Telegram flood limits (30/s, 20/min per group)")
+    parser.add_argument("--api-url", help="fake Bot API started separately (python -m benchmarks.fake_bot_api)")
+    parser.add_argument("--json", help="write the report here")
+    fake_bot_api.add_arguments(parser)
+    args = parser.parse_args(argv)
+    parse_mix(args.mix)
+    with tempfile.TemporaryDirectory(prefix="loadgen-") as tmp:
+        # Before anything imports config.py
+        apply_env(bench_env(os.path.join(tmp, "bot.db"), real_limits=args.real_limits))
+        asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+Throughput benchmark against a local fake Telegram Bot API.
+
+Starts benchmarks.fake_bot_api, then for every dataset size runs a fresh bot process (own temp database,
+seeded by benchmarks.datasets) through the real code paths:
+  slot           post_scheduled_content + OutboxWorker until every send of the slot is done
+  delete_post    del_post_<id> callback fed through the Dispatcher (FSM, AdminOnly and metrics middlewares)
+  admin_preview  send_all_posts_to_admin (the /start preview for an admin)
+Every Bot API call goes through the session middlewares (flood limits, metrics). Flood limits are lifted
+unless --real-limits, so the numbers show the bot's own overhead. "svc ms/op" is the summed time of
+@db_timed service calls per operation (outermost calls only; concurrent ones add up, so it can exceed p50).
+
+    python -m benchmarks.run
+    python -m benchmarks.run --sizes 10 1000 --rounds 50 --latency-ms 30 --rate-429 0.01 --json out.json
+    python -m benchmarks.run --baseline out.json --tolerance 0.25     # exit 1 on regression
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from benchmarks.common import BENCH_OWNER_ID, ROOT, apply_env, bench_env, percentile
+from benchmarks import fake_bot_api
+
+RESULT_PREFIX = "BENCH_RESULT "
+# Lower is better for these; higher is better for throughput
+_LATENCY_KEYS = ("p50_ms", "p99_ms")
+
+
+def _summary(latencies: List[float], elapsed: float, ops: int, units: int, db_seconds: float, api_calls: int) -> dict:
+    return {
+        "ops": ops,
+        "seconds": round(elapsed, 3),
+        "throughput": round(units / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "db_ms_per_op": round(db_seconds * 1000 / ops, 2) if ops else 0.0,
+        "api_calls_per_op": round(api_calls / ops, 1) if ops else 0.0,
+    }
+
+
+async def _child(args: argparse.Namespace) -> dict:
+    import logging
+
+    logging.basicConfig(level=logging.WARNING)
+    from aiogram.types import Update
+
+    from config import DATABASE_PATH
+    from bot.database import SQLiteStorage, close_app_connection, init_db, open_app_connection, write_buffer
+    from bot.handlers.admin import send_all_posts_to_admin
+    from bot.metrics import db_time_seconds, telegram_request_seconds
+    from bot.scheduler.outbox import OutboxWorker
+    from bot.scheduler.posting import post_scheduled_content
+    from bot.scheduler.timetable import now_local
+    from bot.services import admin_service
+    from benchmarks.datasets import seed
+    from main import build_dispatcher, create_bot
+
+    results: Dict[str, dict] = {}
+    await init_db()
+    seeded = time.monotonic()
+    dataset = await seed(DATABASE_PATH, args.size, BENCH_OWNER_ID, groups=args.groups, slot_posts=args.slot_posts)
+    results["seed_seconds"] = round(time.monotonic() - seeded, 2)
+    await open_app_connection()
+    await admin_service.load_admin_cache()
+    bot = create_bot(fake_bot_api.fake_session(args.api_url))
+    dp = build_dispatcher(SQLiteStorage())
+    worker = OutboxWorker(bot, "benchmark_bot")
+    await worker.start()
+
+    def counters():
+        return db_time_seconds.total(), telegram_request_seconds.totals()[1]
+
+    try:
+        # --- slot: queue + send every (post, group) of one schedule time ---
+        expected = len(dataset.slot_post_ids) * dataset.groups
+        latencies: List[float] = []
+        db0, api0 = counters()
+        base = now_local().replace(second=0, microsecond=0) - timedelta(days=1)
+        started = time.monotonic()
+        for r in range(args.rounds):
+            done_before = worker.sent + worker.failed
+            t0 = time.monotonic()
+            await post_scheduled_content(bot, "benchmark_bot", dataset.schedule_id, slot_at=base + timedelta(minutes=r))
+            while worker.sent + worker.failed - done_before < expected:
+                await asyncio.sleep(0.001)
+            latencies.append(time.monotonic() - t0)
+        elapsed = time.monotonic() - started
+        db1, api1 = counters()
+        results["slot"] = _summary(latencies, elapsed, args.rounds, expected * args.rounds, db1 - db0, api1 - api0)
+        results["slot"]["failed_sends"] = worker.failed
+
+        # --- delete_post: callback through the dispatcher ---
+        latencies = []
+        db0, api0 = counters()
+        # Runs after the slot scenario, so deleting posts attached to the schedule is fine
+        targets = dataset.delete_order[: args.rounds]
+        started = time.monotonic()
+        for n, cid in enumerate(targets):
+            update = Update.model_validate(
+                {
+                    "update_id": n + 1,
+                    "callback_query": {
+                        "id": f"bench-{n}",
+                        "from": {"id": BENCH_OWNER_ID, "is_bot": False, "first_name": "Owner"},
+                        "chat_instance": "bench",
+                        "data": f"del_post_{cid}",
+                        "message": {
+                            "message_id": 1_000_000 + cid,
+                            "date": int(time.time()),
+                            "chat": {"id": BENCH_OWNER_ID, "type": "private"},
+                        },
+                    },
+                },
+                context={"bot": bot},
+            )
+            t0 = time.monotonic()
+            await dp.feed_update(bot, update)
+            latencies.append(time.monotonic() - t0)
+        elapsed = time.monotonic() - started
+        db1, api1 = counters()
+        results["delete_post"] = _summary(latencies, elapsed, len(targets), len(targets), db1 - db0, api1 - api0)
+
+        # --- admin_preview: /start post previews for an admin ---
+        latencies = []
+        db0, api0 = counters()
+        rounds = max(args.rounds // 5, 1)
+        started = time.monotonic()
+        for _ in range(rounds):
+            t0 = time.monotonic()
+            await send_all_posts_to_admin(bot, BENCH_OWNER_ID, BENCH_OWNER_ID)
+            latencies.append(time.monotonic() - t0)
+        elapsed = time.monotonic() - started
+        db1, api1 = counters()
+        results["admin_preview"] = _summary(latencies, elapsed, rounds, rounds, db1 - db0, api1 - api0)
+    finally:
+        await worker.stop()
+        await write_buffer.flush()
+        await bot.session.close()
+        await close_app_connection()
+    return results
+
+
+async def _run_size(args: argparse.Namespace, size: int, api_url: str) -> dict:
+    with tempfile.TemporaryDirectory(prefix=f"bench-{size}-") as tmp:
+        env = dict(os.environ)
+        env.update(bench_env(os.path.join(tmp, "bot.db"), real_limits=args.real_limits))
+        cmd = [
+            sys.executable, "-m", "benchmarks.run", "--child",
+            "--size", str(size), "--api-url", api_url, "--rounds", str(args.rounds),
+            "--groups", str(args.groups), "--slot-posts", str(args.slot_posts),
+        ]
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, cwd=ROOT, env=env, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await proc.communicate()
+    for line in stdout.decode().splitlines():
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+    raise RuntimeError(f"benchmark for {size} post(s) failed:\n{stderr.decode()[-4000:]}")
+
+
+def _print_table(report: dict) -> None:
+    header = f"{'posts':>7} {'scenario':<14} {'ops':>5} {'per sec':>9} {'p50 ms':>9} {'p99 ms':>9} {'svc ms/op':>9} {'API/op':>7}"
+    print(header)
+    print("-" * len(header))
+    for size, results in report["sizes"].items():
+        for scenario in ("slot", "delete_post", "admin_preview"):
+            r = results[scenario]
+            print(
+                f"{size:>7} {scenario:<14} {r['ops']:>5} {r['throughput']:>9.1f} {r['p50_ms']:>9.2f} "
+                f"{r['p99_ms']:>9.2f} {r['db_ms_per_op']:>9.2f} {r['api_calls_per_op']:>7.1f}"
+            )
+    print("slot 'per sec' counts posts sent (posts x groups); seed times: "
+          + ", ".join(f"{size}={r['seed_seconds']}s" for size, r in report["sizes"].items()))
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Regressions beyond tolerance (0.25 = 25% slower) against a saved report."""
+    problems = []
+    for size, results in report["sizes"].items():
+        for scenario, current in results.items():
+            old = baseline.get("sizes", {}).get(size, {}).get(scenario)
+            if not isinstance(current, dict) or not old:
+                continue
+            for key in _LATENCY_KEYS:
+                if old[key] > 0 and current[key] > old[key] * (1 + tolerance):
+                    problems.append(f"{size}/{scenario} {key}: {old[key]} -> {current[key]}")
+            if old["throughput"] > 0 and current["throughput"] < old["throughput"] / (1 + tolerance):
+                problems.append(f"{size}/{scenario} throughput: {old['throughput']} -> {current['throughput']}")
+    return problems
+
+
+async def _parent(args: argparse.Namespace) -> int:
+    api = fake_bot_api.from_arguments(args)
+    api_url = await api.start()
+    report: dict = {"settings": {k: v for k, v in vars(args).items() if k not in ("child", "api_url")}, "sizes": {}}
+    try:
+        for size in args.sizes:
+            print(f"running {size} post(s)...", file=sys.stderr)
+            report["sizes"][str(size)] = await _run_size(args, size, api_url)
+    finally:
+        report["fake_api"] = api.stats()
+        await api.stop()
+    _print_table(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            problems = compare(report, json.load(f), args.tolerance)
+        if problems:
+            print("REGRESSIONS:\n  " + "\n  ".join(problems))
+            return 1
+        print(f"no regressions beyond {args.tolerance:.0%}")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 100_000], help="posts per dataset")
+    parser.add_argument("--rounds", type=int, default=20, help="slots / callbacks per scenario")
+    parser.add_argument("--groups", type=int, default=5, help="target groups per slot")
+    parser.add_argument("--slot-posts", type=int, default=10, help="posts attached to the benchmark schedule")
+    parser.add_argument("--real-limits", action="store_true", help="keep Telegram flood limits (30/s, 20/min per group)")
+    parser.add_argument("--json", help="write the report here")
+    parser.add_argument("--baseline", help="report to compare with; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    fake_bot_api.add_arguments(parser)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--api-url", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        apply_env({})
+        result = asyncio.run(_child(args))
+        print(RESULT_PREFIX + json.dumps(result))
+        return
+    sys.exit(asyncio.run(_parent(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Fake Telegram update poster: sends synthetic private-message updates to a webhook, the way Telegram would,
+and reports status codes, latency and throughput.
+
+Without --url it starts bot/webhook.py's WebhookServer in-process around a Dispatcher whose only handler
+sleeps --handler-ms, so the in-flight limit and the drain can be tried without Telegram or a database.
+With --url it posts to a running bot (BOT_MODE=webhook); note the updates are handled for real there.
+
+    python -m benchmarks.webhook_poster --count 2000 --concurrency 100 --handler-ms 20
+    python -m benchmarks.webhook_poster --url http://127.0.0.1:8080/webhook --secret s3cret
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import sys
+import time
+from collections import Counter
+from typing import List, Optional
+
+import aiohttp
+
+from benchmarks.common import percentile
+
+_update_ids = itertools.count(1)
+
+
+def make_update(user_id: int, text: str) -> dict:
+    update_id = next(_update_ids)
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private", "first_name": f"user{user_id}"},
+            "from": {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"},
+            "text": text,
+        },
+    }
+
+
+async def post_updates(url: str, count: int, concurrency: int, users: int, secret: str = "") -> None:
+    headers = {"X-Telegram-Bot-Api-Secret-Token": secret} if secret else {}
+    statuses: Counter = Counter()
+    latencies: List[float] = []
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one(session: aiohttp.ClientSession, i: int) -> None:
+        async with gate:
+            started = time.monotonic()
+            try:
+                async with session.post(url, json=make_update(100_000 + i % users, f"load {i}"), headers=headers) as resp:
+                    statuses[resp.status] += 1
+            except aiohttp.ClientError as e:
+                statuses[type(e).__name__] += 1
+            latencies.append(time.monotonic() - started)
+
+    started = time.monotonic()
+    async with aiohttp.ClientSession() as session:
+        await asyncio.gather(*(one(session, i) for i in range(count)))
+    elapsed = time.monotonic() - started
+    print(f"posted {count} update(s) in {elapsed:.2f}s ({count / elapsed:.0f}/s), concurrency {concurrency}")
+    print(f"status: {dict(statuses)}")
+    print(
+        "latency ms: p50=%.1f p90=%.1f p99=%.1f max=%.1f"
+        % tuple(x * 1000 for x in (percentile(latencies, 50), percentile(latencies, 90),
+                                   percentile(latencies, 99), max(latencies, default=0.0)))
+    )
+
+
+async def run_local(args: argparse.Namespace) -> None:
+    # Standalone: config.py only needs a syntactically valid token, nothing is sent to Telegram
+    os.environ.setdefault("BOT_TOKEN", "123456:local-webhook-poster")
+    os.environ.setdefault("OWNER_ID", "1")
+    from aiogram import Bot, Dispatcher, Router
+    from aiogram.types import Message
+
+    from bot.webhook import WebhookServer
+
+    handled = 0
+    running = 0
+    peak = 0
+    router = Router()
+
+    @router.message()
+    async def slow_handler(message: Message) -> None:
+        nonlocal handled, running, peak
+        running += 1
+        peak = max(peak, running)
+        try:
+            await asyncio.sleep(args.handler_ms / 1000)
+        finally:
+            running -= 1
+        handled += 1
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    bot = Bot(os.environ["BOT_TOKEN"])
+    server = WebhookServer(dp, bot, path="/webhook", secret=args.secret, max_inflight=args.max_inflight)
+    await server.start("127.0.0.1", args.port)
+    try:
+        await post_updates(f"http://127.0.0.1:{args.port}/webhook", args.count, args.concurrency, args.users, args.secret)
+        print(f"in flight after posting: {server.inflight()} (peak handlers {peak}, limit {server.max_inflight})")
+        await server.drain(timeout=args.drain_seconds)
+        print(f"handled {handled}/{server.received} accepted update(s), {server.rejected} rejected")
+    finally:
+        await bot.session.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="webhook URL of a running bot; omit to test an in-process server")
+    parser.add_argument("--secret", default="", help="X-Telegram-Bot-Api-Secret-Token value")
+    parser.add_argument("--count", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50, help="parallel connections (Telegram uses up to 100)")
+    parser.add_argument("--users", type=int, default=100, help="distinct synthetic senders")
+    parser.add_argument("--port", type=int, default=8081, help="in-process server port")
+    parser.add_argument("--handler-ms", type=float, default=20.0, help="in-process handler duration")
+    parser.add_argument("--max-inflight", type=int, default=50, help="in-process server in-flight limit")
+    parser.add_argument("--drain-seconds", type=float, default=30.0)
+    args = parser.parse_args(argv)
+    if args.url:
+        asyncio.run(post_updates(args.url, args.count, args.concurrency, args.users, args.secret))
+    else:
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        asyncio.run(run_local(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,26 +5,47 @@ from bot.database.connection import (
     close_app_connection,
     get_connection,
     get_db,
+    get_read_db,
     init_db,
     open_app_connection,
+    run_on_writer,
 )
+from bot.database.write_buffer import WriteBehindBuffer, write_buffer
+from bot.database.fsm_storage import SQLiteStorage
 from bot.database.models import (
     Admin,
     Content,
+    Lead,
+    OutboxItem,
     PostLog,
     Schedule,
+    SchedulePost,
+    ScheduleSlot,
     Setting,
+    TargetGroup,
+    User,
 )
 
 __all__ = [
     "close_app_connection",
     "get_connection",
     "get_db",
+    "get_read_db",
     "init_db",
     "open_app_connection",
+    "run_on_writer",
+    "WriteBehindBuffer",
+    "write_buffer",
+    "SQLiteStorage",
     "Admin",
     "Content",
+    "Lead",
+    "OutboxItem",
     "PostLog",
     "Schedule",
+    "SchedulePost",
+    "ScheduleSlot",
     "Setting",
+    "TargetGroup",
+    "User",
 ]
@@ -1,17 +1,43 @@
 """
 Async SQLite connection and database initialization.
+The app keeps one writer connection (get_db) and a small pool of read-only connections
+(get_read_db); the database runs in WAL mode so reads do not wait behind writes.
+Only one bot process may use a database: admin ids, the timetable, scheduler jobs and rate limits are
+kept in memory, so open_app_connection holds an exclusive lock file (DATABASE_PATH + ".lock") for the
+process lifetime and refuses to start a second one.
 """
 import aiosqlite
+import itertools
 import logging
+import os
+import sqlite3
 from pathlib import Path
-from typing import AsyncGenerator, Optional
-
-from config import DATABASE_PATH
+from typing import Any, AsyncGenerator, Callable, List, Optional, TypeVar
+
+from config import (
+    DATABASE_PATH,
+    DB_CACHE_SIZE_KB,
+    DB_MMAP_SIZE,
+    DB_READ_POOL_SIZE,
+    POSTS_ARCHIVE_PATH,
+    POSTS_LOG_RETENTION_DAYS,
+)
+from bot.database.migrations import migrate
 
 logger = logging.getLogger(__name__)
 
-# Singleton connection for app lifetime (SQLite works well with one conn per process)
+T = TypeVar("T")
+
+# Singleton writer connection for app lifetime (all INSERT/UPDATE/DELETE go through it)
 _conn: Optional[aiosqlite.Connection] = None
+# Read-only connections, handed out round-robin (each has its own aiosqlite worker thread)
+_read_pool: List[aiosqlite.Connection] = []
+_read_cycle = itertools.count()
+# Old posts_log rows live in a separate file, attached to the writer under this schema name
+ARCHIVE_SCHEMA = "archive"
+_archive_attached = False
+# Held open for the process lifetime; the OS drops the lock if the process dies
+_instance_lock: Optional[sqlite3.Connection] = None
 
 
 async def get_connection() -> AsyncGenerator[aiosqlite.Connection, None]:
@@ -30,178 +56,129 @@ def get_db() -> aiosqlite.Connection:
     return _conn
 
 
+async def run_on_writer(func: Callable[..., T], *args: Any) -> T:
+    """
+    Run func(sqlite3_connection, *args) on the writer connection's thread as one step: no other
+    coroutine's statement or commit can land in between (unlike a sequence of awaited executes).
+    """
+    conn = get_db()
+    # aiosqlite has no public hook for this; _execute queues the call on the connection's own thread
+    return await conn._execute(func, conn._conn, *args)
+
+
+def get_read_db() -> aiosqlite.Connection:
+    """Return a read-only connection for SELECTs. Falls back to the writer when there is no pool."""
+    if not _read_pool:
+        return get_db()
+    return _read_pool[next(_read_cycle) % len(_read_pool)]
+
+
+async def _apply_pragmas(conn: aiosqlite.Connection) -> None:
+    """Per-connection tuning; WAL itself is persistent and set once by the writer."""
+    await conn.execute("PRAGMA synchronous=NORMAL")
+    await conn.execute(f"PRAGMA cache_size=-{int(DB_CACHE_SIZE_KB)}")
+    await conn.execute(f"PRAGMA mmap_size={int(DB_MMAP_SIZE)}")
+    await conn.execute("PRAGMA busy_timeout=5000")
+
+
+def archive_attached() -> bool:
+    return _archive_attached
+
+
+async def _attach_archive(conn: aiosqlite.Connection) -> None:
+    """ATTACH the posts_log archive to the writer; must run before the connection opens a transaction."""
+    global _archive_attached
+    Path(POSTS_ARCHIVE_PATH).parent.mkdir(parents=True, exist_ok=True)
+    await conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (POSTS_ARCHIVE_PATH,))
+    await conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {ARCHIVE_SCHEMA}.posts_log (
+            id INTEGER PRIMARY KEY,
+            content_id INTEGER NOT NULL,
+            group_id INTEGER NOT NULL,
+            message_id INTEGER NOT NULL,
+            posted_at TIMESTAMP
+        )
+    """)
+    await conn.execute(
+        f"CREATE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.idx_archive_posts_log_content ON posts_log(content_id)"
+    )
+    await conn.commit()
+    _archive_attached = True
+
+
 async def init_db() -> None:
-    """Create tables if they do not exist (migration-less init)."""
+    """Bring the schema up to date by applying pending migrations (bot/database/migrations.py)."""
     path = Path(DATABASE_PATH)
     path.parent.mkdir(parents=True, exist_ok=True)
-    async with aiosqlite.connect(DATABASE_PATH) as conn:
-        await conn.executescript("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                telegram_id INTEGER UNIQUE NOT NULL,
-                username TEXT,
-                first_name TEXT,
-                last_name TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-
-            CREATE TABLE IF NOT EXISTS admins (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                telegram_id INTEGER UNIQUE NOT NULL,
-                username TEXT,
-                first_name TEXT,
-                last_name TEXT,
-                added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-
-            CREATE TABLE IF NOT EXISTS content (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                content_type TEXT NOT NULL CHECK(content_type IN ('photo', 'video', 'text')),
-                file_id TEXT,
-                text TEXT,
-                caption TEXT,
-                status TEXT NOT NULL DEFAULT 'active' CHECK(status IN ('active', 'deleted')),
-                publishing_enabled INTEGER NOT NULL DEFAULT 1,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                created_by INTEGER NOT NULL
-            );
-
-            CREATE TABLE IF NOT EXISTS schedules (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                time_str TEXT NOT NULL,
-                enabled INTEGER NOT NULL DEFAULT 1,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-
-            CREATE TABLE IF NOT EXISTS content_schedule (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                schedule_id INTEGER NOT NULL,
-                content_id INTEGER NOT NULL,
-                FOREIGN KEY (schedule_id) REFERENCES schedules(id) ON DELETE CASCADE,
-                FOREIGN KEY (content_id) REFERENCES content(id) ON DELETE CASCADE
-            );
-
-            CREATE TABLE IF NOT EXISTS posts_log (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                content_id INTEGER NOT NULL,
-                group_id INTEGER NOT NULL,
-                message_id INTEGER NOT NULL,
-                posted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (content_id) REFERENCES content(id)
-            );
-
-            CREATE TABLE IF NOT EXISTS leads (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                telegram_user_id INTEGER NOT NULL,
-                message_text TEXT NOT NULL,
-                source_content_id INTEGER,
-                status TEXT NOT NULL DEFAULT 'pending' CHECK(status IN ('pending', 'taken')),
-                taken_by_telegram_id INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                answered INTEGER NOT NULL DEFAULT 0,
-                answered_at TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id),
-                FOREIGN KEY (source_content_id) REFERENCES content(id)
-            );
-
-            CREATE TABLE IF NOT EXISTS settings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                key TEXT UNIQUE NOT NULL,
-                value TEXT NOT NULL,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-
-            CREATE INDEX IF NOT EXISTS idx_content_status ON content(status);
-            CREATE INDEX IF NOT EXISTS idx_leads_status ON leads(status);
-            CREATE INDEX IF NOT EXISTS idx_posts_log_content ON posts_log(content_id);
-        """)
-        await conn.commit()
-        for sql in (
-            "ALTER TABLE leads ADD COLUMN phone_number TEXT",
-            "ALTER TABLE leads ADD COLUMN answered INTEGER NOT NULL DEFAULT 0",
-            "ALTER TABLE leads ADD COLUMN answered_at TIMESTAMP",
-            "ALTER TABLE content ADD COLUMN publishing_enabled INTEGER NOT NULL DEFAULT 1",
-            "ALTER TABLE admins ADD COLUMN first_name TEXT",
-            "ALTER TABLE admins ADD COLUMN last_name TEXT",
-        ):
-            try:
-                await conn.execute(sql)
-                await conn.commit()
-            except Exception:
-                pass
-        try:
-            await conn.execute("CREATE INDEX IF NOT EXISTS idx_leads_status_answered ON leads(status, answered)")
-            await conn.commit()
-        except Exception:
-            pass
-        try:
-            await conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_content_schedule_schedule ON content_schedule(schedule_id)"
-            )
-            await conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_content_schedule_content ON content_schedule(content_id)"
-            )
-            await conn.commit()
-        except Exception:
-            pass
-        # Eski content_schedule (schedule_id PRIMARY KEY) yangi sxemaga o'tkazish
-        try:
-            async with conn.execute("PRAGMA table_info(content_schedule)") as cur:
-                cols = {row["name"] for row in await cur.fetchall()}
-            if "id" not in cols:
-                logger.info("content_schedule jadvalini yangi sxemaga o'tkazish...")
-                await conn.execute("ALTER TABLE content_schedule RENAME TO content_schedule_old")
-                await conn.execute("""
-                    CREATE TABLE content_schedule (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        schedule_id INTEGER NOT NULL,
-                        content_id INTEGER NOT NULL,
-                        FOREIGN KEY (schedule_id) REFERENCES schedules(id) ON DELETE CASCADE,
-                        FOREIGN KEY (content_id) REFERENCES content(id) ON DELETE CASCADE
-                    )
-                """)
-                await conn.execute(
-                    "INSERT INTO content_schedule (schedule_id, content_id) SELECT schedule_id, content_id FROM content_schedule_old"
-                )
-                await conn.execute("DROP TABLE content_schedule_old")
-                await conn.commit()
-                logger.info("content_schedule yangilandi: bir vaqtga bir nechta post biriktirish mumkin.")
-        except Exception as e:
-            logger.exception("content_schedule migration xatosi: %s", e)
-        try:
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS content_admin_messages (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    content_id INTEGER NOT NULL,
-                    admin_uid INTEGER NOT NULL,
-                    chat_id INTEGER NOT NULL,
-                    message_id INTEGER NOT NULL,
-                    FOREIGN KEY (content_id) REFERENCES content(id) ON DELETE CASCADE
-                )
-            """)
-            await conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_content_admin_messages_content ON content_admin_messages(content_id)"
-            )
-            await conn.commit()
-        except Exception:
-            pass
-        logger.info("Database initialized: %s", DATABASE_PATH)
+    async with aiosqlite.connect(DATABASE_PATH, isolation_level=None) as conn:
+        conn.row_factory = aiosqlite.Row
+        applied = await migrate(conn)
+    if applied:
+        logger.info("Database initialized: %s (migrations %s applied)", DATABASE_PATH, applied)
+    else:
+        logger.info("Database initialized: %s (schema up to date)", DATABASE_PATH)
+
+
+def _acquire_instance_lock() -> None:
+    """Take the per-database lock (a SQLite file in exclusive locking mode); RuntimeError if another process has it."""
+    global _instance_lock
+    lock = sqlite3.connect(DATABASE_PATH + ".lock", timeout=0, isolation_level=None)
+    try:
+        lock.execute("PRAGMA locking_mode=EXCLUSIVE")
+        # The first write takes the exclusive lock, which exclusive mode keeps until close
+        lock.execute("CREATE TABLE IF NOT EXISTS instance (pid INTEGER)")
+        lock.execute("DELETE FROM instance")
+        lock.execute("INSERT INTO instance (pid) VALUES (?)", (os.getpid(),))
+    except sqlite3.OperationalError as e:
+        lock.close()
+        raise RuntimeError(
+            f"Another bot process is already using {DATABASE_PATH}; run only one process per database"
+        ) from e
+    _instance_lock = lock
+
+
+def _release_instance_lock() -> None:
+    global _instance_lock
+    if _instance_lock is not None:
+        _instance_lock.close()
+        _instance_lock = None
 
 
 async def open_app_connection() -> aiosqlite.Connection:
-    """Open and store the app-level connection. Call once at startup."""
+    """Open and store the writer connection and the read pool. Call once at startup."""
     global _conn
     Path(DATABASE_PATH).parent.mkdir(parents=True, exist_ok=True)
+    _acquire_instance_lock()
     _conn = await aiosqlite.connect(DATABASE_PATH)
     _conn.row_factory = aiosqlite.Row
+    async with _conn.execute("PRAGMA journal_mode=WAL") as cur:
+        row = await cur.fetchone()
+    await _apply_pragmas(_conn)
+    # After the WAL pragma, which would otherwise switch the archive file to WAL as well
+    if POSTS_LOG_RETENTION_DAYS > 0 and POSTS_ARCHIVE_PATH:
+        await _attach_archive(_conn)
+    journal_mode = row[0] if row else "?"
+    if journal_mode != "wal":
+        logger.warning("WAL mode not available (journal_mode=%s), reads use the writer connection", journal_mode)
+        return _conn
+    read_uri = Path(DATABASE_PATH).resolve().as_uri() + "?mode=ro"
+    for _ in range(max(0, DB_READ_POOL_SIZE)):
+        reader = await aiosqlite.connect(read_uri, uri=True)
+        reader.row_factory = aiosqlite.Row
+        await _apply_pragmas(reader)
+        _read_pool.append(reader)
+    logger.info("Database opened in WAL mode with %d read connection(s)", len(_read_pool))
     return _conn
 
 
 async def close_app_connection() -> None:
-    """Close the app-level connection. Call at shutdown."""
-    global _conn
+    """Close the read pool and the writer connection. Call at shutdown."""
+    global _conn, _archive_attached
+    while _read_pool:
+        await _read_pool.pop().close()
     if _conn:
         await _conn.close()
         _conn = None
+        _archive_attached = False
         logger.info("Database connection closed.")
+    _release_instance_lock()
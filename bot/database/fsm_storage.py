@@ -0,0 +1,127 @@
+"""
+aiogram FSM storage in SQLite (fsm_state table), so half-finished admin drafts survive a restart.
+An in-memory LRU sits in front: aiogram reads the state on every update, and most updates come from
+users with no state at all — those "empty" answers are cached too. A cached entry is trusted for
+FSM_CACHE_SECONDS only, then the row is read again, so a change made to the table outside this
+storage is picked up; 0 reads the row on every update.
+Entries expire FSM_TTL_SECONDS after their last write; expired rows are purged periodically.
+"""
+import json
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+
+from config import FSM_CACHE_SECONDS, FSM_CACHE_SIZE, FSM_TTL_SECONDS
+from bot.database.connection import get_db, get_read_db
+
+logger = logging.getLogger(__name__)
+
+# (state, data, expires_at); expires_at is inf for "no row in the database"
+_Entry = Tuple[Optional[str], Dict[str, Any], float]
+_EMPTY: _Entry = (None, {}, math.inf)
+
+
+class SQLiteStorage(BaseStorage):
+    """Write-through FSM storage: every change goes to SQLite, reads are served from the LRU when possible."""
+
+    def __init__(
+        self,
+        cache_size: int = FSM_CACHE_SIZE,
+        ttl: float = FSM_TTL_SECONDS,
+        cache_seconds: float = FSM_CACHE_SECONDS,
+        key_builder: Optional[KeyBuilder] = None,
+    ) -> None:
+        self.cache_size = max(cache_size, 1)
+        self.ttl = ttl
+        self.cache_seconds = cache_seconds
+        self.key_builder = key_builder or DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+        # key -> (entry, time.monotonic() when it was read or written here)
+        self._cache: "OrderedDict[str, Tuple[_Entry, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _remember(self, key: str, entry: _Entry) -> None:
+        if self.cache_seconds <= 0:
+            return
+        self._cache[key] = (entry, time.monotonic())
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def _load(self, key: str) -> _Entry:
+        cached = self._cache.get(key)
+        if cached is not None and time.monotonic() - cached[1] < self.cache_seconds:
+            entry = cached[0]
+            self._cache.move_to_end(key)
+            self.hits += 1
+        else:
+            self.misses += 1
+            conn = get_read_db()
+            async with conn.execute("SELECT state, data, expires_at FROM fsm_state WHERE key = ?", (key,)) as cur:
+                row = await cur.fetchone()
+            entry = (row["state"], json.loads(row["data"]), row["expires_at"]) if row else _EMPTY
+            self._remember(key, entry)
+        if entry[2] <= time.time():
+            # Expired: the row itself goes with the next purge_expired()
+            return _EMPTY
+        return entry
+
+    async def _save(self, key: str, state: Optional[str], data: Dict[str, Any]) -> None:
+        conn = get_db()
+        if state is None and not data:
+            await conn.execute("DELETE FROM fsm_state WHERE key = ?", (key,))
+            await conn.commit()
+            self._remember(key, _EMPTY)
+            return
+        expires_at = time.time() + self.ttl if self.ttl > 0 else math.inf
+        await conn.execute(
+            """INSERT INTO fsm_state (key, state, data, expires_at) VALUES (?, ?, ?, ?)
+               ON CONFLICT(key) DO UPDATE SET
+                   state = excluded.state, data = excluded.data, expires_at = excluded.expires_at""",
+            # SQLite REAL has no infinity literal; 1e308 is "never"
+            (key, state, json.dumps(data, ensure_ascii=False), min(expires_at, 1e308)),
+        )
+        await conn.commit()
+        self._remember(key, (state, data, expires_at))
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        k = self.key_builder.build(key)
+        _, data, _ = await self._load(k)
+        await self._save(k, state.state if isinstance(state, State) else state, data)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        state, _, _ = await self._load(self.key_builder.build(key))
+        return state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        k = self.key_builder.build(key)
+        state, _, _ = await self._load(k)
+        await self._save(k, state, dict(data))
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        _, data, _ = await self._load(self.key_builder.build(key))
+        return dict(data)
+
+    async def purge_expired(self) -> int:
+        """Delete expired rows. Returns how many were removed."""
+        now = time.time()
+        conn = get_db()
+        cur = await conn.execute("DELETE FROM fsm_state WHERE expires_at <= ?", (now,))
+        await conn.commit()
+        for key in [k for k, (entry, _) in self._cache.items() if entry[2] <= now]:
+            del self._cache[key]
+        if cur.rowcount:
+            logger.info("FSM storage: %d expired state(s) purged", cur.rowcount)
+        return cur.rowcount
+
+    def stats(self) -> dict:
+        return {"cached": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+    async def close(self) -> None:
+        # The connection belongs to the app (close_app_connection); only the cache is ours
+        self._cache.clear()
@@ -0,0 +1,286 @@
+"""
+Versioned schema migrations.
+Applied versions are recorded in schema_version; init_db applies only the pending ones,
+all inside one transaction. On an up-to-date database startup costs a single query.
+Add new schema changes as a new Migration at the end of MIGRATIONS — never edit an applied one.
+"""
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Sequence, Union
+
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+Step = Union[str, Callable[[aiosqlite.Connection], Awaitable[None]]]
+
+
+@dataclass(frozen=True)
+class Migration:
+    """One schema version: SQL statements and/or async callables run in order."""
+    version: int
+    description: str
+    steps: Sequence[Step]
+
+
+async def _table_columns(conn: aiosqlite.Connection, table: str) -> set:
+    async with conn.execute(f"PRAGMA table_info({table})") as cur:
+        return {row["name"] for row in await cur.fetchall()}
+
+
+def _add_column_if_missing(table: str, column: str, ddl: str) -> Callable[[aiosqlite.Connection], Awaitable[None]]:
+    """Step for columns that databases created before schema_version may already have."""
+    async def step(conn: aiosqlite.Connection) -> None:
+        if column not in await _table_columns(conn, table):
+            await conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+    return step
+
+
+async def _rebuild_content_schedule(conn: aiosqlite.Connection) -> None:
+    """Eski content_schedule (schedule_id PRIMARY KEY) ni bir vaqtga ko'p post sxemasiga o'tkazish."""
+    if "id" in await _table_columns(conn, "content_schedule"):
+        return
+    logger.info("content_schedule jadvalini yangi sxemaga o'tkazish...")
+    await conn.execute("ALTER TABLE content_schedule RENAME TO content_schedule_old")
+    await conn.execute("""
+        CREATE TABLE content_schedule (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            schedule_id INTEGER NOT NULL,
+            content_id INTEGER NOT NULL,
+            FOREIGN KEY (schedule_id) REFERENCES schedules(id) ON DELETE CASCADE,
+            FOREIGN KEY (content_id) REFERENCES content(id) ON DELETE CASCADE
+        )
+    """)
+    await conn.execute(
+        "INSERT INTO content_schedule (schedule_id, content_id) SELECT schedule_id, content_id FROM content_schedule_old"
+    )
+    await conn.execute("DROP TABLE content_schedule_old")
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "baseline schema", [
+        """CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            telegram_id INTEGER UNIQUE NOT NULL,
+            username TEXT,
+            first_name TEXT,
+            last_name TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""",
+        """CREATE TABLE IF NOT EXISTS admins (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            telegram_id INTEGER UNIQUE NOT NULL,
+            username TEXT,
+            first_name TEXT,
+            last_name TEXT,
+            added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""",
+        """CREATE TABLE IF NOT EXISTS content (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            content_type TEXT NOT NULL CHECK(content_type IN ('photo', 'video', 'text')),
+            file_id TEXT,
+            text TEXT,
+            caption TEXT,
+            status TEXT NOT NULL DEFAULT 'active' CHECK(status IN ('active', 'deleted')),
+            publishing_enabled INTEGER NOT NULL DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            created_by INTEGER NOT NULL
+        )""",
+        """CREATE TABLE IF NOT EXISTS schedules (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            time_str TEXT NOT NULL,
+            enabled INTEGER NOT NULL DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""",
+        """CREATE TABLE IF NOT EXISTS content_schedule (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            schedule_id INTEGER NOT NULL,
+            content_id INTEGER NOT NULL,
+            FOREIGN KEY (schedule_id) REFERENCES schedules(id) ON DELETE CASCADE,
+            FOREIGN KEY (content_id) REFERENCES content(id) ON DELETE CASCADE
+        )""",
+        """CREATE TABLE IF NOT EXISTS posts_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            content_id INTEGER NOT NULL,
+            group_id INTEGER NOT NULL,
+            message_id INTEGER NOT NULL,
+            posted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (content_id) REFERENCES content(id)
+        )""",
+        """CREATE TABLE IF NOT EXISTS leads (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            telegram_user_id INTEGER NOT NULL,
+            message_text TEXT NOT NULL,
+            source_content_id INTEGER,
+            status TEXT NOT NULL DEFAULT 'pending' CHECK(status IN ('pending', 'taken')),
+            taken_by_telegram_id INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            answered INTEGER NOT NULL DEFAULT 0,
+            answered_at TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id),
+            FOREIGN KEY (source_content_id) REFERENCES content(id)
+        )""",
+        """CREATE TABLE IF NOT EXISTS settings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            key TEXT UNIQUE NOT NULL,
+            value TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""",
+        """CREATE TABLE IF NOT EXISTS content_admin_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            content_id INTEGER NOT NULL,
+            admin_uid INTEGER NOT NULL,
+            chat_id INTEGER NOT NULL,
+            message_id INTEGER NOT NULL,
+            FOREIGN KEY (content_id) REFERENCES content(id) ON DELETE CASCADE
+        )""",
+        """CREATE TABLE IF NOT EXISTS target_groups (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chat_id INTEGER UNIQUE NOT NULL,
+            title TEXT,
+            enabled INTEGER NOT NULL DEFAULT 1,
+            added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_content_status ON content(status)",
+        "CREATE INDEX IF NOT EXISTS idx_leads_status ON leads(status)",
+        "CREATE INDEX IF NOT EXISTS idx_posts_log_content ON posts_log(content_id)",
+        "CREATE INDEX IF NOT EXISTS idx_content_admin_messages_content ON content_admin_messages(content_id)",
+    ]),
+    Migration(2, "columns added before versioned migrations", [
+        _add_column_if_missing("leads", "phone_number", "TEXT"),
+        _add_column_if_missing("leads", "answered", "INTEGER NOT NULL DEFAULT 0"),
+        _add_column_if_missing("leads", "answered_at", "TIMESTAMP"),
+        _add_column_if_missing("content", "publishing_enabled", "INTEGER NOT NULL DEFAULT 1"),
+        _add_column_if_missing("admins", "first_name", "TEXT"),
+        _add_column_if_missing("admins", "last_name", "TEXT"),
+    ]),
+    Migration(3, "content_schedule: several posts per schedule time", [
+        _rebuild_content_schedule,
+    ]),
+    Migration(4, "lead and content_schedule indexes", [
+        "CREATE INDEX IF NOT EXISTS idx_leads_status_answered ON leads(status, answered)",
+        "CREATE INDEX IF NOT EXISTS idx_content_schedule_schedule ON content_schedule(schedule_id)",
+        "CREATE INDEX IF NOT EXISTS idx_content_schedule_content ON content_schedule(content_id)",
+    ]),
+    Migration(5, "schedule_runs: one row per fired slot (dedup for missed-slot catch-up)", [
+        """CREATE TABLE IF NOT EXISTS schedule_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            schedule_id INTEGER NOT NULL,
+            slot_at TEXT NOT NULL,
+            replayed INTEGER NOT NULL DEFAULT 0,
+            fired_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (schedule_id, slot_at)
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_posts_log_posted_at ON posts_log(posted_at)",
+    ]),
+    Migration(6, "content_admin_messages lookup by admin", [
+        "CREATE INDEX IF NOT EXISTS idx_content_admin_messages_admin ON content_admin_messages(admin_uid)",
+    ]),
+    Migration(7, "keyset index for the admin post browser", [
+        "CREATE INDEX IF NOT EXISTS idx_content_status_created ON content(status, created_at, id)",
+    ]),
+    Migration(8, "outbox: durable queue of scheduled sends", [
+        """CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            content_id INTEGER NOT NULL,
+            chat_id INTEGER NOT NULL,
+            schedule_id INTEGER,
+            slot_at TEXT,
+            status TEXT NOT NULL DEFAULT 'pending' CHECK(status IN ('pending', 'sending', 'sent', 'failed')),
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            message_id INTEGER,
+            last_error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (content_id, chat_id, slot_at)
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox(status, next_attempt_at)",
+    ]),
+    Migration(9, "users: /start deep-link source for lead attribution", [
+        _add_column_if_missing("users", "source_content_id", "INTEGER"),
+        "CREATE INDEX IF NOT EXISTS idx_leads_user_created ON leads(telegram_user_id, created_at)",
+    ]),
+    Migration(10, "fsm_state: persistent conversation state for admin flows", [
+        """CREATE TABLE IF NOT EXISTS fsm_state (
+            key TEXT PRIMARY KEY,
+            state TEXT,
+            data TEXT NOT NULL DEFAULT '{}',
+            expires_at REAL NOT NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_fsm_state_expires ON fsm_state(expires_at)",
+    ]),
+    Migration(11, "posts_log retention: content.last_posted_at, posts_daily rollups", [
+        _add_column_if_missing("content", "last_posted_at", "TIMESTAMP"),
+        """UPDATE content SET last_posted_at =
+            (SELECT MAX(posted_at) FROM posts_log WHERE posts_log.content_id = content.id)""",
+        # Kept on write, so "oxirgi nashr" is one row per post and survives archiving of posts_log
+        """CREATE TRIGGER IF NOT EXISTS trg_posts_log_last_posted AFTER INSERT ON posts_log
+        BEGIN
+            UPDATE content SET last_posted_at = NEW.posted_at
+            WHERE id = NEW.content_id AND (last_posted_at IS NULL OR last_posted_at < NEW.posted_at);
+        END""",
+        """CREATE TABLE IF NOT EXISTS posts_daily (
+            day TEXT NOT NULL,
+            content_id INTEGER NOT NULL,
+            group_id INTEGER NOT NULL,
+            posts INTEGER NOT NULL,
+            first_posted_at TIMESTAMP,
+            last_posted_at TIMESTAMP,
+            PRIMARY KEY (day, content_id, group_id)
+        ) WITHOUT ROWID""",
+        "CREATE INDEX IF NOT EXISTS idx_posts_daily_content ON posts_daily(content_id)",
+        # Watermarks of incremental jobs (rollup_last_id: last posts_log.id counted in posts_daily)
+        """CREATE TABLE IF NOT EXISTS retention_state (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )""",
+    ]),
+]
+
+
+async def get_schema_version(conn: aiosqlite.Connection) -> int:
+    """Highest applied version; 0 for a new (or pre-migration) database."""
+    try:
+        async with conn.execute("SELECT MAX(version) FROM schema_version") as cur:
+            row = await cur.fetchone()
+    except aiosqlite.OperationalError:
+        return 0
+    return row[0] or 0
+
+
+async def migrate(conn: aiosqlite.Connection, migrations: Sequence[Migration] = MIGRATIONS) -> List[int]:
+    """
+    Apply pending migrations in one transaction. Returns the versions applied.
+    conn must be in autocommit mode (isolation_level=None) so BEGIN/COMMIT are ours.
+    """
+    current = await get_schema_version(conn)
+    pending = [m for m in sorted(migrations, key=lambda m: m.version) if m.version > current]
+    if not pending:
+        return []
+    await conn.execute("BEGIN IMMEDIATE")
+    try:
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        for m in pending:
+            for step in m.steps:
+                if isinstance(step, str):
+                    await conn.execute(step)
+                else:
+                    await step(conn)
+            await conn.execute(
+                "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                (m.version, m.description),
+            )
+            logger.info("Migration %d applied: %s", m.version, m.description)
+        await conn.execute("COMMIT")
+    except Exception:
+        await conn.execute("ROLLBACK")
+        raise
+    return [m.version for m in pending]
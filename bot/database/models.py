@@ -2,14 +2,45 @@
 SQLite table definitions and row types.
 Content types: photo, video, text. Status: active, deleted.
 """
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Literal, Optional
+from typing import List, Literal, Optional
 
 ContentType = Literal["photo", "video", "text"]
 ContentStatus = Literal["active", "deleted"]
 
 
+@dataclass
+class User:
+    """Private-chat user who started the bot or wrote to it."""
+    id: int
+    telegram_id: int
+    username: Optional[str]
+    first_name: Optional[str]
+    last_name: Optional[str]
+    source_content_id: Optional[int]  # post from the last /start deep link
+    created_at: datetime
+
+
+LeadStatus = Literal["pending", "taken"]
+
+
+@dataclass
+class Lead:
+    """Message from a user, waiting for an admin to take and answer it."""
+    id: int
+    user_id: int
+    telegram_user_id: int
+    message_text: str
+    source_content_id: Optional[int]
+    phone_number: Optional[str]
+    status: LeadStatus
+    taken_by_telegram_id: Optional[int]
+    answered: bool
+    created_at: datetime
+    answered_at: Optional[datetime]
+
+
 @dataclass
 class Admin:
     """Admin user (added by owner)."""
@@ -44,6 +75,22 @@ class Schedule:
     created_at: datetime
 
 
+@dataclass
+class SchedulePost:
+    """Post attached to a schedule time, as shown in the admin schedule view."""
+    content_id: int
+    content_type: ContentType
+    preview: str  # caption or text, first 100 chars
+    publishing_enabled: bool
+
+
+@dataclass
+class ScheduleSlot:
+    """A schedule time with every active post attached to it."""
+    schedule: Schedule
+    posts: List[SchedulePost] = field(default_factory=list)
+
+
 @dataclass
 class PostLog:
     """Log of each repost to target group."""
@@ -54,6 +101,34 @@ class PostLog:
     posted_at: datetime
 
 
+OutboxStatus = Literal["pending", "sending", "sent", "failed"]
+
+
+@dataclass
+class OutboxItem:
+    """One queued send of a content to a chat (outbox table)."""
+    id: int
+    content_id: int
+    chat_id: int
+    schedule_id: Optional[int]
+    slot_at: Optional[str]
+    status: OutboxStatus
+    attempts: int
+    next_attempt_at: float  # unix time
+    message_id: Optional[int]
+    last_error: Optional[str]
+
+
+@dataclass
+class TargetGroup:
+    """Extra group/channel that scheduled posts are published to."""
+    id: int
+    chat_id: int
+    title: Optional[str]
+    enabled: bool
+    added_at: datetime
+
+
 @dataclass
 class Setting:
     """Key-value settings (target_group_id, posting_enabled, banner_file_id)."""
@@ -0,0 +1,167 @@
+"""
+Write-behind buffer: append-only INSERTs (posts_log, content_admin_messages) are queued in memory
+and committed together in one transaction — when the buffer is full, after a short time window,
+before a read of the same table, or on shutdown.
+A flush runs in one step on the writer's thread, inside its own SAVEPOINT, so a failure undoes only the
+buffer's rows, not other statements on the shared writer connection. It commits only a transaction it
+opened itself; if another coroutine's transaction is open, the rows are released into it and commit with it. A failed batch is retried row by
+row: rows that violate a constraint are dropped (logged) at once, others after WRITE_BUFFER_MAX_ATTEMPTS
+failed flushes.
+"""
+import asyncio
+import contextvars
+import logging
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import WRITE_BUFFER_FLUSH_SECONDS, WRITE_BUFFER_MAX_ATTEMPTS, WRITE_BUFFER_MAX_ROWS
+from bot.database.connection import run_on_writer
+from bot.metrics import db_timed
+
+logger = logging.getLogger(__name__)
+
+_SAVEPOINT = "write_buffer"
+
+# (sql, params, failed flushes so far)
+_Row = Tuple[str, tuple, int]
+
+
+def _write_batch(db: sqlite3.Connection, batch: List[_Row]) -> Tuple[int, List[Tuple[_Row, Exception]]]:
+    """
+    Runs on the writer's thread (run_on_writer). Insert the batch in a savepoint; if that fails, roll
+    back only the savepoint and insert row by row. Returns (rows written, [(row, error)] that failed).
+    """
+    # Group consecutive rows of the same statement so each group is one executemany
+    groups: List[Tuple[str, List[tuple]]] = []
+    for sql, params, _ in batch:
+        if groups and groups[-1][0] == sql:
+            groups[-1][1].append(params)
+        else:
+            groups.append((sql, [params]))
+    failed: List[Tuple[_Row, Exception]] = []
+    # Another coroutine's uncommitted statements are not ours to commit
+    opened = not db.in_transaction
+    db.execute(f"SAVEPOINT {_SAVEPOINT}")
+    try:
+        try:
+            for sql, rows in groups:
+                db.executemany(sql, rows)
+        except sqlite3.Error:
+            db.execute(f"ROLLBACK TO {_SAVEPOINT}")
+            for row in batch:
+                db.execute(f"SAVEPOINT {_SAVEPOINT}_row")
+                try:
+                    db.execute(row[0], row[1])
+                except sqlite3.Error as e:
+                    db.execute(f"ROLLBACK TO {_SAVEPOINT}_row")
+                    failed.append((row, e))
+                db.execute(f"RELEASE {_SAVEPOINT}_row")
+        db.execute(f"RELEASE {_SAVEPOINT}")
+    except BaseException:
+        db.execute(f"ROLLBACK TO {_SAVEPOINT}")
+        db.execute(f"RELEASE {_SAVEPOINT}")
+        raise
+    if opened:
+        db.commit()
+    return len(batch) - len(failed), failed
+
+
+class WriteBehindBuffer:
+    """Collects (sql, params) rows and flushes them with executemany + a single commit."""
+
+    def __init__(self, max_rows: int, flush_interval: float, max_attempts: int = WRITE_BUFFER_MAX_ATTEMPTS) -> None:
+        self.max_rows = max_rows
+        self.flush_interval = flush_interval
+        self.max_attempts = max(max_attempts, 1)
+        self._pending: List[_Row] = []
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def stats(self) -> Dict[str, int]:
+        return {"pending_rows": len(self._pending), "dropped_rows": self.dropped}
+
+    async def add(self, sql: str, params: tuple) -> None:
+        await self.add_many(sql, (params,))
+
+    async def add_many(self, sql: str, rows: Iterable[tuple]) -> None:
+        self._pending.extend((sql, tuple(params), 0) for params in rows)
+        if len(self._pending) >= self.max_rows:
+            await self._flush_logged()
+        else:
+            self._arm_timer()
+
+    def _arm_timer(self) -> None:
+        if self._pending and self._timer is None:
+            loop = asyncio.get_running_loop()
+            # Fresh context: the timed flush belongs to no update's trace or log context
+            self._timer = loop.call_later(self.flush_interval, self._on_timer, context=contextvars.Context())
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._flush_task = asyncio.ensure_future(self._flush_logged())
+
+    async def _flush_logged(self) -> None:
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.exception("Write buffer flush failed, %d row(s) kept for retry: %s", len(self._pending), e)
+            self._arm_timer()
+
+    @db_timed
+    async def flush(self) -> int:
+        """Commit everything queued so far. Returns the number of rows written."""
+        async with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            try:
+                written, failed = await run_on_writer(_write_batch, batch)
+            except Exception:
+                # Nothing of this batch was committed: keep the rows (in order, ahead of anything
+                # queued meanwhile) for the next flush
+                self._pending[:0] = self._count_failure(batch)
+                raise
+            retry: List[_Row] = []
+            for row, error in failed:
+                if isinstance(error, sqlite3.IntegrityError):
+                    # e.g. FOREIGN KEY failed after a hard delete: retrying cannot help
+                    self._drop(row, error)
+                else:
+                    retry.extend(self._count_failure([row], error))
+            if retry:
+                logger.warning("Write buffer: %d row(s) failed, kept for retry: %s", len(retry), failed[-1][1])
+                self._pending[:0] = retry
+                self._arm_timer()
+            return written
+
+    def _count_failure(self, rows: List[_Row], error: Optional[Exception] = None) -> List[_Row]:
+        """Rows with one more failed flush; those out of attempts are dropped."""
+        kept = []
+        for sql, params, failures in rows:
+            if failures + 1 >= self.max_attempts:
+                self._drop((sql, params, failures + 1), error)
+            else:
+                kept.append((sql, params, failures + 1))
+        return kept
+
+    def _drop(self, row: _Row, error: Optional[Exception]) -> None:
+        self.dropped += 1
+        sql, params, failures = row
+        logger.error(
+            "Write buffer row dropped after %d failed flush(es): %s %r: %s",
+            max(failures, 1), " ".join(sql.split()), params, error,
+        )
+
+
+write_buffer = WriteBehindBuffer(
+    max_rows=WRITE_BUFFER_MAX_ROWS,
+    flush_interval=WRITE_BUFFER_FLUSH_SECONDS,
+)
@@ -2,23 +2,31 @@
 """
 Admin handlers: content, schedule, history, settings. Excludes owner-only commands.
 """
+import asyncio
 import logging
 import re
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 
 from aiogram import Router, F
 from aiogram.enums import ChatType
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 from aiogram.exceptions import TelegramBadRequest
 from aiogram.types import Message, CallbackQuery
-from aiogram.filters import Filter
+from aiogram.filters import StateFilter
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
 
 from bot.texts import (
     HELP_HEADER, HELP_GUIDE,
     ADD_TEXT_EMPTY,
     TIMES_SET, TARGET_GROUP_SET, TARGET_GROUP_PROMPT_ID, TARGET_GROUP_ID_RECEIVED,
     GROUP_ID_SHOULD_BE_NEGATIVE,
+    TARGET_GROUP_ADDED, TARGET_GROUP_REMOVED, TARGET_GROUP_NOT_FOUND,
+    TARGET_GROUPS_HEADER, TARGET_GROUPS_EMPTY,
     CONTENT_SAVED, POST_DELETED, POST_NOT_FOUND,
-    SCHEDULE_ADDED, SCHEDULE_REMOVED, SCHEDULE_INVALID, CURRENT_TIMES,
+    SCHEDULE_ADDED, SCHEDULE_REMOVED, SCHEDULE_INVALID, CURRENT_TIMES, SCHEDULE_MORE,
     SCHEDULE_ADD_TIME_HINT,
     SCHEDULE_PICK_HOUR, SCHEDULE_PICK_MINUTE, SCHEDULE_TIME_ADDED,
     POST_NOT_ASSIGNED, SCHEDULE_PICK_POST_HEADER, SCHEDULE_ASSIGNED, NASHR_TIMES_LABEL,
@@ -32,12 +40,14 @@ from bot.texts import (
     TEXT_POST_SEND_PROMPT,
     BTN_ADD_TEXT_POST,
     ADMIN_ONLY,
+    POSTS_PAGE_HEADER, POSTS_PAGE_EMPTY, POSTS_BROWSER_HINT,
 )
 from bot.services import (
     content_service,
     schedule_service,
     settings_service,
     admin_service,
+    group_service,
 )
 from bot.scheduler import posting as posting_module
 from bot.texts import (
@@ -48,6 +58,7 @@ from bot.texts import (
 from bot.keyboards.reply import admin_main_keyboard
 from bot.keyboards.inline import (
     history_delete_keyboard,
+    posts_page_keyboard,
     schedule_keyboard,
     confirm_target_group_keyboard,
     post_add_confirm_keyboard,
@@ -61,10 +72,13 @@ from bot.keyboards.inline import (
     schedule_pick_post_keyboard,
     admin_main_inline_keyboard,
 )
-from config import is_owner
+from config import ADMIN_POSTS_PAGE_SIZE, ADMIN_PREVIEW_MAX_POSTS, is_owner
 
 logger = logging.getLogger(__name__)
 
+# Bot API delete_messages bir chaqiruvda ko'pi bilan 100 ta message_id qabul qiladi
+_DELETE_MESSAGES_BATCH = 100
+
 # Reply keyboard tugma matnlari — admin_text_ignored_for_content ularni yutmasin, maxsus handlerlar ishlasin
 _ADMIN_BUTTON_TEXTS = frozenset({
     BTN_HELP,
@@ -76,58 +90,72 @@ def _admin_kb(message: Message):
     return admin_main_keyboard(include_owner=is_owner(message.from_user.id or 0))
 router = Router(name="admin")
 
-# Vaqt qo'shish: soat tanlang -> minut tanlang -> add_schedule
-_schedule_pending: dict[int, dict] = {}
-# Nashr guruhi: ID kiritiladi, keyin inline tasdiq
-_target_group_awaiting: set[int] = set()
-_target_group_pending: dict[int, int] = {}
-# Post qo'shish: rasm/video kutiladi, keyin caption va Yakunlash/Bekor
-_post_add_waiting_media: set[int] = set()
-_post_add_pending: dict[int, dict] = {}  # uid -> {content_type, file_id, caption}
-# Post qo'shish: Yakunlashdan keyin vaqt tanlash — {content_type, file_id?, caption?, text?, hour?}
-_post_add_confirm_pending: dict[int, dict] = {}
-# Matnli post qo'shish — alohida pending (tugma orqali boshlanadi)
-_text_post_awaiting: set[int] = set()  # matn kutilmoqda
-_text_post_pending: dict[int, dict] = {}  # uid -> {"text": str}
-_text_post_confirm_pending: dict[int, dict] = {}  # uid -> {"text": str, "hour": int, "minute": str}
+# Admin suhbat holatlari FSM da (SQLiteStorage): restartdan keyin ham saqlanadi, muddati o'tsa o'chadi.
+# Har admin uchun bitta aktiv flow — yangisi boshlansa eskisi tashlanadi.
+class TargetGroupFlow(StatesGroup):
+    """Nashr guruhi: ID kiritiladi, keyin inline tasdiq. data: {group_id}"""
+    waiting_id = State()
+    confirm = State()
+
+
+class PostAddFlow(StatesGroup):
+    """Post qo'shish: rasm/video/matn -> caption va Yakunlash/Bekor -> vaqt.
+    data: {content_type, file_id?, caption?, text?, hour?}"""
+    waiting_media = State()
+    confirm = State()
+    pick_time = State()
+
+
+class TextPostFlow(StatesGroup):
+    """Matnli post (tugma orqali yoki shunchaki matn yuborilganda). data: {text, hour?}"""
+    waiting_text = State()
+    confirm = State()
+    pick_time = State()
 
 
-class _InGroupIdFlowFilter(Filter):
-    """True when user is entering group ID (target group flow)."""
+class ScheduleFlow(StatesGroup):
+    """Vaqt qo'shish: soat tanlandi, minut kutilmoqda. data: {hour}"""
+    pick_minute = State()
 
-    async def __call__(self, message: Message) -> bool:
-        uid = message.from_user.id if message.from_user else 0
-        return uid in _target_group_awaiting
 
+async def _enter(state: FSMContext, step: State, **data) -> None:
+    """Flow qadamiga o'tish; oldingi flow ma'lumotlari almashtiriladi."""
+    await state.set_data(data)
+    await state.set_state(step)
 
-async def handle_admin_text_post(message: Message) -> None:
+
+async def _clear_if(state: FSMContext, step: State) -> None:
+    """Bekor tugmasi: faqat shu qadamdagi flow tozalanadi (eski xabardagi tugma boshqa flow'ni buzmasin)."""
+    if await state.get_state() == step.state:
+        await state.clear()
+
+
+async def handle_admin_text_post(message: Message, state: FSMContext) -> None:
     """Admin/owner xabar yuborganda barcha matn holatlari shu yerda hal qilinadi."""
-    uid = message.from_user.id if message.from_user else 0
     text = (message.text or "").strip()
+    current = await state.get_state()
 
     # 0. Nashr guruhi ID kiritish flow'ida — matn raqam bo'lsa, group ID sifatida qabul qil
-    if uid in _target_group_awaiting and re.match(r"^-?\d+$", text):
-        _target_group_awaiting.discard(uid)
-        gid = int(text)
-        _target_group_pending[uid] = gid
+    if current == TargetGroupFlow.waiting_id.state and re.match(r"^-?\d+$", text):
+        await _enter(state, TargetGroupFlow.confirm, group_id=int(text))
         await message.answer(TARGET_GROUP_ID_RECEIVED, reply_markup=confirm_target_group_keyboard())
         return
 
     # 1. "Matnli post qo'shish" tugmasi bosilgan — matn kiritish kutilmoqda
-    if uid in _text_post_awaiting:
-        _text_post_awaiting.discard(uid)
+    if current == TextPostFlow.waiting_text.state:
         if not text:
+            await state.clear()
             await message.answer(TEXT_POST_SEND_PROMPT, reply_markup=_admin_kb(message))
             return
-        _text_post_pending[uid] = {"text": text}
+        await _enter(state, TextPostFlow.confirm, text=text)
         await message.answer(text, reply_markup=text_post_confirm_keyboard())
         return
 
     # 2. Rasm/video yuborilgan — caption kiritish kutilmoqda
-    if uid in _post_add_pending:
-        pending = _post_add_pending[uid]
+    if current == PostAddFlow.confirm.state:
+        pending = await state.get_data()
         if pending.get("content_type") in ("photo", "video"):
-            pending["caption"] = text
+            await state.update_data(caption=text)
             await message.answer(POST_ADD_CAPTION_ADDED, reply_markup=post_add_confirm_keyboard())
         else:
             # Matnli post allaqachon bor — Yakunlash yoki Bekor bosish kerak
@@ -135,19 +163,19 @@ async def handle_admin_text_post(message: Message) -> None:
         return
 
     # 3. "Post qo'shish" tugmasi bosilgan — rasm/video/matn kutilmoqda, matn keldi
-    if uid in _post_add_waiting_media:
-        _post_add_waiting_media.discard(uid)
+    if current == PostAddFlow.waiting_media.state:
         if not text:
+            await state.clear()
             await message.answer(POST_ADD_SEND_MEDIA, reply_markup=_admin_kb(message))
             return
-        _post_add_pending[uid] = {"content_type": "text", "text": text}
+        await _enter(state, PostAddFlow.confirm, content_type="text", text=text)
         await message.answer(text, reply_markup=post_add_confirm_keyboard())
         return
 
     # 4. Hech qanday aktiv flow yo'q — yangi matnli post sifatida qabul qil
     if not text:
         return
-    _text_post_pending[uid] = {"text": text}
+    await _enter(state, TextPostFlow.confirm, text=text)
     await message.answer(text, reply_markup=text_post_confirm_keyboard())
 
 
@@ -166,54 +194,50 @@ async def cmd_help(message: Message) -> None:
 
 # ---------- Post qo'shish tugmasi ----------
 @router.message(F.chat.type == ChatType.PRIVATE, F.text == BTN_ADD_POST)
-async def btn_add_post(message: Message) -> None:
-    uid = message.from_user.id if message.from_user else 0
-    _post_add_waiting_media.add(uid)
+async def btn_add_post(message: Message, state: FSMContext) -> None:
+    await _enter(state, PostAddFlow.waiting_media)
     await message.answer(POST_ADD_SEND_MEDIA, reply_markup=_admin_kb(message))
 
 
 # ---------- Matnli post qo'shish (alohida flow) ----------
 @router.message(F.chat.type == ChatType.PRIVATE, F.text == BTN_ADD_TEXT_POST)
-async def btn_add_text_post(message: Message) -> None:
-    uid = message.from_user.id if message.from_user else 0
-    _text_post_awaiting.add(uid)
+async def btn_add_text_post(message: Message, state: FSMContext) -> None:
+    await _enter(state, TextPostFlow.waiting_text)
     await message.answer(TEXT_POST_SEND_PROMPT, reply_markup=_admin_kb(message))
 
 
 # ---------- Content: photo, video ----------
 @router.message(F.chat.type == ChatType.PRIVATE, F.photo)
-async def admin_save_photo(message: Message) -> None:
-    uid = message.from_user.id if message.from_user else 0
-    _post_add_waiting_media.discard(uid)
+async def admin_save_photo(message: Message, state: FSMContext) -> None:
     photo = message.photo[-1]
-    _post_add_pending[uid] = {
-        "content_type": "photo",
-        "file_id": photo.file_id,
-        "caption": (message.caption or "").strip(),
-    }
+    await _enter(
+        state,
+        PostAddFlow.confirm,
+        content_type="photo",
+        file_id=photo.file_id,
+        caption=(message.caption or "").strip(),
+    )
     await message.answer(POST_ADD_SEND_CAPTION, reply_markup=post_add_confirm_keyboard())
 
 
 @router.message(F.chat.type == ChatType.PRIVATE, F.video)
-async def admin_save_video(message: Message) -> None:
-    uid = message.from_user.id if message.from_user else 0
-    _post_add_waiting_media.discard(uid)
-    _post_add_pending[uid] = {
-        "content_type": "video",
-        "file_id": message.video.file_id,
-        "caption": (message.caption or "").strip(),
-    }
+async def admin_save_video(message: Message, state: FSMContext) -> None:
+    await _enter(
+        state,
+        PostAddFlow.confirm,
+        content_type="video",
+        file_id=message.video.file_id,
+        caption=(message.caption or "").strip(),
+    )
     await message.answer(POST_ADD_SEND_CAPTION, reply_markup=post_add_confirm_keyboard())
 
 
 @router.callback_query(F.data == "confirm_post_add")
-async def cb_confirm_post_add(callback: CallbackQuery) -> None:
-    uid = callback.from_user.id if callback.from_user else 0
-    data = _post_add_pending.pop(uid, None)
-    if not data:
+async def cb_confirm_post_add(callback: CallbackQuery, state: FSMContext) -> None:
+    if await state.get_state() != PostAddFlow.confirm.state:
         await callback.answer(POST_ADD_CANCELLED)
         return
-    _post_add_confirm_pending[uid] = data
+    await state.set_state(PostAddFlow.pick_time)
     await callback.answer()
     await callback.message.edit_text(
         (callback.message.text or "") + "\n\n" + POST_ADD_PICK_TIME_HOUR,
@@ -222,17 +246,15 @@ async def cb_confirm_post_add(callback: CallbackQuery) -> None:
 
 
 @router.callback_query(F.data.regexp(re.compile(r"^post_time_h_(\d+)$")))
-async def cb_post_add_hour(callback: CallbackQuery) -> None:
-    uid = callback.from_user.id if callback.from_user else 0
-    pending = _post_add_confirm_pending.get(uid)
-    if not pending:
+async def cb_post_add_hour(callback: CallbackQuery, state: FSMContext) -> None:
+    if await state.get_state() != PostAddFlow.pick_time.state:
         await callback.answer(POST_ADD_CANCELLED)
         return
     match = re.match(r"^post_time_h_(\d+)$", callback.data or "")
     if not match:
         await callback.answer()
         return
-    pending["hour"] = int(match.group(1))
+    await state.update_data(hour=int(match.group(1)))
     await callback.answer()
     await callback.message.edit_text(
         (callback.message.text or "") + "\n\n" + POST_ADD_PICK_TIME_MINUTE,
@@ -241,14 +263,15 @@ async def cb_post_add_hour(callback: CallbackQuery) -> None:
 
 
 @router.callback_query(F.data.regexp(re.compile(r"^post_time_m_(\d{2})$")))
-async def cb_post_add_minute(callback: CallbackQuery) -> None:
+async def cb_post_add_minute(callback: CallbackQuery, state: FSMContext) -> None:
     from bot.scheduler import runner as scheduler_runner
 
     uid = callback.from_user.id if callback.from_user else 0
-    pending = _post_add_confirm_pending.pop(uid, None)
-    if not pending:
+    if await state.get_state() != PostAddFlow.pick_time.state:
         await callback.answer(POST_ADD_CANCELLED)
         return
+    pending = await state.get_data()
+    await state.clear()
     match = re.match(r"^post_time_m_(\d{2})$", callback.data or "")
     if not match:
         await callback.answer()
@@ -274,6 +297,7 @@ async def cb_post_add_minute(callback: CallbackQuery) -> None:
         set_ok = await schedule_service.set_schedule_content(schedule_id, content.id)
         if not set_ok:
             logger.warning("Post qo'shishda rejaga content biriktirilmadi: schedule_id=%s, content_id=%s", schedule_id, content.id)
+        await scheduler_runner.refresh_schedule(schedule_id)
         me = await callback.bot.get_me()
         bot_username = me.username or ""
         job_ok = scheduler_runner.add_schedule_job(callback.bot, bot_username, schedule_id, time_str)
@@ -288,6 +312,7 @@ async def cb_post_add_minute(callback: CallbackQuery) -> None:
             set_ok = await schedule_service.set_schedule_content(schedule_id, content.id)
             if not set_ok:
                 logger.warning("Post qo'shishda mavjud vaqtga content biriktirilmadi: schedule_id=%s, content_id=%s", schedule_id, content.id)
+            await scheduler_runner.refresh_schedule(schedule_id)
     chat_id = callback.message.chat.id
     await _send_single_post(callback.bot, chat_id, content, uid)
     await callback.answer(POST_ADD_SAVED)
@@ -301,9 +326,8 @@ async def cb_post_add_minute(callback: CallbackQuery) -> None:
 
 
 @router.callback_query(F.data == "cancel_post_add")
-async def cb_cancel_post_add(callback: CallbackQuery) -> None:
-    uid = callback.from_user.id if callback.from_user else 0
-    _post_add_pending.pop(uid, None)
+async def cb_cancel_post_add(callback: CallbackQuery, state: FSMContext) -> None:
+    await _clear_if(state, PostAddFlow.confirm)
     await callback.answer(POST_ADD_CANCELLED)
     await callback.message.edit_text(
         (callback.message.text or "") + "\n\n" + POST_ADD_CANCELLED,
@@ -312,9 +336,8 @@ async def cb_cancel_post_add(callback: CallbackQuery) -> None:
 
 
 @router.callback_query(F.data == "post_time_cancel")
-async def cb_post_add_time_cancel(callback: CallbackQuery) -> None:
-    uid = callback.from_user.id if callback.from_user else 0
-    _post_add_confirm_pending.pop(uid, None)
+async def cb_post_add_time_cancel(callback: CallbackQuery, state: FSMContext) -> None:
+    await _clear_if(state, PostAddFlow.pick_time)
     await callback.answer(POST_ADD_CANCELLED)
     await callback.message.edit_text(
         (callback.message.text or "") + "\n\n" + POST_ADD_CANCELLED,
@@ -324,13 +347,11 @@ async def cb_post_add_time_cancel(callback: CallbackQuery) -> None:
 
 # ---------- Matnli post: Yakunlash / Bekor / vaqt tanlash ----------
 @router.callback_query(F.data == "confirm_text_post_add")
-async def cb_confirm_text_post_add(callback: CallbackQuery) -> None:
-    uid = callback.from_user.id if callback.from_user else 0
-    data = _text_post_pending.pop(uid, None)
-    if not data:
+async def cb_confirm_text_post_add(callback: CallbackQuery, state: FSMContext) -> None:
+    if await state.get_state() != TextPostFlow.confirm.state:
         await callback.answer(POST_ADD_CANCELLED)
         return
-    _text_post_confirm_pending[uid] = data
+    await state.set_state(TextPostFlow.pick_time)
     await callback.answer()
     try:
         await callback.message.edit_text(
@@ -345,9 +366,8 @@ async def cb_confirm_text_post_add(callback: CallbackQuery) -> None:
 
 
 @router.callback_query(F.data == "cancel_text_post_add")
-async def cb_cancel_text_post_add(callback: CallbackQuery) -> None:
-    uid = callback.from_user.id if callback.from_user else 0
-    _text_post_pending.pop(uid, None)
+async def cb_cancel_text_post_add(callback: CallbackQuery, state: FSMContext) -> None:
+    await _clear_if(state, TextPostFlow.confirm)
     await callback.answer(POST_ADD_CANCELLED)
     try:
         await callback.message.edit_text(
@@ -359,17 +379,15 @@ async def cb_cancel_text_post_add(callback: CallbackQuery) -> None:
 
 
 @router.callback_query(F.data.regexp(re.compile(r"^text_post_h_(\d+)$")))
-async def cb_text_post_hour(callback: CallbackQuery) -> None:
-    uid = callback.from_user.id if callback.from_user else 0
-    pending = _text_post_confirm_pending.get(uid)
-    if not pending:
+async def cb_text_post_hour(callback: CallbackQuery, state: FSMContext) -> None:
+    if await state.get_state() != TextPostFlow.pick_time.state:
         await callback.answer(POST_ADD_CANCELLED)
         return
     match = re.match(r"^text_post_h_(\d+)$", callback.data or "")
     if not match:
         await callback.answer()
         return
-    pending["hour"] = int(match.group(1))
+    await state.update_data(hour=int(match.group(1)))
     await callback.answer()
     try:
         await callback.message.edit_text(
@@ -384,14 +402,15 @@ async def cb_text_post_hour(callback: CallbackQuery) -> None:
 
 
 @router.callback_query(F.data.regexp(re.compile(r"^text_post_m_(\d{2})$")))
-async def cb_text_post_minute(callback: CallbackQuery) -> None:
+async def cb_text_post_minute(callback: CallbackQuery, state: FSMContext) -> None:
     from bot.scheduler import runner as scheduler_runner
 
     uid = callback.from_user.id if callback.from_user else 0
-    pending = _text_post_confirm_pending.pop(uid, None)
-    if not pending:
+    if await state.get_state() != TextPostFlow.pick_time.state:
         await callback.answer(POST_ADD_CANCELLED)
         return
+    pending = await state.get_data()
+    await state.clear()
     match = re.match(r"^text_post_m_(\d{2})$", callback.data or "")
     if not match:
         await callback.answer()
@@ -409,6 +428,7 @@ async def cb_text_post_minute(callback: CallbackQuery) -> None:
         set_ok = await schedule_service.set_schedule_content(schedule_id, content.id)
         if not set_ok:
             logger.warning("Matnli post qo'shishda rejaga content biriktirilmadi: schedule_id=%s, content_id=%s", schedule_id, content.id)
+        await scheduler_runner.refresh_schedule(schedule_id)
         me = await callback.bot.get_me()
         bot_username = me.username or ""
         job_ok = scheduler_runner.add_schedule_job(callback.bot, bot_username, schedule_id, time_str)
@@ -423,6 +443,7 @@ async def cb_text_post_minute(callback: CallbackQuery) -> None:
             set_ok = await schedule_service.set_schedule_content(schedule_id, content.id)
             if not set_ok:
                 logger.warning("Matnli post qo'shishda mavjud vaqtga content biriktirilmadi: schedule_id=%s, content_id=%s", schedule_id, content.id)
+            await scheduler_runner.refresh_schedule(schedule_id)
     chat_id = callback.message.chat.id
     await _send_single_post(callback.bot, chat_id, content, uid)
     await callback.answer(POST_ADD_SAVED)
@@ -436,9 +457,8 @@ async def cb_text_post_minute(callback: CallbackQuery) -> None:
 
 
 @router.callback_query(F.data == "text_post_time_cancel")
-async def cb_text_post_time_cancel(callback: CallbackQuery) -> None:
-    uid = callback.from_user.id if callback.from_user else 0
-    _text_post_confirm_pending.pop(uid, None)
+async def cb_text_post_time_cancel(callback: CallbackQuery, state: FSMContext) -> None:
+    await _clear_if(state, TextPostFlow.pick_time)
     await callback.answer(POST_ADD_CANCELLED)
     try:
         await callback.message.edit_text(
@@ -480,7 +500,7 @@ async def admin_add_text_empty(message: Message) -> None:
     F.text,
     F.text.startswith("/") == False,
     ~F.text.in_(_ADMIN_BUTTON_TEXTS),
-    _InGroupIdFlowFilter(),
+    StateFilter(TargetGroupFlow.waiting_id),
 )
 async def admin_text_ignored_for_content(message: Message) -> None:
     """Guruh ID / admin ID kiritish flow'ida yuborilgan matn (post emas) — user router ishlamasligi uchun yutib qolinadi."""
@@ -544,16 +564,8 @@ def _cap_or_text(p, max_cap=1024, max_text=4096) -> tuple:
     return cap, text
 
 
-async def _send_single_post(bot, chat_id: int, content, uid: int) -> None:
-    """Bitta postni chatga yuboradi: avval eski admin xabarlarini o'chiradi, keyin yangi yuboradi va DB ga saqlaydi."""
-    old_msgs = await content_service.get_admin_messages(content.id)
-    for old_chat_id, old_message_id in old_msgs:
-        try:
-            await bot.delete_message(old_chat_id, old_message_id)
-        except Exception:
-            pass
-    await content_service.delete_admin_messages(content.id)
-
+async def _send_post_preview(bot, chat_id: int, content) -> Optional[int]:
+    """Post ko'rinishini (o'chirish tugmasi bilan) chatga yuboradi. message_id yoki None qaytaradi."""
     cap, text = _cap_or_text(content)
     try:
         m = None
@@ -571,18 +583,164 @@ async def _send_single_post(bot, chat_id: int, content, uid: int) -> None:
             m = await bot.send_message(
                 chat_id, text, parse_mode=None, reply_markup=history_delete_keyboard(content.id)
             )
-        if m is not None:
-            await content_service.save_admin_message(content.id, uid, chat_id, m.message_id)
+        return m.message_id if m is not None else None
     except Exception as e:
         logger.exception("Single post %s send failed: %s", content.id, e)
+        return None
+
+
+async def _send_single_post(bot, chat_id: int, content, uid: int) -> None:
+    """Bitta postni chatga yuboradi: avval eski admin xabarlarini o'chiradi, keyin yangi yuboradi va DB ga saqlaydi."""
+    old_msgs = await content_service.get_admin_messages(content.id)
+    for old_chat_id, old_message_id in old_msgs:
+        try:
+            await bot.delete_message(old_chat_id, old_message_id)
+        except Exception:
+            pass
+    await content_service.delete_admin_messages(content.id)
+
+    message_id = await _send_post_preview(bot, chat_id, content)
+    if message_id is not None:
+        await content_service.save_admin_message(content.id, uid, chat_id, message_id)
+
+
+async def _delete_messages_bulk(bot, messages: List[Tuple[int, int]]) -> None:
+    """Eski xabarlarni chat bo'yicha delete_messages bilan o'chiradi (bir chaqiruvda 100 tagacha)."""
+    by_chat: Dict[int, List[int]] = {}
+    for chat_id, message_id in messages:
+        by_chat.setdefault(chat_id, []).append(message_id)
+    for chat_id, message_ids in by_chat.items():
+        for i in range(0, len(message_ids), _DELETE_MESSAGES_BATCH):
+            batch = message_ids[i:i + _DELETE_MESSAGES_BATCH]
+            try:
+                await bot.delete_messages(chat_id, batch)
+            except Exception as e:
+                # Juda eski (48 soatdan oshgan) xabarlar o'chmaydi — bu xato emas
+                logger.debug("delete_messages failed in chat %s (%d ids): %s", chat_id, len(batch), e)
 
 
 async def send_all_posts_to_admin(bot, chat_id: int, uid: int) -> None:
-    """Admin uchun barcha aktiv postlarni chatga yuboradi (eski xabarlar o'chiriladi)."""
-    posts = await content_service.list_content(include_deleted=False)
+    """
+    Admin uchun barcha aktiv postlarni chatga yuboradi (eski xabarlar o'chiriladi).
+    Eski xabarlar bitta so'rovda olinib bulk o'chiriladi; yangilari id tartibida ketma-ket (chat limiti
+    ostida) yuboriladi va yozuvlar bitta tranzaksiyada almashtiriladi.
+    Postlar ADMIN_PREVIEW_MAX_POSTS dan ko'p bo'lsa, ular o'rniga sahifali ro'yxat yuboriladi.
+    """
+    started = time.monotonic()
+    posts, old_msgs = await asyncio.gather(
+        content_service.list_content(limit=ADMIN_PREVIEW_MAX_POSTS + 1, include_deleted=False),
+        content_service.get_admin_messages_for_admin(uid),
+    )
+    await _delete_messages_bulk(bot, old_msgs)
+    if len(posts) > ADMIN_PREVIEW_MAX_POSTS:
+        await content_service.replace_admin_messages(uid, [])
+        text, markup = await _render_posts_page()
+        await bot.send_message(chat_id, f"{POSTS_BROWSER_HINT}\n\n{text}", parse_mode=None, reply_markup=markup)
+        return
     posts = sorted(posts, key=lambda p: p.id)
+
+    # One at a time, so previews arrive in id order; the bot session's chat limit paces the sends
+    rows: List[Tuple[int, int, int]] = []
     for p in posts:
-        await _send_single_post(bot, chat_id, p, uid)
+        message_id = await _send_post_preview(bot, chat_id, p)
+        if message_id is not None:
+            rows.append((p.id, chat_id, message_id))
+    await content_service.replace_admin_messages(uid, rows)
+    logger.info(
+        "Admin %s: %d/%d post previews sent, %d old message(s) deleted in %.2fs",
+        uid, len(rows), len(posts), len(old_msgs), time.monotonic() - started,
+    )
+
+
+# ---------- Post browser (keyset pages, edited in place) ----------
+_CURSOR_TIME_FORMAT = "%Y%m%d%H%M%S"
+_POSTS_PAGE_RE = re.compile(r"^posts_pg_([np])_(\d{14})_(\d+)$")
+
+
+def _cursor_token(content) -> str:
+    """(created_at, id) cursor packed into callback_data: 'YYYYmmddHHMMSS_id'."""
+    return f"{content.created_at.strftime(_CURSOR_TIME_FORMAT)}_{content.id}"
+
+
+def _post_line(p) -> str:
+    kind = {"photo": "🖼", "video": "🎬"}.get(p.content_type, "📝")
+    preview = " ".join((p.caption or p.text or "").split())
+    if len(preview) > 60:
+        preview = preview[:57] + "…"
+    flag = "" if p.publishing_enabled else " (nashr o'chiq)"
+    return f"#{p.id} {kind} {preview}{flag}".rstrip()
+
+
+async def _render_posts_page(after=None, before=None) -> Tuple[str, InlineKeyboardMarkup]:
+    """Bitta sahifa matni va klaviaturasi. Kursor eskirgan bo'lsa (postlar o'chirilgan) birinchi sahifa."""
+    posts, has_more = await content_service.list_content_page(
+        ADMIN_POSTS_PAGE_SIZE, after=after, before=before
+    )
+    if not posts and (after or before):
+        after = before = None
+        posts, has_more = await content_service.list_content_page(ADMIN_POSTS_PAGE_SIZE)
+    if not posts:
+        return POSTS_PAGE_EMPTY, posts_page_keyboard([], None, None)
+    if before is not None:
+        has_prev, has_next = has_more, True
+    else:
+        has_prev, has_next = after is not None, has_more
+    text = POSTS_PAGE_HEADER + "\n\n" + "\n".join(_post_line(p) for p in posts)
+    markup = posts_page_keyboard(
+        posts,
+        _cursor_token(posts[0]) if has_prev else None,
+        _cursor_token(posts[-1]) if has_next else None,
+    )
+    return text, markup
+
+
+async def _edit_posts_page(callback: CallbackQuery, after=None, before=None) -> None:
+    text, markup = await _render_posts_page(after=after, before=before)
+    try:
+        await callback.message.edit_text(text, parse_mode=None, reply_markup=markup)
+    except TelegramBadRequest as e:
+        if "message is not modified" not in str(e):
+            raise
+    await callback.answer()
+
+
+@router.message(F.chat.type == ChatType.PRIVATE, F.text == "/posts")
+async def cmd_posts(message: Message) -> None:
+    text, markup = await _render_posts_page()
+    await message.answer(text, parse_mode=None, reply_markup=markup)
+
+
+@router.callback_query(F.data == "inline_history")
+async def cb_inline_history(callback: CallbackQuery) -> None:
+    await _edit_posts_page(callback)
+
+
+@router.callback_query(F.data.regexp(_POSTS_PAGE_RE))
+async def cb_posts_page(callback: CallbackQuery) -> None:
+    match = callback.data and _POSTS_PAGE_RE.match(callback.data)
+    if not match:
+        await callback.answer()
+        return
+    cursor = (datetime.strptime(match.group(2), _CURSOR_TIME_FORMAT), int(match.group(3)))
+    if match.group(1) == "n":
+        await _edit_posts_page(callback, after=cursor)
+    else:
+        await _edit_posts_page(callback, before=cursor)
+
+
+@router.callback_query(F.data.regexp(re.compile(r"^post_view_(\d+)$")))
+async def cb_post_view(callback: CallbackQuery) -> None:
+    """Sahifadagi bitta postni to'liq ko'rinishda (o'chirish tugmasi bilan) yuborish."""
+    match = callback.data and re.match(r"^post_view_(\d+)$", callback.data)
+    if not match:
+        await callback.answer()
+        return
+    content = await content_service.get_content_by_id(int(match.group(1)))
+    if content is None or content.status != "active":
+        await callback.answer(POST_NOT_FOUND)
+        return
+    await _send_single_post(callback.bot, callback.message.chat.id, content, callback.from_user.id)
+    await callback.answer()
 
 
 @router.callback_query(F.data.regexp(re.compile(r"^pub_on_(\d+)$")))
@@ -615,12 +773,15 @@ async def cb_pub_off(callback: CallbackQuery) -> None:
 
 @router.message(F.chat.type == ChatType.PRIVATE, F.text.regexp(re.compile(r"^/delete_post\s+(\d+)$")))
 async def cmd_delete_post(message: Message) -> None:
+    from bot.scheduler import runner as scheduler_runner
+
     match = message.text and re.match(r"^/delete_post\s+(\d+)$", message.text)
     if not match:
         return
     cid = int(match.group(1))
     ok = await content_service.delete_content(cid)
     if ok:
+        scheduler_runner.forget_content(cid)
         await message.answer(POST_DELETED, reply_markup=_admin_kb(message))
     else:
         await message.answer(POST_NOT_FOUND, reply_markup=_admin_kb(message))
@@ -628,6 +789,8 @@ async def cmd_delete_post(message: Message) -> None:
 
 @router.callback_query(F.data.regexp(re.compile(r"^del_post_(\d+)$")))
 async def cb_delete_post(callback: CallbackQuery) -> None:
+    from bot.scheduler import runner as scheduler_runner
+
     match = callback.data and re.match(r"^del_post_(\d+)$", callback.data)
     if not match:
         await callback.answer()
@@ -636,11 +799,8 @@ async def cb_delete_post(callback: CallbackQuery) -> None:
     admin_messages = await content_service.get_admin_messages(cid)
     ok = await content_service.delete_content(cid)
     if ok:
-        for chat_id, message_id in admin_messages:
-            try:
-                await callback.bot.delete_message(chat_id, message_id)
-            except Exception:
-                pass
+        scheduler_runner.forget_content(cid)
+        await _delete_messages_bulk(callback.bot, admin_messages)
         await callback.answer(POST_DELETED)
     else:
         await callback.answer(POST_NOT_FOUND)
@@ -690,27 +850,25 @@ async def cmd_set_target_group_id_private(message: Message) -> None:
 
 @router.message(F.chat.type == ChatType.PRIVATE, F.text == "/set_target_group")
 @router.message(F.chat.type == ChatType.PRIVATE, F.text == BTN_TARGET_GROUP)
-async def cmd_set_target_group_private(message: Message) -> None:
-    uid = message.from_user.id if message.from_user else 0
-    _target_group_awaiting.add(uid)
+async def cmd_set_target_group_private(message: Message, state: FSMContext) -> None:
+    await _enter(state, TargetGroupFlow.waiting_id)
     await message.answer(TARGET_GROUP_PROMPT_ID, reply_markup=_admin_kb(message))
 
 
 @router.message(F.chat.type == ChatType.PRIVATE, F.text.regexp(re.compile(r"^-?\d+$")))
-async def admin_text_group_id(message: Message) -> None:
-    """Accept target or lead group ID when user is in corresponding awaiting set."""
-    uid = message.from_user.id if message.from_user else 0
-    gid = int(message.text.strip())
-    if uid in _target_group_awaiting:
-        _target_group_awaiting.discard(uid)
-        _target_group_pending[uid] = gid
+async def admin_text_group_id(message: Message, state: FSMContext) -> None:
+    """Accept target group ID when user is in the group ID flow."""
+    if await state.get_state() == TargetGroupFlow.waiting_id.state:
+        await _enter(state, TargetGroupFlow.confirm, group_id=int(message.text.strip()))
         await message.answer(TARGET_GROUP_ID_RECEIVED, reply_markup=confirm_target_group_keyboard())
 
 
 @router.callback_query(F.data == "confirm_target_group")
-async def cb_confirm_target_group(callback: CallbackQuery) -> None:
-    uid = callback.from_user.id if callback.from_user else 0
-    gid = _target_group_pending.pop(uid, None)
+async def cb_confirm_target_group(callback: CallbackQuery, state: FSMContext) -> None:
+    gid = None
+    if await state.get_state() == TargetGroupFlow.confirm.state:
+        gid = (await state.get_data()).get("group_id")
+        await state.clear()
     if gid is not None:
         await settings_service.set_target_group_id(gid)
         await callback.answer(TARGET_GROUP_SET)
@@ -718,46 +876,107 @@ async def cb_confirm_target_group(callback: CallbackQuery) -> None:
         await callback.answer()
 
 
-async def _build_schedule_content_map(schedules):
-    """Build schedule_id -> (content_id, caption_preview) or None."""
-    m = {}
-    for s in schedules:
-        sid = getattr(s, "id", None)
-        if sid is None:
+# ---------- Qo'shimcha nashr guruhlari (target_groups) ----------
+@router.message(F.chat.type.in_({ChatType.GROUP, ChatType.SUPERGROUP}), F.text == "/add_target_group")
+async def cmd_add_target_group_in_group(message: Message) -> None:
+    uid = message.from_user.id if message.from_user else 0
+    if not is_owner(uid) and not await admin_service.is_admin(uid):
+        await message.answer(ADMIN_ONLY)
+        return
+    gid = message.chat.id
+    ok = await group_service.add_target_group(gid, message.chat.title)
+    await message.answer(TARGET_GROUP_ADDED.format(gid) if ok else "Xatolik.")
+
+
+@router.message(F.chat.type == ChatType.PRIVATE, F.text.regexp(re.compile(r"^/add_target_group\s+(-?\d+)$")))
+async def cmd_add_target_group_private(message: Message) -> None:
+    """Add extra target group by ID from private chat: /add_target_group -1001234567890."""
+    match = message.text and re.match(r"^/add_target_group\s+(-?\d+)$", message.text)
+    if not match:
+        return
+    gid = int(match.group(1))
+    if gid >= 0:
+        await message.answer(GROUP_ID_SHOULD_BE_NEGATIVE, reply_markup=_admin_kb(message))
+        return
+    ok = await group_service.add_target_group(gid)
+    await message.answer(TARGET_GROUP_ADDED.format(gid) if ok else "Xatolik.", reply_markup=_admin_kb(message))
+
+
+@router.message(F.chat.type == ChatType.PRIVATE, F.text.regexp(re.compile(r"^/remove_target_group\s+(-?\d+)$")))
+async def cmd_remove_target_group(message: Message) -> None:
+    match = message.text and re.match(r"^/remove_target_group\s+(-?\d+)$", message.text)
+    if not match:
+        return
+    gid = int(match.group(1))
+    ok = await group_service.remove_target_group(gid)
+    await message.answer(
+        TARGET_GROUP_REMOVED.format(gid) if ok else TARGET_GROUP_NOT_FOUND,
+        reply_markup=_admin_kb(message),
+    )
+
+
+@router.message(F.chat.type == ChatType.PRIVATE, F.text == "/target_groups")
+async def cmd_list_target_groups(message: Message) -> None:
+    main_group_id = await settings_service.get_target_group_id()
+    groups = await group_service.list_target_groups()
+    if not main_group_id and not groups:
+        await message.answer(TARGET_GROUPS_EMPTY, reply_markup=_admin_kb(message))
+        return
+    lines = [TARGET_GROUPS_HEADER]
+    if main_group_id:
+        lines.append(f"• {main_group_id} (asosiy)")
+    for g in groups:
+        status = "" if g.enabled else " (o'chirilgan)"
+        lines.append(f"• {g.chat_id} {g.title or ''}{status}".rstrip())
+    await message.answer("\n".join(lines), reply_markup=_admin_kb(message))
+
+
+# Telegram message text limit
+_MESSAGE_MAX_CHARS = 4096
+# Room kept for the "… N more" line when the schedule does not fit
+_SCHEDULE_MORE_RESERVE = 64
+_SCHEDULE_TIMES_MAX_CHARS = 1000
+
+
+def _format_schedule_text(overview) -> str:
+    """
+    Format schedule message with every post attached to each time. Stays under Telegram's 4096 characters:
+    rows that do not fit are replaced by a "… N more" line.
+    """
+    times_str = ", ".join(slot.schedule.time_str for slot in overview) if overview else "—"
+    if len(times_str) > _SCHEDULE_TIMES_MAX_CHARS:
+        times_str = times_str[:_SCHEDULE_TIMES_MAX_CHARS].rsplit(",", 1)[0] + ", …"
+    rows = []
+    for slot in overview:
+        if not slot.posts:
+            rows.append(f"  {slot.schedule.time_str} — {POST_NOT_ASSIGNED}")
             continue
-        cid = await schedule_service.get_content_id_for_schedule(sid)
-        if cid:
-            content = await content_service.get_content_by_id(cid)
-            if content and content.status == "active":
-                cap = (getattr(content, "caption", None) or getattr(content, "text", None) or f"#{content.id}").strip() or f"#{content.id}"
-                m[sid] = (cid, cap[:100])
-        if sid not in m:
-            m[sid] = None
-    return m
-
-
-def _format_schedule_text(schedules, schedule_content_map):
-    """Format schedule message with per-time post info."""
-    times_str = ", ".join(s.time_str for s in schedules) if schedules else "—"
-    lines = [CURRENT_TIMES.format(times_str), ""]
-    for s in schedules:
-        info = schedule_content_map.get(getattr(s, "id", None))
-        if info:
-            cid, preview = info
-            line = f"  {s.time_str} — Post #{cid}: {preview[:50]}{'…' if len(preview) > 50 else ''}"
-        else:
-            line = f"  {s.time_str} — {POST_NOT_ASSIGNED}"
-        lines.append(line)
-    lines.extend(["", SCHEDULE_ADD_TIME_HINT])
-    return "\n".join(lines)
+        for i, post in enumerate(slot.posts):
+            label = slot.schedule.time_str if i == 0 else " " * len(slot.schedule.time_str)
+            preview = post.preview
+            rows.append(
+                f"  {label} — Post #{post.content_id}: {preview[:50]}{'…' if len(preview) > 50 else ''}"
+            )
+    head = [CURRENT_TIMES.format(times_str), ""]
+    tail = ["", SCHEDULE_ADD_TIME_HINT]
+    budget = _MESSAGE_MAX_CHARS - len("\n".join(head + tail)) - _SCHEDULE_MORE_RESERVE
+    shown = 0
+    for row in rows:
+        budget -= len(row) + 1
+        if budget < 0:
+            break
+        shown += 1
+    lines = head + rows[:shown]
+    if shown < len(rows):
+        lines.append(SCHEDULE_MORE.format(len(rows) - shown))
+    return "\n".join(lines + tail)
 
 
 async def _send_schedule_message(callback: CallbackQuery) -> None:
     """Joriy reja vaqtlari va postlarni ko'rsatish; tugmalar orqali boshqarish."""
-    schedules = await schedule_service.list_schedules()
-    schedule_content_map = await _build_schedule_content_map(schedules)
-    text = _format_schedule_text(schedules, schedule_content_map)
-    await callback.message.edit_text(text, reply_markup=schedule_keyboard(schedules))
+    overview = await schedule_service.get_schedule_overview()
+    text = _format_schedule_text(overview)
+    await callback.message.edit_text(text, reply_markup=schedule_keyboard([slot.schedule for slot in overview]))
 
 
 @router.callback_query(F.data.regexp(re.compile(r"^del_time_(.+)$")))
@@ -808,6 +1027,8 @@ async def cb_assign_post(callback: CallbackQuery) -> None:
 @router.callback_query(F.data.regexp(re.compile(r"^assign_schedule_(\d+)_content_(\d+)$")))
 async def cb_assign_schedule_content(callback: CallbackQuery) -> None:
     """Assign post to schedule time."""
+    from bot.scheduler import runner as scheduler_runner
+
     match = callback.data and re.match(r"^assign_schedule_(\d+)_content_(\d+)$", callback.data)
     if not match:
         await callback.answer()
@@ -815,6 +1036,7 @@ async def cb_assign_schedule_content(callback: CallbackQuery) -> None:
     schedule_id, content_id = int(match.group(1)), int(match.group(2))
     ok = await schedule_service.set_schedule_content(schedule_id, content_id)
     if ok:
+        await scheduler_runner.refresh_schedule(schedule_id)
         await callback.answer(SCHEDULE_ASSIGNED)
         await _send_schedule_message(callback)
     else:
@@ -828,20 +1050,18 @@ async def cb_add_time(callback: CallbackQuery) -> None:
 
 
 @router.callback_query(F.data.regexp(re.compile(r"^sch_h_(\d+)$")))
-async def cb_schedule_hour(callback: CallbackQuery) -> None:
+async def cb_schedule_hour(callback: CallbackQuery, state: FSMContext) -> None:
     match = callback.data and re.match(r"^sch_h_(\d+)$", callback.data)
     if not match:
         await callback.answer()
         return
-    hour = int(match.group(1))
-    uid = callback.from_user.id if callback.from_user else 0
-    _schedule_pending[uid] = {"hour": hour}
+    await _enter(state, ScheduleFlow.pick_minute, hour=int(match.group(1)))
     await callback.message.edit_text(SCHEDULE_PICK_MINUTE, reply_markup=schedule_minute_keyboard())
     await callback.answer()
 
 
 @router.callback_query(F.data.regexp(re.compile(r"^sch_m_(\d{2})$")))
-async def cb_schedule_minute(callback: CallbackQuery) -> None:
+async def cb_schedule_minute(callback: CallbackQuery, state: FSMContext) -> None:
     from bot.scheduler import runner as scheduler_runner
 
     match = callback.data and re.match(r"^sch_m_(\d{2})$", callback.data)
@@ -849,8 +1069,10 @@ async def cb_schedule_minute(callback: CallbackQuery) -> None:
         await callback.answer()
         return
     minute_str = match.group(1)
-    uid = callback.from_user.id if callback.from_user else 0
-    pending = _schedule_pending.pop(uid, None)
+    pending = None
+    if await state.get_state() == ScheduleFlow.pick_minute.state:
+        pending = await state.get_data()
+        await state.clear()
     if not pending or "hour" not in pending:
         await callback.answer(SCHEDULE_INVALID)
         return
@@ -872,11 +1094,6 @@ async def cb_schedule_minute(callback: CallbackQuery) -> None:
         await callback.answer(SCHEDULE_INVALID)
 
 
-@router.callback_query(F.data == "inline_history")
-async def cb_inline_history(callback: CallbackQuery) -> None:
-    await cb_nav_home(callback)
-
-
 @router.callback_query(F.data == "inline_schedule")
 async def cb_inline_schedule(callback: CallbackQuery) -> None:
     await cb_nav_home(callback)
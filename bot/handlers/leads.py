@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+Lead routing: new leads go to the leads group (settings.admin_group_id) or, if none is set, to every
+admin and owner privately (sent concurrently). The first admin to press «Leadni olish» takes the lead
+(one conditional UPDATE in lead_service.take_lead); the rest are told it is already taken.
+"""
+import asyncio
+import html
+import logging
+import re
+import time
+from typing import List, Optional
+
+from aiogram import Bot, Router, F
+from aiogram.enums import ChatType
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import CallbackQuery, Message, User as TgUser
+
+from config import OWNER_IDS, is_owner
+from bot.database.models import Lead, User
+from bot.keyboards.inline import lead_done_keyboard, lead_take_keyboard
+from bot.services import admin_service, lead_service, settings_service
+from bot.texts import (
+    ADMIN_GROUP_SET,
+    ADMIN_ONLY,
+    LEAD_ALREADY_TAKEN,
+    LEAD_ANSWERED_MARK,
+    LEAD_CLOSED,
+    LEAD_NEW,
+    LEAD_NOT_YOURS,
+    LEAD_TAKEN_BY,
+    LEAD_TAKEN_OK,
+    LEADS_PENDING_EMPTY,
+    LEADS_PENDING_HEADER,
+)
+
+logger = logging.getLogger(__name__)
+router = Router(name="leads")
+
+_TAKE_RE = re.compile(r"^take_lead_(\d+)$")
+_DONE_RE = re.compile(r"^lead_done_(\d+)$")
+
+
+async def _is_staff(user_id: int) -> bool:
+    return is_owner(user_id) or await admin_service.is_admin(user_id)
+
+
+def _user_mention(telegram_id: int, name: Optional[str], username: Optional[str]) -> str:
+    label = html.escape(name or (f"@{username}" if username else str(telegram_id)))
+    suffix = f" (@{html.escape(username)})" if username and name else ""
+    return f'<a href="tg://user?id={telegram_id}">{label}</a>{suffix}'
+
+
+def _lead_text(lead: Lead, user_mention: str) -> str:
+    return LEAD_NEW.format(
+        lead_id=lead.id,
+        user=user_mention,
+        source=f"#{lead.source_content_id}" if lead.source_content_id else "—",
+        text=html.escape(lead.message_text),
+    )
+
+
+async def notify_new_lead(bot: Bot, lead: Lead, user: User) -> int:
+    """Send the lead to the leads group, or to every admin/owner at once. Returns how many chats got it."""
+    text = _lead_text(lead, _user_mention(user.telegram_id, user.first_name, user.username))
+    group_id = await settings_service.get_admin_group_id()
+    if group_id:
+        recipients: List[int] = [group_id]
+    else:
+        recipients = sorted(set(OWNER_IDS) | set(await admin_service.get_admin_ids()))
+    started = time.monotonic()
+    results = await asyncio.gather(
+        *(bot.send_message(chat_id, text, reply_markup=lead_take_keyboard(lead.id)) for chat_id in recipients),
+        return_exceptions=True,
+    )
+    delivered = 0
+    for chat_id, result in zip(recipients, results):
+        if isinstance(result, Exception):
+            logger.warning("Lead %s notification to %s failed: %s", lead.id, chat_id, result)
+        else:
+            delivered += 1
+    logger.info(
+        "Lead %s sent to %d/%d chat(s) in %.2fs", lead.id, delivered, len(recipients), time.monotonic() - started
+    )
+    return delivered
+
+
+def _admin_label(user: TgUser) -> str:
+    return _user_mention(user.id, user.full_name, user.username)
+
+
+@router.callback_query(F.data.regexp(_TAKE_RE))
+async def cb_take_lead(callback: CallbackQuery) -> None:
+    match = _TAKE_RE.match(callback.data or "")
+    if not match or not callback.from_user:
+        await callback.answer()
+        return
+    admin = callback.from_user
+    if not await _is_staff(admin.id):
+        await callback.answer(ADMIN_ONLY, show_alert=True)
+        return
+    lead_id = int(match.group(1))
+    if not await lead_service.take_lead(lead_id, admin.id):
+        await callback.answer(LEAD_ALREADY_TAKEN, show_alert=True)
+        return
+    await callback.answer(LEAD_TAKEN_OK)
+    # Older than 48h the message is InaccessibleMessage and cannot be edited or copied
+    message = callback.message if isinstance(callback.message, Message) else None
+    in_private = message and message.chat.type == ChatType.PRIVATE and message.chat.id == admin.id
+    if message and message.html_text:
+        try:
+            await message.edit_text(
+                f"{message.html_text}\n\n{LEAD_TAKEN_BY.format(admin=_admin_label(admin))}",
+                reply_markup=lead_done_keyboard(lead_id) if in_private else None,
+            )
+        except TelegramBadRequest as e:
+            logger.debug("Could not edit lead %s notification: %s", lead_id, e)
+    if not in_private and message and message.html_text:
+        # Taken from the leads group: the admin gets a private copy to close it from
+        try:
+            await callback.bot.send_message(admin.id, message.html_text, reply_markup=lead_done_keyboard(lead_id))
+        except Exception as e:
+            logger.warning("Could not send lead %s to admin %s privately: %s", lead_id, admin.id, e)
+
+
+@router.callback_query(F.data.regexp(_DONE_RE))
+async def cb_lead_done(callback: CallbackQuery) -> None:
+    match = _DONE_RE.match(callback.data or "")
+    if not match or not callback.from_user:
+        await callback.answer()
+        return
+    lead_id = int(match.group(1))
+    if not await lead_service.mark_answered(lead_id, callback.from_user.id):
+        await callback.answer(LEAD_NOT_YOURS, show_alert=True)
+        return
+    await callback.answer(LEAD_CLOSED)
+    if isinstance(callback.message, Message) and callback.message.html_text:
+        try:
+            await callback.message.edit_text(f"{callback.message.html_text}\n{LEAD_ANSWERED_MARK}", reply_markup=None)
+        except TelegramBadRequest as e:
+            logger.debug("Could not edit lead %s message: %s", lead_id, e)
+
+
+@router.message(F.chat.type.in_({ChatType.GROUP, ChatType.SUPERGROUP}), F.text == "/set_admin_group")
+async def cmd_set_admin_group(message: Message) -> None:
+    uid = message.from_user.id if message.from_user else 0
+    if not await _is_staff(uid):
+        await message.answer(ADMIN_ONLY)
+        return
+    await settings_service.set_admin_group_id(message.chat.id)
+    await message.answer(ADMIN_GROUP_SET)
+
+
+@router.message(F.chat.type == ChatType.PRIVATE, F.text == "/leads")
+async def cmd_pending_leads(message: Message) -> None:
+    """Kutilayotgan leadlar: eng eskisidan, har biri «Leadni olish» tugmasi bilan."""
+    uid = message.from_user.id if message.from_user else 0
+    if not await _is_staff(uid):
+        await message.answer(ADMIN_ONLY)
+        return
+    leads = await lead_service.list_pending_leads(limit=10)
+    if not leads:
+        await message.answer(LEADS_PENDING_EMPTY)
+        return
+    total = await lead_service.count_pending_leads()
+    await message.answer(LEADS_PENDING_HEADER.format(total))
+    for lead in leads:
+        await message.answer(
+            _lead_text(lead, _user_mention(lead.telegram_user_id, None, None)),
+            reply_markup=lead_take_keyboard(lead.id),
+        )
@@ -1,12 +1,13 @@
 # -*- coding: utf-8 -*-
 """
-Owner-only handlers: /add_admin, /remove_admin, /list_admins.
+Owner-only handlers: /add_admin, /remove_admin, /list_admins, /profile, /profile_dump.
 """
 import logging
+import re
 
 from aiogram import Router, F
 from aiogram.enums import ChatType
-from aiogram.types import Message
+from aiogram.types import FSInputFile, Message
 
 from bot.texts import (
     REPLY_TO_ADD_ADMIN,
@@ -16,9 +17,12 @@ from bot.texts import (
     ADMIN_ALREADY,
     ADMIN_NOT_FOUND,
     LIST_ADMINS_HEADER,
+    PROFILE_EMPTY,
+    PROFILE_USAGE,
 )
 from bot.services import admin_service
 from bot.keyboards.reply import admin_main_keyboard
+from bot.profiling import MODES, profiler
 from config import is_owner
 
 logger = logging.getLogger(__name__)
@@ -71,3 +75,49 @@ async def cmd_list_admins(message: Message) -> None:
         added_str = added.strftime("%Y-%m-%d %H:%M") if added else ""
         lines.append(f"• {a.telegram_id} {uname} | {name} | qo'shilgan: {added_str}")
     await message.answer("\n".join(lines), reply_markup=_owner_kb(message))
+
+
+def _profile_status() -> str:
+    stats = profiler.stats()
+    state = f"yoqilgan: {stats['percent']:g}%, {profiler.mode}" if profiler.enabled else "o'chirilgan"
+    lines = [f"Profiling {state}. Namuna: {stats['sampled']}, saqlangan: {stats['kept']}."]
+    for trace in profiler.slowest()[:5]:
+        lines.append(f"• {trace.seconds * 1000:.0f} ms {trace.name} {trace.detail}")
+    return "\n".join(lines)
+
+
+@router.message(F.chat.type == ChatType.PRIVATE, F.text.regexp(re.compile(r"^/profile(\s+.*)?$")))
+async def cmd_profile(message: Message) -> None:
+    """/profile [on [foiz] [wall|cprofile] | off]"""
+    args = (message.text or "").split()[1:]
+    if not args:
+        await message.answer(_profile_status() + "\n\n" + PROFILE_USAGE)
+        return
+    if args[0] == "off":
+        profiler.configure(percent=0)
+    elif args[0] == "on":
+        percent, mode = 5.0, None
+        for arg in args[1:]:
+            if arg in MODES:
+                mode = arg
+                continue
+            try:
+                percent = float(arg.rstrip("%"))
+            except ValueError:
+                await message.answer(PROFILE_USAGE)
+                return
+        profiler.configure(percent=percent, mode=mode)
+    else:
+        await message.answer(PROFILE_USAGE)
+        return
+    logger.info("Owner %s set profiling: %s", message.from_user.id if message.from_user else "?", " ".join(args))
+    await message.answer(_profile_status())
+
+
+@router.message(F.chat.type == ChatType.PRIVATE, F.text == "/profile_dump")
+async def cmd_profile_dump(message: Message) -> None:
+    path = profiler.dump()
+    if path is None:
+        await message.answer(PROFILE_EMPTY)
+        return
+    await message.answer_document(FSInputFile(path), caption=f"{len(profiler.slowest())} ta iz: {path}")
@@ -1,29 +1,35 @@
 # -*- coding: utf-8 -*-
 """
 User-facing handlers: oddiy foydalanuvchilar uchun /start va xabarlar.
-Oddiy user: botga xabar yozishi mumkin, lekin bot har doim bitta tushuntiruvchi javob qaytaradi.
+Oddiy user: yozgan xabari lead sifatida saqlanadi (soatlik limit bilan); /start havolasidagi post manba bo'ladi.
 Admin/owner: matn yuborganda matnli post qo'shish — bitta handler ichida tekshiriladi.
 """
+import asyncio
 import logging
+from typing import Optional
 
 from aiogram import Router, F
 from aiogram.enums import ChatType
 from aiogram.types import Message
 from aiogram.filters import CommandStart, CommandObject
+from aiogram.fsm.context import FSMContext
 
 from config import is_owner
 from bot.texts import (
     WELCOME,
-    USER_SIMPLE_REPLY,
+    LEAD_START_PROMPT,
+    LEAD_RECEIVED,
+    LEAD_RATE_LIMITED,
     BTN_HELP,
     BTN_ADD_POST,
     BTN_ADD_TEXT_POST,
     BTN_TARGET_GROUP,
 )
-from bot.services import admin_service
+from bot.services import admin_service, lead_service, user_service
 from bot.keyboards.reply import admin_main_keyboard
 
 from bot.handlers import admin as admin_handlers
+from bot.handlers import leads as leads_handlers
 
 logger = logging.getLogger(__name__)
 router = Router(name="user")
@@ -40,15 +46,27 @@ async def _handle_admin_start(message: Message) -> None:
     await admin_handlers.send_all_posts_to_admin(message.bot, message.chat.id, uid)
 
 
+async def _remember_user(message: Message, source_content_id: Optional[int] = None):
+    u = message.from_user
+    return await user_service.upsert_user(
+        u.id, u.username, u.first_name, u.last_name, source_content_id=source_content_id
+    )
+
+
 @router.message(CommandStart(deep_link=True))
 async def cmd_start_deep(message: Message, command: CommandObject = None) -> None:
+    """/start <payload>: post havolasidan kelgan user — manba (source_content_id) saqlanadi, lead uchun."""
     uid = message.from_user.id if message.from_user else 0
     user_is_owner = is_owner(uid)
     is_admin_user = await admin_service.is_admin(uid)
     if user_is_owner or is_admin_user:
         await _handle_admin_start(message)
-    else:
-        await message.answer(USER_SIMPLE_REPLY)
+        return
+    source_content_id = user_service.parse_start_payload(command.args if command else None)
+    # /start spam counts against the lead budget too, so it cannot flood the users table either
+    if message.from_user and lead_service.allow_lead(uid):
+        await _remember_user(message, source_content_id)
+    await message.answer(LEAD_START_PROMPT)
 
 
 @router.message(CommandStart())
@@ -59,7 +77,8 @@ async def cmd_start(message: Message) -> None:
     if user_is_owner or is_admin_user:
         await _handle_admin_start(message)
     else:
-        await message.answer(USER_SIMPLE_REPLY)
+        # Private messages are the lead intake: invite the question, as a deep-link /start does
+        await message.answer(LEAD_START_PROMPT)
 
 
 @router.message(
@@ -74,12 +93,33 @@ async def cmd_start(message: Message) -> None:
     ~F.text.startswith("/"),
     ~F.text.in_(STANDARD_BUTTON_TEXTS),
 )
-async def private_text_message(message: Message) -> None:
-    """Barcha private matn (standart tugma matnlari emas): admin/owner → post flow, oddiy user → USER_SIMPLE_REPLY."""
+async def private_text_message(message: Message, state: FSMContext) -> None:
+    """Barcha private matn (standart tugma matnlari emas): admin/owner → post flow, oddiy user → lead."""
     if not message.from_user:
         return
     uid = message.from_user.id
     if is_owner(uid) or await admin_service.is_admin(uid):
-        await admin_handlers.handle_admin_text_post(message)
-    else:
-        await message.answer(USER_SIMPLE_REPLY)
+        await admin_handlers.handle_admin_text_post(message, state)
+    elif message.edit_date is None:
+        await _handle_lead_message(message)
+
+
+async def _handle_lead_message(message: Message) -> None:
+    """Oddiy user xabari → leads jadvaliga. Limitdan oshgan xabarlar DB ga yetib bormaydi."""
+    uid = message.from_user.id
+    if not lead_service.allow_lead(uid):
+        logger.info("Lead rate limit hit for user %s, message dropped", uid)
+        if lead_service.should_send_limit_notice(uid):
+            await message.answer(LEAD_RATE_LIMITED)
+        return
+    user = await _remember_user(message)
+    lead_id = await lead_service.create_lead(
+        user.id, uid, message.text, source_content_id=user.source_content_id
+    )
+    logger.info("Lead %s from user %s (source content %s)", lead_id, uid, user.source_content_id)
+    lead = await lead_service.get_lead(lead_id)
+    # gather() hashes its arguments and the (awaitable) SendMessage is a pydantic model, so it goes in as a Task
+    await asyncio.gather(
+        asyncio.ensure_future(message.answer(LEAD_RECEIVED)),
+        leads_handlers.notify_new_lead(message.bot, lead, user),
+    )
@@ -2,6 +2,8 @@
 """
 Inline keyboards for user and admin flows.
 """
+from typing import Optional
+
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
 from bot.texts import (
@@ -12,9 +14,35 @@ from bot.texts import (
     BTN_PUBLISHING_ON,
     BTN_PUBLISHING_OFF,
     BTN_NAV_HOME,
+    BTN_PAGE_PREV,
+    BTN_PAGE_NEXT,
+    BTN_CONTACT_ADMIN,
+    BTN_TAKE_LEAD,
+    BTN_LEAD_DONE,
 )
 
 
+def contact_admin_keyboard(bot_username: str, content_id: int) -> InlineKeyboardMarkup:
+    """Under a group post: deep link to the bot; the payload tells which post the lead came from."""
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text=BTN_CONTACT_ADMIN, url=f"https://t.me/{bot_username}?start=c{content_id}")],
+    ])
+
+
+def lead_take_keyboard(lead_id: int) -> InlineKeyboardMarkup:
+    """New lead notification: first admin to press takes it."""
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text=BTN_TAKE_LEAD, callback_data=f"take_lead_{lead_id}")],
+    ])
+
+
+def lead_done_keyboard(lead_id: int) -> InlineKeyboardMarkup:
+    """Taken lead (in the admin's private chat): mark it answered."""
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text=BTN_LEAD_DONE, callback_data=f"lead_done_{lead_id}")],
+    ])
+
+
 def history_delete_keyboard(content_id: int) -> InlineKeyboardMarkup:
     """Under history item: delete post button."""
     return InlineKeyboardMarkup(inline_keyboard=[
@@ -22,6 +50,26 @@ def history_delete_keyboard(content_id: int) -> InlineKeyboardMarkup:
     ])
 
 
+def posts_page_keyboard(posts: list, prev_cursor: Optional[str], next_cursor: Optional[str]) -> InlineKeyboardMarkup:
+    """Post browser page: per post Ko'rish/O'chirish, then Oldingi/Keyingi (cursor tokens) and Bosh menyu."""
+    rows = [
+        [
+            InlineKeyboardButton(text=f"👁 #{p.id}", callback_data=f"post_view_{p.id}"),
+            InlineKeyboardButton(text=f"O'chirish #{p.id}", callback_data=f"del_post_{p.id}"),
+        ]
+        for p in posts
+    ]
+    nav = []
+    if prev_cursor:
+        nav.append(InlineKeyboardButton(text=BTN_PAGE_PREV, callback_data=f"posts_pg_p_{prev_cursor}"))
+    if next_cursor:
+        nav.append(InlineKeyboardButton(text=BTN_PAGE_NEXT, callback_data=f"posts_pg_n_{next_cursor}"))
+    if nav:
+        rows.append(nav)
+    rows.append([InlineKeyboardButton(text=BTN_NAV_HOME, callback_data="nav_home")])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+
 def history_refresh_keyboard() -> InlineKeyboardMarkup:
     """Under history: Yangilash va Bosh menyu."""
     return InlineKeyboardMarkup(inline_keyboard=[
@@ -0,0 +1,222 @@
+"""
+Logging pipeline: records are queued on the event loop thread (QueueHandler) and formatted and written
+by a QueueListener thread, so file writes and rotation never block the loop. The file gets JSON lines
+(python-json-logger); update_id, schedule_id and content_id of the current update or job are added from
+contextvars. Repeated identical warnings/errors are rate-sampled before they reach the queue.
+"""
+import atexit
+import copy
+import logging
+import queue
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+try:
+    from pythonjsonlogger.json import JsonFormatter
+except ImportError:  # python-json-logger < 3
+    try:
+        from pythonjsonlogger.jsonlogger import JsonFormatter
+    except ImportError:
+        JsonFormatter = None
+
+CONTEXT_FIELDS = ("update_id", "schedule_id", "content_id")
+JSON_FORMAT = "%(asctime)s %(levelname)s %(name)s %(message)s"
+# Sampler keys kept before expired ones are pruned
+_MAX_SAMPLE_KEYS = 1000
+
+_context: Dict[str, ContextVar[Optional[int]]] = {
+    name: ContextVar(f"log_{name}", default=None) for name in CONTEXT_FIELDS
+}
+
+
+def set_log_context(**ids: Optional[int]) -> None:
+    """Tag the rest of the current task's log records, e.g. set_log_context(update_id=...)."""
+    for name, value in ids.items():
+        _context[name].set(value)
+
+
+@contextmanager
+def log_context(**ids: Optional[int]) -> Iterator[None]:
+    """Tag log records inside the block (schedule_id=..., content_id=...)."""
+    tokens = [(_context[name], _context[name].set(value)) for name, value in ids.items()]
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Copy the current ids onto the record. Runs in the caller's thread, before the queue,
+    where the contextvars are."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for name, var in _context.items():
+            value = var.get()
+            if value is not None:
+                setattr(record, name, value)
+        return True
+
+
+class RepeatSampler(logging.Filter):
+    """
+    Let through the first `burst` WARNING+ records per `window` seconds that share logger, message
+    template and exception type; drop and count the rest. The next record after the window carries
+    suppressed=<count>. Ids in the arguments do not split the key, so one failing slot is one key.
+    """
+
+    def __init__(self, burst: int, window: float) -> None:
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self.dropped = 0
+        # key -> [window start, records in window, dropped in window]
+        self._seen: Dict[Tuple[Any, ...], List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.burst <= 0 or record.levelno < logging.WARNING:
+            return True
+        exc_type = record.exc_info[0].__name__ if record.exc_info and record.exc_info[0] else ""
+        key = (record.name, record.levelno, str(record.msg), exc_type)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._seen.get(key)
+            if entry is None or now - entry[0] >= self.window:
+                if entry is not None and entry[2]:
+                    record.suppressed = entry[2]
+                if entry is None and len(self._seen) >= _MAX_SAMPLE_KEYS:
+                    self._prune(now)
+                self._seen[key] = [now, 1, 0]
+                return True
+            entry[1] += 1
+            if entry[1] <= self.burst:
+                return True
+            entry[2] += 1
+            self.dropped += 1
+            return False
+
+    def _prune(self, now: float) -> None:
+        for key in [k for k, e in self._seen.items() if now - e[0] >= self.window]:
+            del self._seen[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {"dropped": self.dropped, "keys": len(self._seen)}
+
+
+class _QueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args and render the traceback here: both may change once the caller moves on.
+        # Unlike the stock prepare() this leaves the message unformatted for the listener's formatters.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class TextFormatter(logging.Formatter):
+    """LOG_FORMAT plus the context ids and the sampler's suppressed count, when present."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        extra = " ".join(f"{name}={getattr(record, name)}" for name in CONTEXT_FIELDS if hasattr(record, name))
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            extra = f"{extra} (+{suppressed} similar suppressed)".strip()
+        if not extra:
+            return text
+        first, sep, rest = text.partition("\n")
+        return f"{first} [{extra}]{sep}{rest}"
+
+
+def _json_formatter() -> Optional[logging.Formatter]:
+    if JsonFormatter is None:
+        return None
+    return JsonFormatter(JSON_FORMAT, rename_fields={"levelname": "level", "asctime": "time"})
+
+
+sampler: Optional[RepeatSampler] = None
+
+
+def _stop_listener(listener: QueueListener) -> None:
+    # Flushes what is still queued; Python < 3.12 raises if it was already stopped
+    try:
+        listener.stop()
+    except AttributeError:
+        pass
+
+
+def setup_logging(
+    level: str,
+    text_format: str,
+    log_file: str = "",
+    max_bytes: int = 1_000_000,
+    backups: int = 3,
+    console: str = "text",
+    sample_burst: int = 5,
+    sample_window: float = 60.0,
+) -> QueueListener:
+    """
+    Route every record through a queue to a listener thread: console (text or JSON) and, if log_file is
+    set, a rotating JSON-lines file. Stopped (and flushed) at interpreter exit.
+    """
+    global sampler
+    json_formatter = _json_formatter()
+    text_formatter = TextFormatter(text_format)
+
+    console_handler = logging.StreamHandler(sys.stderr)
+    console_handler.setFormatter(json_formatter if console == "json" and json_formatter else text_formatter)
+    handlers: List[logging.Handler] = [console_handler]
+    if log_file:
+        try:
+            file_handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+            file_handler.setFormatter(json_formatter or text_formatter)
+            handlers.append(file_handler)
+        except OSError as e:
+            print(f"Log file {log_file} unavailable, console only: {e}", file=sys.stderr)
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+    sampler = RepeatSampler(sample_burst, sample_window)
+    queue_handler.addFilter(sampler)
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(_stop_listener, listener)
+    if json_formatter is None:
+        logging.getLogger(__name__).warning("python-json-logger is not installed; log file is plain text")
+    return listener
+
+
+class LogContextMiddleware(BaseMiddleware):
+    """Outer middleware on dp.update: log records of this update carry its update_id."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if isinstance(event, Update):
+            # Not reset afterwards: each update runs in its own task, and the dispatcher's error
+            # handler (outside this middleware) logs failures with the same id
+            set_log_context(update_id=event.update_id)
+        return await handler(event, data)
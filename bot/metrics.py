@@ -0,0 +1,360 @@
+"""
+In-process metrics in the Prometheus text format, served on a local HTTP endpoint (METRICS_PORT).
+Histograms: handler latency per router, service (DB) call latency per function, Telegram API latency
+per method (plus errors), scheduler lag, slot send time, time per update and inside access middlewares. Existing counters (rate limiter, outbox, caches) are exported
+as gauges read at scrape time. No prometheus_client dependency — the format is a few lines of text.
+"""
+import asyncio
+import functools
+import logging
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+from aiohttp import web
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramAPIError
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject, Update
+
+from config import METRICS_HOST, METRICS_PORT
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LAG_BUCKETS = (0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, 300.0, 1800.0, 3600.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _fmt_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Fixed-bucket histogram; one series per label combination."""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[LabelValues, List[Any]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def totals(self) -> Tuple[float, int]:
+        """(sum, count) over all label combinations."""
+        return sum(s[1] for s in self._series.values()), sum(s[2] for s in self._series.values())
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, (counts, total, n) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                cumulative += c
+                le = 'le="%s"' % _fmt_value(bound)
+                yield f"{self.name}_bucket{_fmt_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_fmt_labels(self.labelnames, labels)} {total!r}"
+            yield f"{self.name}_count{_fmt_labels(self.labelnames, labels)} {n}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def total(self) -> float:
+        return sum(self._values.values())
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_fmt_labels(self.labelnames, labels)} {_fmt_value(value)}"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: List[Any] = []
+        # prefix -> callable returning {name: number}; read at scrape time
+        self._gauges: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def gauges(self, prefix: str, read: Callable[[], Dict[str, Any]]) -> None:
+        """Export a stats() dict as gauges named <prefix>_<key>; non-numeric values are skipped."""
+        self._gauges[prefix] = read
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for prefix, read in self._gauges.items():
+            try:
+                values = read()
+            except Exception as e:
+                logger.debug("Metrics gauge %s failed: %s", prefix, e)
+                continue
+            for key, value in values.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f"{prefix}_{key}"
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {_fmt_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+handler_seconds = registry.register(Histogram(
+    "bot_handler_seconds", "Update handler latency by router and handler", ("router", "handler"),
+))
+db_call_seconds = registry.register(Histogram(
+    "bot_db_call_seconds", "Latency of service functions that query the database", ("function",),
+))
+db_time_seconds = registry.register(Counter(
+    "bot_db_time_seconds_total", "Time in outermost @db_timed calls (a nested call is not counted twice)",
+))
+telegram_request_seconds = registry.register(Histogram(
+    "bot_telegram_request_seconds", "Telegram Bot API call latency by method", ("method",),
+))
+telegram_errors = registry.register(Counter(
+    "bot_telegram_errors_total", "Telegram Bot API errors by method and error", ("method", "error"),
+))
+scheduler_lag_seconds = registry.register(Histogram(
+    "bot_scheduler_lag_seconds", "Slot start delay: actual fire time minus scheduled time", ("replayed",),
+    buckets=LAG_BUCKETS,
+))
+slot_send_seconds = registry.register(Histogram(
+    "bot_slot_send_seconds", "Scheduled slot: first outbox claim to its last send (retries included)",
+    buckets=LAG_BUCKETS,
+))
+update_seconds = registry.register(Histogram(
+    "bot_update_seconds", "Dispatcher time per update (after the FSM context is loaded) by update type", ("type",),
+))
+middleware_seconds = registry.register(Histogram(
+    "bot_middleware_seconds", "Own time of an access middleware (handler excluded)", ("router", "middleware"),
+))
+
+# @db_timed calls running in this task; only the outermost one adds to the totals
+_db_depth: ContextVar[int] = ContextVar("bot_db_depth", default=0)
+
+# Per-update time breakdown, only set by benchmarks.loadgen; in the bot it stays None
+_update_trace: ContextVar[Optional[Dict[str, Any]]] = ContextVar("bot_update_trace", default=None)
+
+
+def start_update_trace() -> Dict[str, Any]:
+    """
+    Collect where the current task's update time goes (seconds): dispatch, middleware, handler, db,
+    telegram; plus handler_name = "router.callback". Call in the task that runs dp.feed_update.
+    """
+    trace: Dict[str, Any] = {}
+    _update_trace.set(trace)
+    return trace
+
+
+@contextmanager
+def update_trace() -> Iterator[Dict[str, Any]]:
+    """
+    The trace for the block: the one already set in this task (benchmarks.loadgen), which keeps
+    collecting, or else a new one that is unset again afterwards.
+    """
+    trace = _update_trace.get()
+    if trace is not None:
+        yield trace
+        return
+    trace = {}
+    token = _update_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _update_trace.reset(token)
+
+
+def _trace_add(key: str, seconds: float) -> None:
+    trace = _update_trace.get()
+    if trace is not None:
+        trace[key] = trace.get(key, 0.0) + seconds
+
+
+def db_timed(func: F) -> F:
+    """
+    Record the call's latency in bot_db_call_seconds{function="<module>.<name>"}. For functions that
+    query SQLite; pure cache lookups are left undecorated. A call made inside another @db_timed call is
+    still observed under its own label, but only the outermost one adds to bot_db_time_seconds_total
+    and the update trace.
+    """
+    label = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__.rsplit('.', 1)[-1]}"
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        depth = _db_depth.get()
+        token = _db_depth.set(depth + 1)
+        started = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            _db_depth.reset(token)
+            db_call_seconds.observe(elapsed, label)
+            if depth == 0:
+                db_time_seconds.inc(amount=elapsed)
+                _trace_add("db", elapsed)
+
+    return wrapper  # type: ignore[return-value]
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Inner middleware on a router's observers: times the matched handler (filters already passed)."""
+
+    def __init__(self, router_name: str) -> None:
+        self.router_name = router_name
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        handler_object = data.get("handler")
+        name = getattr(getattr(handler_object, "callback", None), "__name__", "unknown")
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            elapsed = time.perf_counter() - started
+            handler_seconds.observe(elapsed, self.router_name, name)
+            _trace_add("handler", elapsed)
+            trace = _update_trace.get()
+            if trace is not None:
+                trace["handler_name"] = f"{self.router_name}.{name}"
+
+
+class TimedMiddleware(BaseMiddleware):
+    """Wraps an access middleware (AdminOnly, OwnerOnly) and records its own time, without what runs after it."""
+
+    def __init__(self, inner: BaseMiddleware, router_name: str) -> None:
+        self.inner = inner
+        self.router_name = router_name
+        self.name = type(inner).__name__
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        downstream = 0.0
+
+        async def timed_handler(e: TelegramObject, d: Dict[str, Any]) -> Any:
+            nonlocal downstream
+            started = time.perf_counter()
+            try:
+                return await handler(e, d)
+            finally:
+                downstream += time.perf_counter() - started
+
+        started = time.perf_counter()
+        try:
+            return await self.inner(timed_handler, event, data)
+        finally:
+            own = time.perf_counter() - started - downstream
+            middleware_seconds.observe(own, self.router_name, self.name)
+            _trace_add("middleware", own)
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """Outer middleware on dp.update: time from routing to the end of the handler, by update type."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        kind = event.event_type if isinstance(event, Update) else type(event).__name__
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            elapsed = time.perf_counter() - started
+            update_seconds.observe(elapsed, kind)
+            _trace_add("dispatch", elapsed)
+
+
+class TelegramMetricsMiddleware(BaseRequestMiddleware):
+    """Session middleware: latency of every Bot API request by method, and errors by type."""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        name = type(method).__name__
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except (TelegramAPIError, asyncio.TimeoutError, OSError) as e:
+            telegram_errors.inc(name, type(e).__name__)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            telegram_request_seconds.observe(elapsed, name)
+            _trace_add("telegram", elapsed)
+
+
+async def _handle_metrics(request: web.Request) -> web.Response:
+    return web.Response(text=registry.render(), content_type="text/plain", charset="utf-8")
+
+
+async def start_metrics_server(host: str = METRICS_HOST, port: int = METRICS_PORT) -> Optional[web.AppRunner]:
+    """Serve GET /metrics; returns the runner to clean up on shutdown, or None when METRICS_PORT is 0."""
+    if port <= 0:
+        return None
+    app = web.Application()
+    app.router.add_get("/metrics", _handle_metrics)
+    runner = web.AppRunner(app, handle_signals=False)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info("Metrics on http://%s:%s/metrics", host, port)
+    return runner
@@ -25,8 +25,8 @@ class AdminOnlyMiddleware(BaseMiddleware):
             return await handler(event, data)
         user_id = event.from_user.id if event.from_user else 0
         user_is_owner = is_owner(user_id)
-        is_admin_user = await is_admin(user_id)
-        if user_is_owner or is_admin_user:
+        # is_admin is an in-memory set lookup (admin_service cache), no DB query per update
+        if user_is_owner or await is_admin(user_id):
             data["is_owner"] = user_is_owner
             data["is_admin"] = True
             return await handler(event, data)
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Session middleware: every outbound message request (send/copy/forward/edit/delete) waits for the
+per-chat and global budgets in bot.ratelimit, and is retried after Telegram's retry_after on 429.
+Installed once on bot.session, so handlers, scheduled posting and admin previews share one limiter.
+"""
+import logging
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from config import TELEGRAM_RETRY_AFTER_ATTEMPTS
+from bot.ratelimit import ChatRateLimiter, limiter as default_limiter
+
+logger = logging.getLogger(__name__)
+
+# Method class names that count against Telegram's message limits
+_THROTTLED_PREFIXES = ("Send", "Copy", "Forward", "EditMessage", "DeleteMessage")
+_UNTHROTTLED = frozenset({"SendChatAction"})
+
+
+def is_throttled(method: TelegramMethod) -> bool:
+    name = type(method).__name__
+    return name.startswith(_THROTTLED_PREFIXES) and name not in _UNTHROTTLED
+
+
+class OutboundThrottleMiddleware(BaseRequestMiddleware):
+    """Rate-limit message requests per chat and globally; honour retry_after up to N attempts."""
+
+    def __init__(self, limiter: ChatRateLimiter = default_limiter, attempts: int = TELEGRAM_RETRY_AFTER_ATTEMPTS) -> None:
+        self.limiter = limiter
+        self.attempts = max(attempts, 1)
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        if not is_throttled(method):
+            return await make_request(bot, method)
+        chat_id = getattr(method, "chat_id", None)
+        attempt = 1
+        while True:
+            waited = await self.limiter.acquire(chat_id)
+            if waited > 1:
+                logger.debug(
+                    "%s to chat %s waited %.2fs for flood limits (%d waiting)",
+                    type(method).__name__, chat_id, waited, self.limiter.waiting,
+                )
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                # Pauses the bucket, so the next acquire() sleeps out retry_after in queue order
+                self.limiter.retry_after(chat_id, e.retry_after)
+                if attempt >= self.attempts:
+                    raise
+                logger.warning(
+                    "Flood control on %s in chat %s: retry after %ss (attempt %d/%d)",
+                    type(method).__name__, chat_id, e.retry_after, attempt, self.attempts,
+                )
+                attempt += 1
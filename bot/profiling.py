@@ -0,0 +1,236 @@
+"""
+Opt-in profiling: samples PROFILE_SAMPLE_PERCENT of handler calls (ProfilingMiddleware) and scheduled
+posting jobs (@profiled) and keeps the PROFILE_KEEP slowest traces in memory. The owner switches it with
+/profile and writes the traces to a file with /profile_dump.
+
+"wall" mode records the time breakdown of bot/metrics.py's update trace (handler, service calls,
+Telegram API). "cprofile" mode adds cProfile call stats; the profiler sees the whole event
+loop while a sample runs, so other tasks show up too, and only one cProfile sample runs at a time.
+"""
+import cProfile
+import functools
+import heapq
+import io
+import itertools
+import logging
+import os
+import pstats
+import random
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery, Message, TelegramObject
+
+from config import PROFILE_DIR, PROFILE_KEEP, PROFILE_MODE, PROFILE_SAMPLE_PERCENT
+from bot.metrics import update_trace
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+MODES = ("wall", "cprofile")
+# Lines of pstats output kept per cProfile trace
+PSTATS_LINES = 40
+
+# Set while a sample runs in this task, so nested profiled calls are part of it instead of new samples
+_sampling: ContextVar[bool] = ContextVar("profiling_sampling", default=False)
+
+
+@dataclass
+class Trace:
+    kind: str  # "handler" or "job"
+    name: str
+    detail: str
+    started_at: datetime
+    seconds: float = 0.0
+    breakdown: Dict[str, float] = field(default_factory=dict)
+    stats: str = ""
+
+    def format(self) -> str:
+        lines = [
+            f"=== {self.seconds * 1000:.1f} ms  {self.kind} {self.name}  {self.detail}  "
+            f"{self.started_at:%Y-%m-%d %H:%M:%S}"
+        ]
+        if self.breakdown:
+            lines.append("    " + "  ".join(f"{k}={v * 1000:.1f}ms" for k, v in sorted(self.breakdown.items())))
+        if self.stats:
+            lines.append(self.stats.rstrip())
+        return "\n".join(lines)
+
+
+class Profiler:
+    """Sampling decision, the bounded set of slowest traces and the dump."""
+
+    def __init__(self, percent: float = 0.0, mode: str = "wall", keep: int = 20) -> None:
+        self.percent = percent
+        self.mode = mode if mode in MODES else "wall"
+        self.keep = max(keep, 1)
+        self.sampled = 0
+        # Min-heap of (seconds, seq, trace): the fastest kept trace is dropped first
+        self._slowest: List[Tuple[float, int, Trace]] = []
+        self._seq = itertools.count()
+        self._cprofile_busy = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.percent > 0
+
+    def configure(self, percent: Optional[float] = None, mode: Optional[str] = None) -> None:
+        if percent is not None:
+            self.percent = min(max(percent, 0.0), 100.0)
+        if mode is not None:
+            if mode not in MODES:
+                raise ValueError(f"profile mode must be one of {', '.join(MODES)}")
+            self.mode = mode
+        logger.info("Profiling: %s%% of updates/jobs, mode %s", self.percent, self.mode)
+
+    def should_sample(self) -> bool:
+        return self.percent > 0 and not _sampling.get() and random.random() * 100 < self.percent
+
+    @asynccontextmanager
+    async def sample(self, kind: str, name: str, detail: str = "") -> AsyncIterator[None]:
+        """Trace the body; the result is kept if it is among the slowest."""
+        trace = Trace(kind=kind, name=name, detail=detail, started_at=datetime.now())
+        token = _sampling.set(True)
+        try:
+            with update_trace() as breakdown:
+                # The loadgen's trace may already hold earlier parts of this update; keep what the sample adds
+                before = {k: v for k, v in breakdown.items() if isinstance(v, float)}
+                profile: Optional[cProfile.Profile] = None
+                if self.mode == "cprofile" and not self._cprofile_busy:
+                    profile = cProfile.Profile()
+                    try:
+                        profile.enable()
+                        self._cprofile_busy = True
+                    except ValueError:
+                        # Another profiler (debugger, coverage) owns the hook; this sample stays wall-clock
+                        profile = None
+                started = time.perf_counter()
+                try:
+                    yield
+                finally:
+                    trace.seconds = time.perf_counter() - started
+                    if profile is not None:
+                        profile.disable()
+                        self._cprofile_busy = False
+                        trace.stats = _format_stats(profile)
+                    trace.breakdown = {
+                        k: v - before.get(k, 0.0)
+                        for k, v in breakdown.items()
+                        if isinstance(v, float) and v != before.get(k)
+                    }
+        finally:
+            _sampling.reset(token)
+            self._keep(trace)
+
+    def _keep(self, trace: Trace) -> None:
+        self.sampled += 1
+        item = (trace.seconds, next(self._seq), trace)
+        if len(self._slowest) < self.keep:
+            heapq.heappush(self._slowest, item)
+        elif trace.seconds > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, item)
+
+    def slowest(self) -> List[Trace]:
+        return [t for _, _, t in sorted(self._slowest, key=lambda item: item[0], reverse=True)]
+
+    def clear(self) -> None:
+        self._slowest.clear()
+
+    def dump(self, directory: str = PROFILE_DIR) -> Optional[str]:
+        """Write the kept traces (slowest first) to a new file; returns its path, or None if there are none."""
+        traces = self.slowest()
+        if not traces:
+            return None
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"profile-{datetime.now():%Y%m%d-%H%M%S}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(
+                f"# {len(traces)} slowest of {self.sampled} sampled, {self.percent}% sampling, mode {self.mode}\n\n"
+            )
+            f.write("\n\n".join(t.format() for t in traces) + "\n")
+        return path
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "percent": self.percent,
+            "sampled": self.sampled,
+            "kept": len(self._slowest),
+            "slowest_seconds": max((s for s, _, _ in self._slowest), default=0.0),
+        }
+
+
+def _format_stats(profile: cProfile.Profile) -> str:
+    out = io.StringIO()
+    pstats.Stats(profile, stream=out).strip_dirs().sort_stats("cumulative").print_stats(PSTATS_LINES)
+    # Drop pstats' header lines up to the column titles
+    text = out.getvalue()
+    start = text.find("   ncalls")
+    return text[start:] if start >= 0 else text
+
+
+profiler = Profiler(PROFILE_SAMPLE_PERCENT, PROFILE_MODE, PROFILE_KEEP)
+
+
+def _describe(event: TelegramObject, data: Dict[str, Any]) -> str:
+    update = data.get("event_update")
+    parts = [f"update={update.update_id}"] if update is not None else []
+    if isinstance(event, CallbackQuery):
+        parts.append(f"data={event.data}")
+    elif isinstance(event, Message):
+        parts.append(f"chat={event.chat.id}")
+    user = data.get("event_from_user")
+    if user is not None:
+        parts.append(f"user={user.id}")
+    return " ".join(parts)
+
+
+class ProfilingMiddleware(BaseMiddleware):
+    """Inner middleware on a router's observers: samples matched handler calls."""
+
+    def __init__(self, router_name: str) -> None:
+        self.router_name = router_name
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if not profiler.should_sample():
+            return await handler(event, data)
+        callback = getattr(data.get("handler"), "callback", None)
+        name = f"{self.router_name}.{getattr(callback, '__name__', 'unknown')}"
+        async with profiler.sample("handler", name, _describe(event, data)):
+            return await handler(event, data)
+
+
+def _job_detail(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> str:
+    # Ids among the arguments (schedule_id, content_id, chat_id, Content.id); the Bot and usernames are skipped
+    parts = []
+    for value in args:
+        if isinstance(value, int) and not isinstance(value, bool):
+            parts.append(str(value))
+        elif isinstance(getattr(value, "id", None), int) and not hasattr(value, "session"):
+            parts.append(f"{type(value).__name__.lower()}={value.id}")
+    parts.extend(f"{k}={v}" for k, v in kwargs.items() if isinstance(v, (int, datetime)))
+    return " ".join(parts)
+
+
+def profiled(func: F) -> F:
+    """Sample a scheduled job like a handler (name: <module>.<function>, detail: its arguments)."""
+    name = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        if not profiler.should_sample():
+            return await func(*args, **kwargs)
+        async with profiler.sample("job", name, _job_detail(args, kwargs)):
+            return await func(*args, **kwargs)
+
+    return wrapper  # type: ignore[return-value]
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+Token bucket rate limiting for outbound Telegram sends, and a sliding-window limiter for inbound spam.
+Telegram limits: ~30 messages/s overall, ~1 message/s per private chat, 20 messages/min per group.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Hashable, Optional, Union
+
+from config import (
+    TELEGRAM_GLOBAL_RATE,
+    TELEGRAM_GROUP_RATE_PER_MIN,
+    TELEGRAM_PRIVATE_RATE,
+    TELEGRAM_PRIVATE_BURST,
+)
+
+
+ChatId = Union[int, str]
+
+# How often idle chat buckets are dropped (s); a full group bucket takes a minute to refill anyway
+_SWEEP_INTERVAL = 60.0
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, at most `capacity` tokens saved up for bursts."""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        # Lock keeps waiters in FIFO order, so posts leave in the order they were queued
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def pause(self, seconds: float) -> None:
+        """Block the bucket for `seconds` (Telegram retry_after): later acquires wait it out in order."""
+        self._refill()
+        self._tokens = min(self._tokens, 1 - seconds * self.rate)
+
+    async def acquire(self) -> float:
+        """Take one token, sleeping until it is available. Returns seconds waited."""
+        started = time.monotonic()
+        async with self._lock:
+            self._refill()
+            # A loop, not one sleep: a pause() (retry_after) during the sleep pushes the token further out
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+        return time.monotonic() - started
+
+    def idle(self) -> bool:
+        """Full and nobody waiting: dropping it and starting a new one later changes nothing."""
+        if self._lock.locked():
+            return False
+        self._refill()
+        return self._tokens >= self.capacity
+
+
+class ChatRateLimiter:
+    """
+    One global bucket plus one bucket per chat (groups and private chats have different limits).
+    Keeps simple counters (requests waiting now, total wait, retry_after hits) for logging and /metrics.
+    Buckets of chats that went quiet are swept, so every private chat ever answered is not kept forever.
+    """
+
+    def __init__(
+        self,
+        global_rate: float,
+        group_per_minute: float,
+        private_rate: float,
+        private_burst: int,
+    ) -> None:
+        self._global = TokenBucket(global_rate, global_rate)
+        self._group_per_minute = group_per_minute
+        self._private_rate = private_rate
+        self._private_burst = private_burst
+        self._chats: Dict[ChatId, TokenBucket] = {}
+        self._last_sweep = time.monotonic()
+        self.waiting = 0
+        self.max_waiting = 0
+        self.requests = 0
+        self.total_wait = 0.0
+        self.retry_after_hits = 0
+
+    def chat_bucket(self, chat_id: ChatId) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            self._sweep()
+            # Negative ids and @usernames are groups/channels
+            if isinstance(chat_id, str) or chat_id < 0:
+                bucket = TokenBucket(self._group_per_minute / 60.0, self._group_per_minute)
+            else:
+                bucket = TokenBucket(self._private_rate, self._private_burst)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    async def acquire(self, chat_id: Optional[ChatId]) -> float:
+        """Wait for both the chat and the global budget (global only if chat_id is None). Returns seconds waited."""
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            waited = await self.chat_bucket(chat_id).acquire() if chat_id is not None else 0.0
+            waited += await self._global.acquire()
+        finally:
+            self.waiting -= 1
+        self.requests += 1
+        self.total_wait += waited
+        return waited
+
+    def retry_after(self, chat_id: Optional[ChatId], seconds: float) -> None:
+        """Telegram answered 429: hold that chat (or everything, if the method had no chat) for `seconds`."""
+        self.retry_after_hits += 1
+        if chat_id is None:
+            self._global.pause(seconds)
+        else:
+            self.chat_bucket(chat_id).pause(seconds)
+
+    def _sweep(self) -> None:
+        """Drop idle chat buckets, at most once per _SWEEP_INTERVAL."""
+        now = time.monotonic()
+        if now - self._last_sweep < _SWEEP_INTERVAL:
+            return
+        self._last_sweep = now
+        for chat_id in [c for c, bucket in self._chats.items() if bucket.idle()]:
+            del self._chats[chat_id]
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "requests": self.requests,
+            "total_wait_seconds": round(self.total_wait, 3),
+            "retry_after_hits": self.retry_after_hits,
+            "chats": len(self._chats),
+        }
+
+
+class SlidingWindowLimiter:
+    """
+    At most `limit` hits per key within the last `window` seconds (exact sliding window, in memory).
+    Used to stop per-user spam before it reaches the database.
+    """
+
+    def __init__(self, limit: int, window: float) -> None:
+        self.limit = limit
+        self.window = window
+        self._hits: Dict[Hashable, Deque[float]] = {}
+        self._last_sweep = time.monotonic()
+
+    def hit(self, key: Hashable) -> bool:
+        """Record a hit for key. Returns False (and records nothing) if the key is over its limit."""
+        now = time.monotonic()
+        self._sweep(now)
+        hits = self._hits.get(key)
+        if hits is None:
+            hits = self._hits[key] = deque()
+        cutoff = now - self.window
+        while hits and hits[0] <= cutoff:
+            hits.popleft()
+        if len(hits) >= self.limit:
+            return False
+        hits.append(now)
+        return True
+
+    def _sweep(self, now: float) -> None:
+        """Drop keys with no hits inside the window, at most once per window."""
+        if now - self._last_sweep < self.window:
+            return
+        self._last_sweep = now
+        cutoff = now - self.window
+        for key in [k for k, hits in self._hits.items() if not hits or hits[-1] <= cutoff]:
+            del self._hits[key]
+
+    def __len__(self) -> int:
+        return len(self._hits)
+
+
+# Process-wide limiter shared by every send path
+limiter = ChatRateLimiter(
+    global_rate=TELEGRAM_GLOBAL_RATE,
+    group_per_minute=TELEGRAM_GROUP_RATE_PER_MIN,
+    private_rate=TELEGRAM_PRIVATE_RATE,
+    private_burst=TELEGRAM_PRIVATE_BURST,
+)
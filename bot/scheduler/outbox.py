@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+Outbox worker: drains the outbox table into Telegram.
+One poller claims due rows in batches and hands them to per-chat queues. Each chat has one sender that
+sends in claim order (slot posts keep their attach order); different chats are sent concurrently, so a
+throttled group does not hold back the others.
+Transient failures (network, 5xx, flood control) are retried with exponential backoff and jitter;
+permanent ones (bad request, bot kicked) and rows past OUTBOX_MAX_ATTEMPTS are marked failed.
+"""
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramNotFound
+
+from config import (
+    OUTBOX_BACKOFF_BASE,
+    OUTBOX_BACKOFF_MAX,
+    OUTBOX_BATCH_SIZE,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_POLL_SECONDS,
+)
+from bot.database.models import OutboxItem
+from bot.logs import log_context
+from bot.metrics import slot_send_seconds
+from bot.scheduler import posting
+from bot.services import content_service, outbox_service
+
+logger = logging.getLogger(__name__)
+
+# Errors that will not go away by retrying the same request
+_PERMANENT_ERRORS = (TelegramBadRequest, TelegramForbiddenError, TelegramNotFound)
+
+_worker: Optional["OutboxWorker"] = None
+
+
+def backoff_delay(attempt: int) -> float:
+    """Seconds before retry number `attempt` (1-based): exponential, capped, with equal jitter."""
+    delay = min(OUTBOX_BACKOFF_MAX, OUTBOX_BACKOFF_BASE * (2 ** max(attempt - 1, 0)))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def notify() -> None:
+    """Wake the worker after new rows were queued. No-op if no worker is running."""
+    if _worker is not None:
+        _worker.notify()
+
+
+def get_worker() -> Optional["OutboxWorker"]:
+    return _worker
+
+
+@dataclass
+class _SlotProgress:
+    """Sends of one (schedule_id, slot_at) still open in this process: claimed, not yet sent or failed."""
+
+    started: float
+    open_ids: Set[int] = field(default_factory=set)
+    sent: int = 0
+    failed: int = 0
+
+
+class OutboxWorker:
+    """Poll-and-dispatch loop over the outbox table."""
+
+    def __init__(
+        self,
+        bot: Bot,
+        bot_username: str = "",
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        poll_interval: float = OUTBOX_POLL_SECONDS,
+    ) -> None:
+        self.bot = bot
+        self.bot_username = bot_username
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._wake = asyncio.Event()
+        self._queues: Dict[int, asyncio.Queue] = {}
+        self._senders: Dict[int, asyncio.Task] = {}
+        self._slots: Dict[Tuple[int, str], _SlotProgress] = {}
+        self._poller: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    def queue_depth(self) -> int:
+        return sum(q.qsize() for q in self._queues.values())
+
+    def stats(self) -> Dict[str, int]:
+        return {"sent": self.sent, "retried": self.retried, "failed": self.failed, "queue_depth": self.queue_depth()}
+
+    async def start(self) -> None:
+        global _worker
+        requeued = await outbox_service.requeue_inflight()
+        if requeued:
+            logger.warning("Outbox: %d send(s) interrupted by the last shutdown queued again", requeued)
+        _worker = self
+        self._poller = asyncio.create_task(self._run(), name="outbox-poller")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Stop claiming, give in-flight sends `timeout` seconds, then cancel (leftovers are requeued next start)."""
+        global _worker
+        if _worker is self:
+            _worker = None
+        if self._poller is not None:
+            self._poller.cancel()
+            await asyncio.gather(self._poller, return_exceptions=True)
+        senders = list(self._senders.values())
+        if senders:
+            _, pending = await asyncio.wait(senders, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        logger.info("Outbox worker stopped: sent=%d retried=%d failed=%d", self.sent, self.retried, self.failed)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                items = await outbox_service.claim_due(self.batch_size)
+                if items:
+                    await self._dispatch(items)
+                if len(items) >= self.batch_size:
+                    continue
+                await self._sleep_until_due()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("Outbox poll failed: %s", e)
+                await asyncio.sleep(self.poll_interval)
+
+    async def _sleep_until_due(self) -> None:
+        timeout = self.poll_interval
+        due = await outbox_service.next_due_at()
+        if due is not None:
+            timeout = min(timeout, max(due - time.time(), 0.0))
+        self._wake.clear()
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _dispatch(self, items: List[OutboxItem]) -> None:
+        contents = await content_service.get_contents_by_ids(list({item.content_id for item in items}))
+        now = time.monotonic()
+        for item in items:
+            if item.schedule_id is not None and item.slot_at:
+                slot = self._slots.setdefault((item.schedule_id, item.slot_at), _SlotProgress(started=now))
+                slot.open_ids.add(item.id)
+            queue = self._queues.setdefault(item.chat_id, asyncio.Queue())
+            queue.put_nowait((item, contents.get(item.content_id)))
+            sender = self._senders.get(item.chat_id)
+            if sender is None or sender.done():
+                sender = asyncio.create_task(self._drain_chat(item.chat_id), name=f"outbox-chat-{item.chat_id}")
+                self._senders[item.chat_id] = sender
+                sender.add_done_callback(lambda task, chat_id=item.chat_id: self._forget_sender(chat_id, task))
+
+    def _forget_sender(self, chat_id: int, task: asyncio.Task) -> None:
+        if self._senders.get(chat_id) is task:
+            del self._senders[chat_id]
+
+    async def _drain_chat(self, chat_id: int) -> None:
+        queue = self._queues[chat_id]
+        while True:
+            try:
+                item, content = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                await self._process(item, content)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # A DB error while recording the outcome: the row stays 'sending' until the next start;
+                # this chat's sender goes on with the rest of its queue
+                logger.exception("Outbox send %s (content %s -> chat %s) could not be recorded: %s",
+                                 item.id, item.content_id, item.chat_id, e)
+
+    async def _process(self, item: OutboxItem, content) -> None:
+        with log_context(schedule_id=item.schedule_id, content_id=item.content_id):
+            if not posting.is_publishable(content):
+                await outbox_service.mark_failed(item.id, "content deleted or publishing disabled")
+                self._slot_done(item, sent=False)
+                return
+            try:
+                message_id = await posting.send_content(self.bot, content, item.chat_id, self.bot_username)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await self._on_error(item, e)
+                return
+            if message_id is None:
+                await outbox_service.mark_failed(item.id, "nothing to send")
+                self._slot_done(item, sent=False)
+                return
+            self.sent += 1
+            self._slot_done(item, sent=True)
+            try:
+                await outbox_service.mark_sent(item.id, message_id)
+                await content_service.log_post(item.content_id, item.chat_id, message_id)
+            except Exception as e:
+                # Already delivered: log it; the row is left 'sending' and requeue_inflight sends it again
+                # after a restart
+                logger.exception(
+                    "Outbox send %s delivered as message %s to chat %s, but recording it failed: %s",
+                    item.id, message_id, item.chat_id, e,
+                )
+
+    def _slot_done(self, item: OutboxItem, sent: bool) -> None:
+        """Count a finished send; after the slot's last one, report first claim -> last send time."""
+        key = (item.schedule_id, item.slot_at)
+        slot = self._slots.get(key)
+        if slot is None or item.id not in slot.open_ids:
+            return
+        slot.open_ids.discard(item.id)
+        if sent:
+            slot.sent += 1
+        else:
+            slot.failed += 1
+        if slot.open_ids:
+            return
+        del self._slots[key]
+        elapsed = time.monotonic() - slot.started
+        slot_send_seconds.observe(elapsed)
+        logger.info(
+            "Slot schedule_id=%s %s: %d sent, %d failed in %.2fs (first claim to last send)",
+            item.schedule_id, item.slot_at, slot.sent, slot.failed, elapsed,
+        )
+
+    async def _on_error(self, item: OutboxItem, error: Exception) -> None:
+        reason = f"{type(error).__name__}: {error}"
+        if isinstance(error, _PERMANENT_ERRORS) or item.attempts >= OUTBOX_MAX_ATTEMPTS:
+            self.failed += 1
+            logger.error(
+                "Outbox send %s failed for good (content %s -> chat %s, attempt %d): %s",
+                item.id, item.content_id, item.chat_id, item.attempts, reason,
+            )
+            await outbox_service.mark_failed(item.id, reason)
+            self._slot_done(item, sent=False)
+            return
+        # A retried send stays open: the slot is not done until it is sent or fails for good
+        delay = backoff_delay(item.attempts)
+        self.retried += 1
+        logger.warning(
+            "Outbox send %s failed (content %s -> chat %s, attempt %d/%d), retry in %.0fs: %s",
+            item.id, item.content_id, item.chat_id, item.attempts, OUTBOX_MAX_ATTEMPTS, delay, reason,
+        )
+        await outbox_service.mark_retry(item.id, reason, delay)
+        self.notify()
@@ -1,80 +1,136 @@
 # -*- coding: utf-8 -*-
 """
-Scheduled posting: at each schedule time, post the content assigned to that time.
+Scheduled posting: at each schedule time, queue the content assigned to that time for every target group.
+Everything a slot needs (groups, content rows) is loaded up front and written to the outbox in one
+transaction; the outbox worker sends it, one sender per chat in queue order (chats run concurrently,
+so a throttled chat does not hold back the others), and retries failures with backoff.
 """
 import logging
+import time
+from datetime import datetime
+from typing import List, Optional
 
 from aiogram import Bot
 
-from bot.services import content_service, settings_service, schedule_service
+from bot.database.models import Content
+from bot.keyboards.inline import contact_admin_keyboard
+from bot.logs import log_context
+from bot.metrics import scheduler_lag_seconds
+from bot.profiling import profiled
+from bot.scheduler.timetable import now_local, slot_key
+from bot.scheduler import outbox
+from bot.services import content_service, group_service, outbox_service, schedule_service
 
 logger = logging.getLogger(__name__)
 
 
-async def post_scheduled_content(bot: Bot, bot_username: str, schedule_id: int) -> None:
+def is_publishable(content: Optional[Content]) -> bool:
+    return bool(content and content.status == "active" and content.publishing_enabled)
+
+
+@profiled
+async def post_scheduled_content(
+    bot: Bot,
+    bot_username: str,
+    schedule_id: int,
+    content_ids: Optional[List[int]] = None,
+    slot_at: Optional[datetime] = None,
+    replayed: bool = False,
+) -> None:
     """
-    Shu vaqtga biriktirilgan barcha postlarni guruhga yuborish.
-    Har bir postni alohida xabar sifatida yuboradi.
+    Shu vaqtga biriktirilgan barcha postlarni barcha nashr guruhlariga yuborish.
+    Har bir (post, guruh) outbox ga bitta tranzaksiyada yoziladi; yuborish va qayta urinishni outbox worker bajaradi.
+    content_ids berilsa (dispatcher timetable), content_schedule qayta so'ralmaydi.
+    slot_at — reja vaqti (default: joriy minut); bir slot schedule_runs orqali faqat bir marta yuboriladi.
     """
-    target_group_id = await settings_service.get_target_group_id()
-    if not target_group_id:
-        logger.warning("Target group not set, skipping scheduled post")
-        return
-    content_ids = await schedule_service.get_content_ids_for_schedule(schedule_id)
-    if not content_ids:
-        logger.warning("Reja vaqtida post chiqmadi: schedule_id=%s ga content biriktirilmagan", schedule_id)
-        return
-    posted = 0
-    for content_id in content_ids:
-        ok = await post_content_by_id_to_group(bot, bot_username, content_id)
-        if ok:
-            posted += 1
-    logger.info("Scheduled posts: %d/%d sent at schedule_id %s", posted, len(content_ids), schedule_id)
+    with log_context(schedule_id=schedule_id):
+        started = time.monotonic()
+        slot = slot_at or now_local().replace(second=0, microsecond=0)
+        scheduler_lag_seconds.observe(max((now_local() - slot).total_seconds(), 0.0), "true" if replayed else "false")
+        if not await schedule_service.claim_schedule_run(schedule_id, slot_key(slot), replayed=replayed):
+            logger.info("Slot already posted, skipping: schedule_id=%s slot=%s", schedule_id, slot_key(slot))
+            return
+        group_ids = await group_service.list_target_group_ids()
+        if not group_ids:
+            logger.warning("Target group not set, skipping scheduled post")
+            return
+        if content_ids is None:
+            content_ids = await schedule_service.get_content_ids_for_schedule(schedule_id)
+        if not content_ids:
+            logger.warning("Reja vaqtida post chiqmadi: schedule_id=%s ga content biriktirilmagan", schedule_id)
+            return
+        contents = await content_service.get_contents_by_ids(content_ids)
+        publishable = [cid for cid in content_ids if is_publishable(contents.get(cid))]
+
+        # Group-major order: outbox ids follow attach order within each chat, and the worker sends a chat's
+        # rows one at a time in claim (id) order
+        sends = [(cid, gid) for gid in group_ids for cid in publishable]
+        queued = await outbox_service.enqueue(sends, schedule_id=schedule_id, slot_at=slot_key(slot))
+        outbox.notify()
+        logger.info(
+            "Scheduled posts: %d send(s) queued for %d group(s) at schedule_id %s in %.2fs",
+            queued, len(group_ids), schedule_id, time.monotonic() - started,
+        )
 
 
+@profiled
 async def post_content_by_id_to_group(bot: Bot, bot_username: str, content_id: int) -> bool:
     """
-    Post a specific content (by id) to target group immediately. Does not change active content.
-    Returns True if posted, False if no group, no content, or content has no media/text.
+    Queue a specific content (by id) for all target groups, due now. Does not change active content.
+    The outbox worker sends it behind whatever the chat already has queued, with the usual retries.
+    Returns True if queued, False if there is no group or the content cannot be published.
     """
-    target_group_id = await settings_service.get_target_group_id()
-    if not target_group_id:
-        logger.warning("Target group not set, skipping post now")
-        return False
-    content = await content_service.get_content_by_id(content_id)
-    if not content or content.status != "active" or not content.publishing_enabled:
-        return False
-    try:
-        if content.content_type == "photo" and content.file_id:
-            msg = await bot.send_photo(
-                chat_id=target_group_id,
-                photo=content.file_id,
-                caption=content.caption or "",
-                parse_mode=None,
-            )
-        elif content.content_type == "video" and content.file_id:
-            msg = await bot.send_video(
-                chat_id=target_group_id,
-                video=content.file_id,
-                caption=content.caption or "",
-                parse_mode=None,
-            )
-        elif content.content_type == "text" or content.text:
-            text = (content.text or content.caption or "").strip()
-            if not text:
-                return False
-            if len(text) > 4096:
-                text = text[:4093] + "…"
-            msg = await bot.send_message(
-                chat_id=target_group_id,
-                text=text,
-                parse_mode=None,
-            )
-        else:
+    with log_context(content_id=content_id):
+        group_ids = await group_service.list_target_group_ids()
+        if not group_ids:
+            logger.warning("Target group not set, skipping post now")
             return False
-        await content_service.log_post(content.id, target_group_id, msg.message_id)
-        logger.info("Posted content %s to group %s (post now)", content.id, target_group_id)
-        return True
-    except Exception as e:
-        logger.exception("Failed to post content %s to group: %s", content_id, e)
-        return False
+        content = await content_service.get_content_by_id(content_id)
+        if not is_publishable(content):
+            return False
+        queued = await outbox_service.enqueue([(content.id, gid) for gid in group_ids])
+        outbox.notify()
+        logger.info("Post now: content %s queued for %d group(s)", content.id, queued)
+        return queued > 0
+
+
+@profiled
+async def send_content(bot: Bot, content: Content, chat_id: int, bot_username: str = "") -> Optional[int]:
+    """
+    Send one already-loaded content to the chat. Returns the message_id, None if there is nothing to send; raises on API errors.
+    With bot_username the post gets a «contact admin» button: a /start deep link carrying the content id (lead source).
+    """
+    reply_markup = contact_admin_keyboard(bot_username, content.id) if bot_username else None
+    if content.content_type == "photo" and content.file_id:
+        msg = await bot.send_photo(
+            chat_id=chat_id,
+            photo=content.file_id,
+            caption=content.caption or "",
+            parse_mode=None,
+            reply_markup=reply_markup,
+        )
+    elif content.content_type == "video" and content.file_id:
+        msg = await bot.send_video(
+            chat_id=chat_id,
+            video=content.file_id,
+            caption=content.caption or "",
+            parse_mode=None,
+            reply_markup=reply_markup,
+        )
+    elif content.content_type == "text" or content.text:
+        text = (content.text or content.caption or "").strip()
+        if not text:
+            return None
+        if len(text) > 4096:
+            text = text[:4093] + "…"
+        msg = await bot.send_message(
+            chat_id=chat_id,
+            text=text,
+            parse_mode=None,
+            reply_markup=reply_markup,
+        )
+    else:
+        return None
+    logger.info("Posted content %s to group %s", content.id, chat_id)
+    return msg.message_id
+
@@ -1,20 +1,31 @@
 # -*- coding: utf-8 -*-
 """
 Scheduler registry: add/remove cron jobs when admin adds/removes schedule times.
+In dispatcher mode (SCHEDULER_MODE=dispatcher) there is a single once-a-minute job instead,
+reading an in-memory Timetable that the same functions keep up to date.
 """
+import asyncio
 import logging
-from typing import Optional
+from typing import Dict, List, Optional
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 
 from aiogram import Bot
 
+from config import SCHEDULER_MODE
+from bot.database.models import Schedule
 from bot.scheduler.posting import post_scheduled_content
+from bot.scheduler.timetable import Timetable, latest_slot, now_local
+from bot.services import schedule_service
 
 logger = logging.getLogger(__name__)
 
 _scheduler: Optional[AsyncIOScheduler] = None
+# Dispatcher mode only: None while the scheduler runs one cron job per schedule
+_timetable: Optional[Timetable] = None
+
+DISPATCHER_JOB_ID = "post_dispatcher"
 
 
 def set_scheduler(scheduler: AsyncIOScheduler) -> None:
@@ -27,13 +38,66 @@ def get_scheduler() -> Optional[AsyncIOScheduler]:
     return _scheduler
 
 
+def get_timetable() -> Optional[Timetable]:
+    return _timetable
+
+
+def setup_dispatcher(
+    scheduler: AsyncIOScheduler,
+    bot: Bot,
+    bot_username: str,
+    schedules: List[Schedule],
+    schedule_contents: Dict[int, List[int]],
+) -> Timetable:
+    """Build the timetable from preloaded rows and register the single per-minute dispatcher job."""
+    global _timetable
+    timetable = Timetable()
+    for s in schedules:
+        if s.enabled:
+            timetable.set_schedule(s.id, s.time_str, schedule_contents.get(s.id, []))
+    _timetable = timetable
+
+    async def tick() -> None:
+        await _dispatch_due(bot, bot_username)
+
+    scheduler.add_job(
+        tick,
+        CronTrigger(second=0),
+        id=DISPATCHER_JOB_ID,
+        replace_existing=True,
+        coalesce=True,
+        misfire_grace_time=30,
+    )
+    logger.info("Dispatcher mode: %d schedule(s) in timetable", len(timetable))
+    return timetable
+
+
+async def _dispatch_due(bot: Bot, bot_username: str) -> None:
+    """Fire every schedule due at the current minute, with content ids taken from the timetable."""
+    if _timetable is None:
+        return
+    slot = now_local().replace(second=0, microsecond=0)
+    due = _timetable.at(slot.hour * 60 + slot.minute)
+    if not due:
+        return
+    await asyncio.gather(*(
+        post_scheduled_content(bot, bot_username, sid, content_ids=cids, slot_at=slot)
+        for sid, cids in due.items()
+    ))
+
+
 def add_schedule_job(
     bot: Bot,
     bot_username: str,
     schedule_id: int,
     time_str: str,
 ) -> bool:
-    """Add a cron job for the given schedule. Returns True if added."""
+    """Add a cron job (or timetable entry) for the given schedule. Returns True if added."""
+    if _timetable is not None:
+        # Keep content already known for this schedule (refresh_schedule may have run first)
+        _timetable.set_schedule(schedule_id, time_str, _timetable.content_ids(schedule_id))
+        logger.info("Added timetable entry for schedule_id=%s at %s", schedule_id, time_str)
+        return True
     s = get_scheduler()
     if not s:
         logger.warning("Scheduler not registered, cannot add job for schedule_id=%s", schedule_id)
@@ -42,8 +106,8 @@ def add_schedule_job(
         parts = time_str.split(":")
         hour, minute = int(parts[0]), int(parts[1])
 
-        async def job(sid: int = schedule_id) -> None:
-            await post_scheduled_content(bot, bot_username, sid)
+        async def job(sid: int = schedule_id, t: str = time_str) -> None:
+            await post_scheduled_content(bot, bot_username, sid, slot_at=latest_slot(t))
 
         s.add_job(
             job,
@@ -59,7 +123,9 @@ def add_schedule_job(
 
 
 def remove_schedule_job(schedule_id: int) -> bool:
-    """Remove cron job for the given schedule_id. Returns True if removed."""
+    """Remove cron job (or timetable entry) for the given schedule_id. Returns True if removed."""
+    if _timetable is not None:
+        return _timetable.remove_schedule(schedule_id)
     s = get_scheduler()
     if not s:
         return False
@@ -70,3 +136,25 @@ def remove_schedule_job(schedule_id: int) -> bool:
     except Exception as e:
         logger.debug("No job to remove for schedule_id=%s: %s", schedule_id, e)
         return False
+
+
+async def refresh_schedule(schedule_id: int) -> None:
+    """Re-read one schedule and its posts into the timetable after they changed. No-op in cron mode."""
+    if _timetable is None:
+        return
+    schedule = await schedule_service.get_schedule_by_id(schedule_id)
+    if schedule is None or not schedule.enabled:
+        _timetable.remove_schedule(schedule_id)
+        return
+    content_ids = await schedule_service.get_content_ids_for_schedule(schedule_id)
+    _timetable.set_schedule(schedule_id, schedule.time_str, content_ids)
+
+
+def forget_content(content_id: int) -> None:
+    """Drop a deleted post from the timetable. No-op in cron mode."""
+    if _timetable is not None:
+        _timetable.remove_content(content_id)
+
+
+def is_dispatcher_mode() -> bool:
+    return SCHEDULER_MODE == "dispatcher"
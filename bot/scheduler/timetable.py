@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+In-memory posting timetable for dispatcher mode: minute of day -> schedule_id -> content_ids.
+Loaded once at startup and diff-updated when schedules or their posts change.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+from config import SCHEDULER_TIMEZONE
+
+SLOT_FORMAT = "%Y-%m-%d %H:%M"
+
+
+def minute_of_day(time_str: str) -> int:
+    """'HH:MM' -> 0..1439."""
+    parts = time_str.split(":")
+    return int(parts[0]) * 60 + int(parts[1])
+
+
+def now_local() -> datetime:
+    """Current time in the scheduler timezone."""
+    return datetime.now(ZoneInfo(SCHEDULER_TIMEZONE))
+
+
+def latest_slot(time_str: str, now: Optional[datetime] = None) -> datetime:
+    """Most recent occurrence of 'HH:MM' at or before now (scheduler timezone)."""
+    now = now or now_local()
+    minute = minute_of_day(time_str)
+    slot = now.replace(hour=minute // 60, minute=minute % 60, second=0, microsecond=0)
+    if slot > now:
+        slot -= timedelta(days=1)
+    return slot
+
+
+def slot_key(slot: datetime) -> str:
+    """Slot identity stored in schedule_runs."""
+    return slot.strftime(SLOT_FORMAT)
+
+
+class Timetable:
+    """Minute-indexed view of enabled schedules and the content attached to each."""
+
+    def __init__(self) -> None:
+        self._slots: Dict[int, Dict[int, List[int]]] = {}
+        self._minute_by_schedule: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._minute_by_schedule)
+
+    def set_schedule(self, schedule_id: int, time_str: str, content_ids: List[int]) -> None:
+        """Add or move a schedule and replace its content list."""
+        self.remove_schedule(schedule_id)
+        minute = minute_of_day(time_str)
+        self._slots.setdefault(minute, {})[schedule_id] = list(content_ids)
+        self._minute_by_schedule[schedule_id] = minute
+
+    def remove_schedule(self, schedule_id: int) -> bool:
+        minute = self._minute_by_schedule.pop(schedule_id, None)
+        if minute is None:
+            return False
+        slot = self._slots.get(minute, {})
+        slot.pop(schedule_id, None)
+        if not slot:
+            self._slots.pop(minute, None)
+        return True
+
+    def remove_content(self, content_id: int) -> None:
+        """Drop a deleted post from every schedule it was attached to."""
+        for slot in self._slots.values():
+            for schedule_id, content_ids in slot.items():
+                if content_id in content_ids:
+                    slot[schedule_id] = [cid for cid in content_ids if cid != content_id]
+
+    def content_ids(self, schedule_id: int) -> List[int]:
+        minute = self._minute_by_schedule.get(schedule_id)
+        if minute is None:
+            return []
+        return list(self._slots[minute][schedule_id])
+
+    def at(self, minute: int) -> Dict[int, List[int]]:
+        """Schedules due at this minute of day: {schedule_id: [content_id, ...]}."""
+        return {sid: list(cids) for sid, cids in self._slots.get(minute, {}).items()}
+
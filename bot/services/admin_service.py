@@ -1,15 +1,20 @@
 """
 Admin management: add/remove/list. Only owner can modify.
+is_admin is answered from an in-memory frozenset snapshot, so authorization needs no DB query.
 """
 import logging
 from datetime import datetime
-from typing import List, Optional
+from typing import FrozenSet, List, Optional
 
-from bot.database.connection import get_db
+from bot.database.connection import get_db, get_read_db
 from bot.database.models import Admin
+from bot.metrics import db_timed
 
 logger = logging.getLogger(__name__)
 
+# Admin telegram_ids; always replaced as a whole (never mutated), None until first load
+_admin_ids: Optional[FrozenSet[int]] = None
+
 
 def _row_to_admin(row) -> Admin:
     keys = row.keys()
@@ -23,13 +28,34 @@ def _row_to_admin(row) -> Admin:
     )
 
 
+@db_timed
+async def load_admin_cache() -> FrozenSet[int]:
+    """Load all admin ids into the in-memory snapshot. Call once at startup."""
+    global _admin_ids
+    conn = get_read_db()
+    async with conn.execute("SELECT telegram_id FROM admins") as cur:
+        rows = await cur.fetchall()
+    _admin_ids = frozenset(row["telegram_id"] for row in rows)
+    logger.info("Admin cache loaded: %d admin(s)", len(_admin_ids))
+    return _admin_ids
+
+
 async def is_admin(telegram_id: int) -> bool:
-    conn = get_db()
-    async with conn.execute("SELECT 1 FROM admins WHERE telegram_id = ?", (telegram_id,)) as cur:
-        row = await cur.fetchone()
-    return row is not None
+    ids = _admin_ids
+    if ids is None:
+        ids = await load_admin_cache()
+    return telegram_id in ids
+
 
+async def get_admin_ids() -> FrozenSet[int]:
+    """All admin telegram_ids (from the in-memory snapshot)."""
+    ids = _admin_ids
+    if ids is None:
+        ids = await load_admin_cache()
+    return ids
 
+
+@db_timed
 async def add_admin(
     telegram_id: int,
     username: Optional[str] = None,
@@ -44,21 +70,26 @@ async def add_admin(
             (telegram_id, username or "", first_name or "", last_name or ""),
         )
         await conn.commit()
-        return True
     except Exception:
         await conn.rollback()
         return False
+    # After the commit: a failed reload must not report the committed row as not added
+    await load_admin_cache()
+    return True
 
 
+@db_timed
 async def remove_admin(telegram_id: int) -> bool:
     conn = get_db()
     cur = await conn.execute("DELETE FROM admins WHERE telegram_id = ?", (telegram_id,))
     await conn.commit()
+    await load_admin_cache()
     return cur.rowcount > 0
 
 
+@db_timed
 async def list_admins() -> List[Admin]:
-    conn = get_db()
+    conn = get_read_db()
     async with conn.execute("SELECT * FROM admins ORDER BY added_at") as cur:
         rows = await cur.fetchall()
     return [_row_to_admin(r) for r in rows]
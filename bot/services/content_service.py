@@ -3,10 +3,12 @@ Content CRUD: save photo/video/text, set active, list history, delete (soft).
 """
 import logging
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
-from bot.database.connection import get_db
+from bot.database.connection import ARCHIVE_SCHEMA, archive_attached, get_db, get_read_db
+from bot.database.write_buffer import write_buffer
 from bot.database.models import Content, ContentType, ContentStatus
+from bot.metrics import db_timed
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +27,7 @@ def _row_to_content(row) -> Content:
     )
 
 
+@db_timed
 async def add_content(
     content_type: ContentType,
     created_by: int,
@@ -46,16 +49,32 @@ async def add_content(
     return _row_to_content(row)
 
 
+@db_timed
 async def get_content_by_id(content_id: int) -> Optional[Content]:
-    conn = get_db()
+    conn = get_read_db()
     async with conn.execute("SELECT * FROM content WHERE id = ?", (content_id,)) as cur:
         row = await cur.fetchone()
     return _row_to_content(row) if row else None
 
 
+@db_timed
+async def get_contents_by_ids(content_ids: List[int]) -> Dict[int, Content]:
+    """Return {content_id: Content} for all existing ids in one query."""
+    if not content_ids:
+        return {}
+    conn = get_read_db()
+    placeholders = ",".join("?" * len(content_ids))
+    async with conn.execute(
+        f"SELECT * FROM content WHERE id IN ({placeholders})", content_ids
+    ) as cur:
+        rows = await cur.fetchall()
+    return {row["id"]: _row_to_content(row) for row in rows}
+
+
+@db_timed
 async def list_content(limit: int = 50, include_deleted: bool = False) -> List[Content]:
     """List content by created_at DESC."""
-    conn = get_db()
+    conn = get_read_db()
     if include_deleted:
         async with conn.execute(
             "SELECT * FROM content ORDER BY created_at DESC LIMIT ?", (limit,)
@@ -70,20 +89,69 @@ async def list_content(limit: int = 50, include_deleted: bool = False) -> List[C
     return [_row_to_content(r) for r in rows]
 
 
+# content.created_at is SQLite CURRENT_TIMESTAMP text; keyset cursors compare against it as text
+_CREATED_AT_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+@db_timed
+async def list_content_page(
+    limit: int,
+    after: Optional[Tuple[datetime, int]] = None,
+    before: Optional[Tuple[datetime, int]] = None,
+) -> Tuple[List[Content], bool]:
+    """
+    One page of active content, newest first, keyset-paginated on (created_at, id).
+    after: cursor of the last row already shown (next page); before: first row shown (previous page).
+    Returns (items, has_more) where has_more refers to the direction that was requested.
+    """
+    conn = get_read_db()
+    if before is not None:
+        created_at, cid = before
+        where, order = "AND (created_at, id) > (?, ?)", "ASC"
+        params: tuple = (created_at.strftime(_CREATED_AT_FORMAT), cid, limit + 1)
+    elif after is not None:
+        created_at, cid = after
+        where, order = "AND (created_at, id) < (?, ?)", "DESC"
+        params = (created_at.strftime(_CREATED_AT_FORMAT), cid, limit + 1)
+    else:
+        where, order = "", "DESC"
+        params = (limit + 1,)
+    # The keyset scan reads only idx_content_status_created (covering: status, created_at, id);
+    # the table is read just for the rows of the page
+    sql = f"""SELECT c.* FROM (
+                  SELECT id FROM content WHERE status = 'active' {where}
+                  ORDER BY created_at {order}, id {order} LIMIT ?
+              ) AS page JOIN content AS c ON c.id = page.id
+              ORDER BY c.created_at {order}, c.id {order}"""
+    async with conn.execute(sql, params) as cur:
+        rows = await cur.fetchall()
+    has_more = len(rows) > limit
+    items = [_row_to_content(r) for r in rows[:limit]]
+    if before is not None:
+        items.reverse()
+    return items, has_more
+
+
+@db_timed
 async def delete_content(content_id: int) -> bool:
-    """Hard-delete: remove from DB (content_schedule, posts_log, content). Returns True if content existed and was deleted."""
+    """Hard-delete: remove from DB (content_schedule, posts_log and its archive, posts_daily, content). Returns True if content existed and was deleted."""
     conn = get_db()
     async with conn.execute("SELECT id FROM content WHERE id = ?", (content_id,)) as cur:
         row = await cur.fetchone()
     if not row:
         return False
+    await write_buffer.flush()
     await conn.execute("DELETE FROM content_schedule WHERE content_id = ?", (content_id,))
     await conn.execute("DELETE FROM posts_log WHERE content_id = ?", (content_id,))
+    if archive_attached():
+        await conn.execute(f"DELETE FROM {ARCHIVE_SCHEMA}.posts_log WHERE content_id = ?", (content_id,))
+    await conn.execute("DELETE FROM posts_daily WHERE content_id = ?", (content_id,))
     await conn.execute("DELETE FROM content WHERE id = ?", (content_id,))
     await conn.commit()
     return True
 
 
+@db_timed
 async def set_content_publishing_enabled(content_id: int, enabled: bool) -> bool:
     """Turn publishing on/off for this post (at its scheduled times). Returns True if updated."""
     conn = get_db()
@@ -95,57 +163,84 @@ async def set_content_publishing_enabled(content_id: int, enabled: bool) -> bool
     return cur.rowcount > 0
 
 
+@db_timed
 async def get_last_posted_at_map(content_ids: List[int]) -> dict:
-    """Return {content_id: posted_at} for each content that has at least one post in posts_log."""
+    """
+    Return {content_id: posted_at} for each content that was posted at least once.
+    Reads content.last_posted_at (kept by a trigger on posts_log inserts), so archived history counts too.
+    """
     if not content_ids:
         return {}
-    conn = get_db()
+    await write_buffer.flush()
+    conn = get_read_db()
     placeholders = ",".join("?" * len(content_ids))
     async with conn.execute(
-        f"""SELECT content_id, MAX(posted_at) AS last_posted
-            FROM posts_log WHERE content_id IN ({placeholders}) GROUP BY content_id""",
+        f"""SELECT id, last_posted_at FROM content
+            WHERE id IN ({placeholders}) AND last_posted_at IS NOT NULL""",
         content_ids,
     ) as cur:
         rows = await cur.fetchall()
     result = {}
     for row in rows:
-        raw = row["last_posted"]
+        raw = row["last_posted_at"]
         if isinstance(raw, str):
             try:
-                result[row["content_id"]] = datetime.fromisoformat(raw.replace(" ", "T", 1))
+                result[row["id"]] = datetime.fromisoformat(raw.replace(" ", "T", 1))
             except ValueError:
                 try:
-                    result[row["content_id"]] = datetime.strptime(raw, "%Y-%m-%d %H:%M:%S")
+                    result[row["id"]] = datetime.strptime(raw, "%Y-%m-%d %H:%M:%S")
                 except ValueError:
-                    result[row["content_id"]] = raw
+                    result[row["id"]] = raw
         else:
-            result[row["content_id"]] = raw
+            result[row["id"]] = raw
     return result
 
 
+@db_timed
+async def get_posted_since(posted_at_utc: str) -> Dict[int, str]:
+    """{content_id: last posted_at} for posts_log rows at or after posted_at_utc ('YYYY-MM-DD HH:MM:SS', UTC)."""
+    await write_buffer.flush()
+    conn = get_read_db()
+    async with conn.execute(
+        """SELECT content_id, MAX(posted_at) AS last_posted
+           FROM posts_log WHERE posted_at >= ? GROUP BY content_id""",
+        (posted_at_utc,),
+    ) as cur:
+        rows = await cur.fetchall()
+    return {row["content_id"]: row["last_posted"] for row in rows}
+
+
 async def log_post(content_id: int, group_id: int, message_id: int) -> None:
-    """Append to posts_log."""
-    conn = get_db()
-    await conn.execute(
+    """Append to posts_log (buffered; committed with the next write-behind flush)."""
+    await write_buffer.add(
         "INSERT INTO posts_log (content_id, group_id, message_id) VALUES (?, ?, ?)",
         (content_id, group_id, message_id),
     )
-    await conn.commit()
+
+
+async def log_posts(rows: List[Tuple[int, int, int]]) -> None:
+    """Append many (content_id, group_id, message_id) rows to posts_log in one transaction."""
+    if not rows:
+        return
+    await write_buffer.add_many(
+        "INSERT INTO posts_log (content_id, group_id, message_id) VALUES (?, ?, ?)",
+        rows,
+    )
 
 
 async def save_admin_message(content_id: int, admin_uid: int, chat_id: int, message_id: int) -> None:
-    """Admin chatida yuborilgan post xabarini DB ga saqlash."""
-    conn = get_db()
-    await conn.execute(
+    """Admin chatida yuborilgan post xabarini DB ga saqlash (buferlanadi, keyingi flush'da yoziladi)."""
+    await write_buffer.add(
         "INSERT INTO content_admin_messages (content_id, admin_uid, chat_id, message_id) VALUES (?, ?, ?, ?)",
         (content_id, admin_uid, chat_id, message_id),
     )
-    await conn.commit()
 
 
+@db_timed
 async def get_admin_messages(content_id: int) -> list:
     """Berilgan content uchun barcha admin chat xabarlarini qaytarish: [(chat_id, message_id), ...]."""
-    conn = get_db()
+    await write_buffer.flush()
+    conn = get_read_db()
     async with conn.execute(
         "SELECT chat_id, message_id FROM content_admin_messages WHERE content_id = ?",
         (content_id,),
@@ -154,8 +249,43 @@ async def get_admin_messages(content_id: int) -> list:
     return [(row["chat_id"], row["message_id"]) for row in rows]
 
 
+@db_timed
+async def get_admin_messages_for_admin(admin_uid: int) -> List[Tuple[int, int]]:
+    """Shu admin uchun yuborilgan barcha post xabarlari bitta so'rovda: [(chat_id, message_id), ...]."""
+    await write_buffer.flush()
+    conn = get_read_db()
+    async with conn.execute(
+        "SELECT chat_id, message_id FROM content_admin_messages WHERE admin_uid = ?",
+        (admin_uid,),
+    ) as cur:
+        rows = await cur.fetchall()
+    return [(row["chat_id"], row["message_id"]) for row in rows]
+
+
+@db_timed
+async def replace_admin_messages(admin_uid: int, rows: List[Tuple[int, int, int]]) -> None:
+    """
+    Shu adminning barcha eski xabar yozuvlarini yangilari bilan almashtirish — bitta tranzaksiyada.
+    rows: [(content_id, chat_id, message_id), ...]
+    """
+    await write_buffer.flush()
+    conn = get_db()
+    try:
+        await conn.execute("DELETE FROM content_admin_messages WHERE admin_uid = ?", (admin_uid,))
+        await conn.executemany(
+            "INSERT INTO content_admin_messages (content_id, admin_uid, chat_id, message_id) VALUES (?, ?, ?, ?)",
+            [(content_id, admin_uid, chat_id, message_id) for content_id, chat_id, message_id in rows],
+        )
+        await conn.commit()
+    except Exception:
+        await conn.rollback()
+        raise
+
+
+@db_timed
 async def delete_admin_messages(content_id: int) -> None:
     """Berilgan content ga tegishli barcha admin xabar yozuvlarini o'chirish."""
+    await write_buffer.flush()
     conn = get_db()
     await conn.execute("DELETE FROM content_admin_messages WHERE content_id = ?", (content_id,))
     await conn.commit()
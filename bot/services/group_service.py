@@ -0,0 +1,76 @@
+"""
+Target groups: every group/channel that scheduled posts are published to.
+The legacy settings.target_group_id stays the main group; target_groups adds more.
+"""
+import logging
+from datetime import datetime
+from typing import List, Optional
+
+from bot.database.connection import get_db, get_read_db
+from bot.database.models import TargetGroup
+from bot.services import settings_service
+from bot.metrics import db_timed
+
+logger = logging.getLogger(__name__)
+
+
+def _row_to_target_group(row) -> TargetGroup:
+    return TargetGroup(
+        id=row["id"],
+        chat_id=row["chat_id"],
+        title=row["title"],
+        enabled=bool(row["enabled"]),
+        added_at=datetime.fromisoformat(row["added_at"]) if isinstance(row["added_at"], str) else row["added_at"],
+    )
+
+
+@db_timed
+async def list_target_groups() -> List[TargetGroup]:
+    conn = get_read_db()
+    async with conn.execute("SELECT * FROM target_groups ORDER BY added_at") as cur:
+        rows = await cur.fetchall()
+    return [_row_to_target_group(r) for r in rows]
+
+
+@db_timed
+async def list_target_group_ids() -> List[int]:
+    """Main group (settings) first, then enabled extra groups; no duplicates."""
+    ids: List[int] = []
+    main_group_id = await settings_service.get_target_group_id()
+    if main_group_id:
+        ids.append(main_group_id)
+    conn = get_read_db()
+    async with conn.execute(
+        "SELECT chat_id FROM target_groups WHERE enabled = 1 ORDER BY added_at"
+    ) as cur:
+        rows = await cur.fetchall()
+    for row in rows:
+        if row["chat_id"] not in ids:
+            ids.append(row["chat_id"])
+    return ids
+
+
+@db_timed
+async def add_target_group(chat_id: int, title: Optional[str] = None) -> bool:
+    """Add (or re-enable) an extra target group. False on DB error."""
+    conn = get_db()
+    try:
+        await conn.execute(
+            """INSERT INTO target_groups (chat_id, title, enabled) VALUES (?, ?, 1)
+               ON CONFLICT(chat_id) DO UPDATE SET enabled = 1, title = COALESCE(?, title)""",
+            (chat_id, title, title),
+        )
+        await conn.commit()
+        return True
+    except Exception as e:
+        await conn.rollback()
+        logger.exception("add_target_group xatosi: chat_id=%s: %s", chat_id, e)
+        return False
+
+
+@db_timed
+async def remove_target_group(chat_id: int) -> bool:
+    conn = get_db()
+    cur = await conn.execute("DELETE FROM target_groups WHERE chat_id = ?", (chat_id,))
+    await conn.commit()
+    return cur.rowcount > 0
@@ -0,0 +1,145 @@
+"""
+Leads: messages from ordinary users, kept until an admin takes and answers them.
+Per-user intake is limited in memory (LEAD_RATE_LIMIT_PER_HOUR, sliding window) before anything
+touches the database. Admins claim a lead with one conditional UPDATE, so exactly one of them wins.
+"""
+import logging
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from config import LEAD_RATE_LIMIT_PER_HOUR
+from bot.database.connection import get_db, get_read_db
+from bot.database.models import Lead
+from bot.ratelimit import SlidingWindowLimiter
+from bot.metrics import db_timed
+
+logger = logging.getLogger(__name__)
+
+# Leads accepted per user per hour
+lead_limiter = SlidingWindowLimiter(LEAD_RATE_LIMIT_PER_HOUR, 3600)
+# One "too many messages" reply per user per hour, so the reply itself cannot be used for spam
+_limit_notice_limiter = SlidingWindowLimiter(1, 3600)
+
+# take_lead counters: claims won/lost and time spent in the claim UPDATE
+claim_stats = {"taken": 0, "lost": 0, "claim_seconds_total": 0.0, "claim_seconds_max": 0.0}
+
+
+def _parse_ts(value) -> Optional[datetime]:
+    if value is None:
+        return None
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _row_to_lead(row) -> Lead:
+    return Lead(
+        id=row["id"],
+        user_id=row["user_id"],
+        telegram_user_id=row["telegram_user_id"],
+        message_text=row["message_text"],
+        source_content_id=row["source_content_id"],
+        phone_number=row["phone_number"],
+        status=row["status"],
+        taken_by_telegram_id=row["taken_by_telegram_id"],
+        answered=bool(row["answered"]),
+        created_at=_parse_ts(row["created_at"]),
+        answered_at=_parse_ts(row["answered_at"]),
+    )
+
+
+def allow_lead(telegram_user_id: int) -> bool:
+    """Count one incoming message against the user's hourly budget. False = drop it. 0 = no limit."""
+    if LEAD_RATE_LIMIT_PER_HOUR <= 0:
+        return True
+    return lead_limiter.hit(telegram_user_id)
+
+
+def should_send_limit_notice(telegram_user_id: int) -> bool:
+    return _limit_notice_limiter.hit(telegram_user_id)
+
+
+@db_timed
+async def create_lead(
+    user_id: int,
+    telegram_user_id: int,
+    message_text: str,
+    source_content_id: Optional[int] = None,
+    phone_number: Optional[str] = None,
+) -> int:
+    """Store a new pending lead. Returns its id."""
+    conn = get_db()
+    cur = await conn.execute(
+        """INSERT INTO leads (user_id, telegram_user_id, message_text, source_content_id, phone_number)
+           VALUES (?, ?, ?, ?, ?)""",
+        (user_id, telegram_user_id, message_text, source_content_id, phone_number),
+    )
+    lead_id = cur.lastrowid
+    await conn.commit()
+    return lead_id
+
+
+@db_timed
+async def get_lead(lead_id: int) -> Optional[Lead]:
+    conn = get_read_db()
+    async with conn.execute("SELECT * FROM leads WHERE id = ?", (lead_id,)) as cur:
+        row = await cur.fetchone()
+    return _row_to_lead(row) if row else None
+
+
+@db_timed
+async def list_pending_leads(limit: int = 20) -> List[Lead]:
+    """Oldest pending (not taken) leads first; served by idx_leads_status_answered (id is the rowid)."""
+    conn = get_read_db()
+    async with conn.execute(
+        "SELECT * FROM leads WHERE status = 'pending' AND answered = 0 ORDER BY id LIMIT ?",
+        (limit,),
+    ) as cur:
+        rows = await cur.fetchall()
+    return [_row_to_lead(r) for r in rows]
+
+
+@db_timed
+async def count_pending_leads() -> int:
+    conn = get_read_db()
+    async with conn.execute(
+        "SELECT COUNT(*) AS n FROM leads WHERE status = 'pending' AND answered = 0"
+    ) as cur:
+        row = await cur.fetchone()
+    return row["n"]
+
+
+@db_timed
+async def take_lead(lead_id: int, admin_telegram_id: int) -> bool:
+    """
+    Claim a pending lead for this admin. Only the first caller gets True: the UPDATE matches
+    the row only while it is still pending.
+    """
+    started = time.monotonic()
+    conn = get_db()
+    cur = await conn.execute(
+        "UPDATE leads SET status = 'taken', taken_by_telegram_id = ? WHERE id = ? AND status = 'pending'",
+        (admin_telegram_id, lead_id),
+    )
+    await conn.commit()
+    elapsed = time.monotonic() - started
+    won = cur.rowcount == 1
+    claim_stats["taken" if won else "lost"] += 1
+    claim_stats["claim_seconds_total"] += elapsed
+    claim_stats["claim_seconds_max"] = max(claim_stats["claim_seconds_max"], elapsed)
+    logger.info(
+        "Lead %s claim by %s: %s in %.1fms", lead_id, admin_telegram_id, "won" if won else "lost", elapsed * 1000
+    )
+    return won
+
+
+@db_timed
+async def mark_answered(lead_id: int, admin_telegram_id: int) -> bool:
+    """Mark a lead answered; only the admin who took it can. False if not theirs or already answered."""
+    conn = get_db()
+    cur = await conn.execute(
+        """UPDATE leads SET answered = 1, answered_at = CURRENT_TIMESTAMP
+           WHERE id = ? AND taken_by_telegram_id = ? AND answered = 0""",
+        (lead_id, admin_telegram_id),
+    )
+    await conn.commit()
+    return cur.rowcount == 1
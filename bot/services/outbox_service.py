@@ -0,0 +1,140 @@
+"""
+Outbox: durable queue of scheduled sends (content_id -> chat_id).
+Rows are claimed atomically (pending -> sending in one UPDATE ... RETURNING), then marked sent,
+rescheduled with backoff, or failed. Rows left in 'sending' by a crash are requeued on startup.
+"""
+import logging
+import time
+from typing import List, Optional, Sequence, Tuple
+
+from bot.database.connection import get_db, get_read_db
+from bot.database.models import OutboxItem
+from bot.metrics import db_timed
+
+logger = logging.getLogger(__name__)
+
+
+def _row_to_item(row) -> OutboxItem:
+    return OutboxItem(
+        id=row["id"],
+        content_id=row["content_id"],
+        chat_id=row["chat_id"],
+        schedule_id=row["schedule_id"],
+        slot_at=row["slot_at"],
+        status=row["status"],
+        attempts=row["attempts"],
+        next_attempt_at=row["next_attempt_at"],
+        message_id=row["message_id"],
+        last_error=row["last_error"],
+    )
+
+
+@db_timed
+async def enqueue(
+    sends: Sequence[Tuple[int, int]],
+    schedule_id: Optional[int] = None,
+    slot_at: Optional[str] = None,
+    attempts: int = 0,
+    delay: float = 0.0,
+) -> int:
+    """
+    Queue (content_id, chat_id) sends in one transaction. A send already queued for the same slot is skipped.
+    Returns how many rows were added.
+    """
+    if not sends:
+        return 0
+    due = time.time() + delay
+    conn = get_db()
+    try:
+        before = conn.total_changes
+        await conn.executemany(
+            """INSERT OR IGNORE INTO outbox (content_id, chat_id, schedule_id, slot_at, attempts, next_attempt_at)
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            [(content_id, chat_id, schedule_id, slot_at, attempts, due) for content_id, chat_id in sends],
+        )
+        await conn.commit()
+        return conn.total_changes - before
+    except Exception:
+        await conn.rollback()
+        raise
+
+
+@db_timed
+async def claim_due(limit: int) -> List[OutboxItem]:
+    """Atomically move up to `limit` due pending rows to 'sending' and return them (oldest first)."""
+    conn = get_db()
+    # execute_fetchall steps the RETURNING statement to completion in one call, so no other task's
+    # commit on the shared writer can land while it is still open
+    rows = await conn.execute_fetchall(
+        """UPDATE outbox SET status = 'sending', attempts = attempts + 1, updated_at = CURRENT_TIMESTAMP
+           WHERE id IN (
+               SELECT id FROM outbox WHERE status = 'pending' AND next_attempt_at <= ?
+               ORDER BY next_attempt_at, id LIMIT ?
+           )
+           RETURNING *""",
+        (time.time(), limit),
+    )
+    await conn.commit()
+    return sorted((_row_to_item(r) for r in rows), key=lambda item: item.id)
+
+
+@db_timed
+async def mark_sent(item_id: int, message_id: int) -> None:
+    conn = get_db()
+    await conn.execute(
+        "UPDATE outbox SET status = 'sent', message_id = ?, last_error = NULL, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+        (message_id, item_id),
+    )
+    await conn.commit()
+
+
+@db_timed
+async def mark_retry(item_id: int, error: str, delay: float) -> None:
+    """Back to 'pending', due again after `delay` seconds."""
+    conn = get_db()
+    await conn.execute(
+        """UPDATE outbox SET status = 'pending', next_attempt_at = ?, last_error = ?, updated_at = CURRENT_TIMESTAMP
+           WHERE id = ?""",
+        (time.time() + delay, error[:500], item_id),
+    )
+    await conn.commit()
+
+
+@db_timed
+async def mark_failed(item_id: int, error: str) -> None:
+    conn = get_db()
+    await conn.execute(
+        "UPDATE outbox SET status = 'failed', last_error = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+        (error[:500], item_id),
+    )
+    await conn.commit()
+
+
+@db_timed
+async def requeue_inflight() -> int:
+    """Startup: rows still 'sending' belong to a process that died mid-send; make them pending again."""
+    conn = get_db()
+    cur = await conn.execute(
+        "UPDATE outbox SET status = 'pending', updated_at = CURRENT_TIMESTAMP WHERE status = 'sending'"
+    )
+    await conn.commit()
+    return cur.rowcount
+
+
+@db_timed
+async def next_due_at() -> Optional[float]:
+    """Unix time of the earliest pending row, or None if nothing is pending."""
+    conn = get_read_db()
+    async with conn.execute(
+        "SELECT MIN(next_attempt_at) AS due FROM outbox WHERE status = 'pending'"
+    ) as cur:
+        row = await cur.fetchone()
+    return row["due"] if row else None
+
+
+@db_timed
+async def count_by_status() -> dict:
+    conn = get_read_db()
+    async with conn.execute("SELECT status, COUNT(*) AS n FROM outbox GROUP BY status") as cur:
+        rows = await cur.fetchall()
+    return {row["status"]: row["n"] for row in rows}
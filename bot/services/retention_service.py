@@ -0,0 +1,169 @@
+"""
+posts_log retention: new rows are rolled up incrementally into posts_daily (per SCHEDULER_TIMEZONE day,
+post and group, from a watermark id), and rolled-up rows older than POSTS_LOG_RETENTION_DAYS are moved to
+the archive database. Both work in batches of RETENTION_BATCH_ROWS. Each batch runs in one step on the
+writer's thread (run_on_writer) inside a savepoint, so the posts_daily upsert and its watermark, or the
+archive copy and its DELETE, are kept or undone together — another coroutine's rollback cannot land
+between them.
+"""
+import asyncio
+import logging
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional
+from zoneinfo import ZoneInfo
+
+from config import POSTS_LOG_RETENTION_DAYS, RETENTION_BATCH_ROWS, SCHEDULER_TIMEZONE
+from bot.database.connection import ARCHIVE_SCHEMA, archive_attached, run_on_writer
+from bot.database.write_buffer import write_buffer
+from bot.metrics import db_timed
+
+logger = logging.getLogger(__name__)
+
+_ROLLUP_KEY = "rollup_last_id"
+_SAVEPOINT = "retention"
+_TZ = ZoneInfo(SCHEDULER_TIMEZONE)
+
+_stats: Dict[str, float] = {"rolled_up": 0, "archived": 0, "last_run_seconds": 0.0}
+
+
+def _local_day(posted_at: Optional[str]) -> Optional[str]:
+    """SQL local_day(posted_at): the SCHEDULER_TIMEZONE date of a naive-UTC CURRENT_TIMESTAMP."""
+    if posted_at is None:
+        return None
+    return datetime.fromisoformat(posted_at).replace(tzinfo=timezone.utc).astimezone(_TZ).date().isoformat()
+
+
+def _get_watermark(db: sqlite3.Connection, key: str) -> int:
+    row = db.execute("SELECT value FROM retention_state WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else 0
+
+
+def _in_savepoint(db: sqlite3.Connection, batch: Callable[..., int], *args) -> int:
+    """Run batch(db, *args) in a savepoint; commit only a transaction opened here (as the write buffer does)."""
+    opened = not db.in_transaction
+    db.execute(f"SAVEPOINT {_SAVEPOINT}")
+    try:
+        n = batch(db, *args)
+        db.execute(f"RELEASE {_SAVEPOINT}")
+    except BaseException:
+        db.execute(f"ROLLBACK TO {_SAVEPOINT}")
+        db.execute(f"RELEASE {_SAVEPOINT}")
+        raise
+    if opened:
+        db.commit()
+    return n
+
+
+def _rollup_batch(db: sqlite3.Connection, batch_rows: int) -> int:
+    last_id = _get_watermark(db, _ROLLUP_KEY)
+    upto, n = db.execute(
+        "SELECT MAX(id), COUNT(*) FROM (SELECT id FROM posts_log WHERE id > ? ORDER BY id LIMIT ?)",
+        (last_id, batch_rows),
+    ).fetchone()
+    if not n:
+        return 0
+    db.execute(
+        """INSERT INTO posts_daily (day, content_id, group_id, posts, first_posted_at, last_posted_at)
+           SELECT local_day(posted_at), content_id, group_id, COUNT(*), MIN(posted_at), MAX(posted_at)
+           FROM posts_log WHERE id > ? AND id <= ?
+           GROUP BY local_day(posted_at), content_id, group_id
+           ON CONFLICT (day, content_id, group_id) DO UPDATE SET
+               posts = posts + excluded.posts,
+               first_posted_at = MIN(first_posted_at, excluded.first_posted_at),
+               last_posted_at = MAX(last_posted_at, excluded.last_posted_at)""",
+        (last_id, upto),
+    )
+    db.execute(
+        """INSERT INTO retention_state (key, value) VALUES (?, ?)
+           ON CONFLICT (key) DO UPDATE SET value = excluded.value""",
+        (_ROLLUP_KEY, upto),
+    )
+    return n
+
+
+def _archive_batch(db: sqlite3.Connection, cutoff: str, batch_rows: int) -> int:
+    # Only rows already counted in posts_daily leave the main database
+    rolled_up_to = _get_watermark(db, _ROLLUP_KEY)
+    upto, n = db.execute(
+        """SELECT MAX(id), COUNT(*) FROM (
+               SELECT id FROM posts_log WHERE posted_at < ? AND id <= ? ORDER BY id LIMIT ?
+           )""",
+        (cutoff, rolled_up_to, batch_rows),
+    ).fetchone()
+    if not n:
+        return 0
+    params = (cutoff, upto)
+    db.execute(
+        f"""INSERT OR IGNORE INTO {ARCHIVE_SCHEMA}.posts_log (id, content_id, group_id, message_id, posted_at)
+            SELECT id, content_id, group_id, message_id, posted_at FROM main.posts_log
+            WHERE posted_at < ? AND id <= ?""",
+        params,
+    )
+    db.execute("DELETE FROM main.posts_log WHERE posted_at < ? AND id <= ?", params)
+    return n
+
+
+def _register_functions(db: sqlite3.Connection) -> None:
+    db.create_function("local_day", 1, _local_day, deterministic=True)
+
+
+@db_timed
+async def rollup_posts_log(batch_rows: int = RETENTION_BATCH_ROWS) -> int:
+    """Add posts_log rows after the watermark to posts_daily. Returns how many rows were counted."""
+    await write_buffer.flush()
+    await run_on_writer(_register_functions)
+    total = 0
+    while True:
+        n = await run_on_writer(_in_savepoint, _rollup_batch, batch_rows)
+        if not n:
+            break
+        total += n
+        # Other writers get the connection between batches
+        await asyncio.sleep(0)
+    return total
+
+
+@db_timed
+async def archive_posts_log(
+    older_than_days: int = POSTS_LOG_RETENTION_DAYS, batch_rows: int = RETENTION_BATCH_ROWS
+) -> int:
+    """Move rolled-up posts_log rows older than older_than_days to the archive. Returns rows moved."""
+    if older_than_days <= 0 or not archive_attached():
+        return 0
+    # posted_at is SQLite CURRENT_TIMESTAMP: naive UTC text, so the cutoff is formatted the same way
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=older_than_days)).strftime("%Y-%m-%d %H:%M:%S")
+    total = 0
+    while True:
+        n = await run_on_writer(_in_savepoint, _archive_batch, cutoff, batch_rows)
+        if not n:
+            break
+        total += n
+        await asyncio.sleep(0)
+    return total
+
+
+async def run_retention() -> Dict[str, int]:
+    """Scheduled job: roll up, then archive. Errors are logged; the next run continues from the watermark."""
+    started = time.monotonic()
+    result = {"rolled_up": 0, "archived": 0}
+    try:
+        result["rolled_up"] = await rollup_posts_log()
+        result["archived"] = await archive_posts_log()
+    except Exception as e:
+        logger.exception("posts_log retention failed: %s", e)
+    elapsed = time.monotonic() - started
+    _stats["rolled_up"] += result["rolled_up"]
+    _stats["archived"] += result["archived"]
+    _stats["last_run_seconds"] = elapsed
+    if result["rolled_up"] or result["archived"]:
+        logger.info(
+            "posts_log retention: %d row(s) rolled up, %d archived in %.2fs",
+            result["rolled_up"], result["archived"], elapsed,
+        )
+    return result
+
+
+def stats() -> Dict[str, float]:
+    return dict(_stats)
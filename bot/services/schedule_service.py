@@ -5,10 +5,11 @@ Post–time binding: which content_id posts at which schedule_id (content_schedu
 import logging
 import re
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional, Set, Tuple
 
-from bot.database.connection import get_db
-from bot.database.models import Schedule
+from bot.database.connection import get_db, get_read_db
+from bot.database.models import Schedule, SchedulePost, ScheduleSlot
+from bot.metrics import db_timed
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +34,7 @@ def parse_time(s: str) -> str | None:
     return None
 
 
+@db_timed
 async def add_schedule(time_str: str) -> Optional[int]:
     """Add a posting time. Returns new schedule id, or None if invalid."""
     normalized = parse_time(time_str)
@@ -52,12 +54,13 @@ async def add_schedule(time_str: str) -> Optional[int]:
         return None
 
 
+@db_timed
 async def get_schedule_id_by_time_str(time_str: str) -> Optional[int]:
     """Get schedule id by time string (e.g. 09:00). None if not found."""
     normalized = parse_time(time_str)
     if not normalized:
         return None
-    conn = get_db()
+    conn = get_read_db()
     async with conn.execute(
         "SELECT id FROM schedules WHERE time_str = ?", (normalized,)
     ) as cur:
@@ -65,6 +68,7 @@ async def get_schedule_id_by_time_str(time_str: str) -> Optional[int]:
     return row["id"] if row else None
 
 
+@db_timed
 async def remove_schedule(time_str: str) -> bool:
     """Remove a schedule by time string."""
     normalized = parse_time(time_str)
@@ -76,8 +80,9 @@ async def remove_schedule(time_str: str) -> bool:
     return cur.rowcount > 0
 
 
+@db_timed
 async def list_schedules() -> List[Schedule]:
-    conn = get_db()
+    conn = get_read_db()
     async with conn.execute(
         "SELECT * FROM schedules ORDER BY time_str"
     ) as cur:
@@ -85,13 +90,15 @@ async def list_schedules() -> List[Schedule]:
     return [_row_to_schedule(r) for r in rows]
 
 
+@db_timed
 async def get_schedule_by_id(schedule_id: int) -> Optional[Schedule]:
-    conn = get_db()
+    conn = get_read_db()
     async with conn.execute("SELECT * FROM schedules WHERE id = ?", (schedule_id,)) as cur:
         row = await cur.fetchone()
     return _row_to_schedule(row) if row else None
 
 
+@db_timed
 async def set_schedule_enabled(time_str: str, enabled: bool) -> bool:
     normalized = parse_time(time_str)
     if not normalized:
@@ -105,9 +112,10 @@ async def set_schedule_enabled(time_str: str, enabled: bool) -> bool:
     return cur.rowcount > 0
 
 
+@db_timed
 async def get_content_ids_for_schedule(schedule_id: int) -> List[int]:
     """Shu vaqtga biriktirilgan barcha content_id larni qaytarish."""
-    conn = get_db()
+    conn = get_read_db()
     async with conn.execute(
         "SELECT content_id FROM content_schedule WHERE schedule_id = ?",
         (schedule_id,),
@@ -116,12 +124,59 @@ async def get_content_ids_for_schedule(schedule_id: int) -> List[int]:
     return [r["content_id"] for r in rows]
 
 
+@db_timed
+async def get_schedule_content_map() -> Dict[int, List[int]]:
+    """{schedule_id: [content_id, ...]} for all schedules, in one query (attach order kept)."""
+    conn = get_read_db()
+    async with conn.execute(
+        "SELECT schedule_id, content_id FROM content_schedule ORDER BY id"
+    ) as cur:
+        rows = await cur.fetchall()
+    result: Dict[int, List[int]] = {}
+    for r in rows:
+        result.setdefault(r["schedule_id"], []).append(r["content_id"])
+    return result
+
+
+@db_timed
+async def get_schedule_overview() -> List[ScheduleSlot]:
+    """
+    Barcha vaqtlar va ularga biriktirilgan aktiv postlar (preview bilan) — bitta JOIN so'rovida.
+    Post biriktirilmagan vaqtlar ham qaytadi (posts bo'sh).
+    """
+    conn = get_read_db()
+    async with conn.execute(
+        """SELECT s.id, s.time_str, s.enabled, s.created_at,
+                  c.id AS content_id, c.content_type, c.publishing_enabled,
+                  substr(COALESCE(NULLIF(trim(c.caption), ''), NULLIF(trim(c.text), ''), '#' || c.id), 1, 100) AS preview
+           FROM schedules s
+           LEFT JOIN content_schedule cs ON cs.schedule_id = s.id
+           LEFT JOIN content c ON c.id = cs.content_id AND c.status = 'active'
+           ORDER BY s.time_str, s.id, cs.id"""
+    ) as cur:
+        rows = await cur.fetchall()
+    slots: Dict[int, ScheduleSlot] = {}
+    for r in rows:
+        slot = slots.get(r["id"])
+        if slot is None:
+            slot = slots[r["id"]] = ScheduleSlot(schedule=_row_to_schedule(r))
+        if r["content_id"] is not None:
+            slot.posts.append(SchedulePost(
+                content_id=r["content_id"],
+                content_type=r["content_type"],
+                preview=r["preview"],
+                publishing_enabled=bool(r["publishing_enabled"]),
+            ))
+    return list(slots.values())
+
+
 async def get_content_id_for_schedule(schedule_id: int) -> Optional[int]:
     """Birinchi biriktirilgan content_id (backward compat). None if none."""
     ids = await get_content_ids_for_schedule(schedule_id)
     return ids[0] if ids else None
 
 
+@db_timed
 async def add_schedule_content(schedule_id: int, content_id: int) -> bool:
     """Shu vaqtga yangi post biriktirish (ko'p post biriktirilishi mumkin)."""
     conn = get_db()
@@ -153,12 +208,40 @@ async def set_schedule_content(schedule_id: int, content_id: int) -> bool:
     return await add_schedule_content(schedule_id, content_id)
 
 
+@db_timed
 async def get_schedule_ids_for_content(content_id: int) -> List[int]:
     """Shu content biriktirilgan barcha schedule_id lar."""
-    conn = get_db()
+    conn = get_read_db()
     async with conn.execute(
         "SELECT schedule_id FROM content_schedule WHERE content_id = ?",
         (content_id,),
     ) as cur:
         rows = await cur.fetchall()
     return [r["schedule_id"] for r in rows]
+
+
+@db_timed
+async def claim_schedule_run(schedule_id: int, slot_at: str, replayed: bool = False) -> bool:
+    """
+    Record that a slot ('YYYY-MM-DD HH:MM', scheduler timezone) is being posted.
+    Returns False if that slot was already claimed, so a slot is never posted twice.
+    """
+    conn = get_db()
+    cur = await conn.execute(
+        "INSERT OR IGNORE INTO schedule_runs (schedule_id, slot_at, replayed) VALUES (?, ?, ?)",
+        (schedule_id, slot_at, 1 if replayed else 0),
+    )
+    await conn.commit()
+    return cur.rowcount > 0
+
+
+@db_timed
+async def get_claimed_slots(since_slot_at: str) -> Set[Tuple[int, str]]:
+    """{(schedule_id, slot_at)} claimed at or after since_slot_at."""
+    conn = get_read_db()
+    async with conn.execute(
+        "SELECT schedule_id, slot_at FROM schedule_runs WHERE slot_at >= ?",
+        (since_slot_at,),
+    ) as cur:
+        rows = await cur.fetchall()
+    return {(r["schedule_id"], r["slot_at"]) for r in rows}
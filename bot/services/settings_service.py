@@ -1,19 +1,32 @@
 """
 Settings key-value storage: target_group_id, posting_enabled, banner_file_id.
+All rows are cached in memory after the first read; set_setting refreshes the cache.
 """
+import asyncio
 import logging
-from typing import Optional
+import time
+from typing import Dict, Optional
 
-from bot.database.connection import get_db
+from config import SETTINGS_CACHE_TTL
+from bot.database.connection import get_db, get_read_db
 from bot.database.models import Setting
+from bot.metrics import db_timed
 
 logger = logging.getLogger(__name__)
 
 KEYS = {
     "target_group_id": "0",
+    "admin_group_id": "0",
     "banner_file_id": "",
 }
 
+# In-memory copy of the settings table: None until loaded (or after invalidate_cache)
+_cache: Optional[Dict[str, str]] = None
+_cache_loaded_at: float = 0.0
+_cache_lock = asyncio.Lock()
+_cache_hits = 0
+_cache_misses = 0
+
 
 def _row_to_setting(row) -> Setting:
     from datetime import datetime
@@ -25,17 +38,57 @@ def _row_to_setting(row) -> Setting:
     )
 
 
-async def get_setting(key: str) -> str:
-    """Get setting value; return default if not set."""
-    conn = get_db()
-    async with conn.execute("SELECT key, value FROM settings WHERE key = ?", (key,)) as cur:
-        row = await cur.fetchone()
-    default = KEYS.get(key, "")
-    return row["value"] if row else default
+def _cache_is_fresh() -> bool:
+    if _cache is None:
+        return False
+    return SETTINGS_CACHE_TTL <= 0 or time.monotonic() - _cache_loaded_at < SETTINGS_CACHE_TTL
+
+
+@db_timed
+async def _reload_cache() -> Dict[str, str]:
+    """Load the whole settings table into memory (one query)."""
+    global _cache, _cache_loaded_at
+    conn = get_read_db()
+    async with conn.execute("SELECT key, value FROM settings") as cur:
+        rows = await cur.fetchall()
+    _cache = {row["key"]: row["value"] for row in rows}
+    _cache_loaded_at = time.monotonic()
+    return _cache
 
 
+def invalidate_cache() -> None:
+    """Drop the cache; the next get_setting reloads it from DB."""
+    global _cache
+    _cache = None
+
+
+def get_cache_stats() -> dict:
+    """Hit/miss counters and size of the settings cache (for monitoring)."""
+    return {
+        "hits": _cache_hits,
+        "misses": _cache_misses,
+        "size": len(_cache) if _cache is not None else 0,
+        "age_seconds": time.monotonic() - _cache_loaded_at if _cache is not None else None,
+    }
+
+
+async def get_setting(key: str) -> str:
+    """Get setting value; return default if not set."""
+    global _cache_hits, _cache_misses
+    cache = _cache
+    if _cache_is_fresh():
+        _cache_hits += 1
+    else:
+        _cache_misses += 1
+        async with _cache_lock:
+            # Another caller may have reloaded while we waited for the lock
+            cache = _cache if _cache_is_fresh() else await _reload_cache()
+    return cache.get(key, KEYS.get(key, ""))
+
+
+@db_timed
 async def set_setting(key: str, value: str) -> None:
-    """Set or update a setting."""
+    """Set or update a setting (write-through: the cache is refreshed after commit)."""
     conn = get_db()
     await conn.execute(
         """INSERT INTO settings (key, value, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)
@@ -43,6 +96,9 @@ async def set_setting(key: str, value: str) -> None:
         (key, value, value),
     )
     await conn.commit()
+    async with _cache_lock:
+        invalidate_cache()
+        await _reload_cache()
 
 
 async def get_target_group_id() -> Optional[int]:
@@ -59,6 +115,20 @@ async def set_target_group_id(group_id: int) -> None:
     await set_setting("target_group_id", str(group_id))
 
 
+async def get_admin_group_id() -> Optional[int]:
+    """Group that new leads are posted to. None = send each lead to every admin privately."""
+    raw = await get_setting("admin_group_id")
+    try:
+        n = int(raw)
+        return n if n != 0 else None
+    except (TypeError, ValueError):
+        return None
+
+
+async def set_admin_group_id(group_id: int) -> None:
+    await set_setting("admin_group_id", str(group_id))
+
+
 async def get_banner_file_id() -> Optional[str]:
     raw = await get_setting("banner_file_id")
     return raw if raw else None
@@ -0,0 +1,69 @@
+"""
+Users: private-chat users who started the bot or wrote to it.
+Known users are looked up first (unique telegram_id index, read pool), so repeat /start and messages
+do not write to SQLite unless the profile or the deep-link source changed.
+"""
+import logging
+from datetime import datetime
+from typing import Optional
+
+from bot.database.connection import get_db, get_read_db
+from bot.database.models import User
+from bot.metrics import db_timed
+
+logger = logging.getLogger(__name__)
+
+def _row_to_user(row) -> User:
+    return User(
+        id=row["id"],
+        telegram_id=row["telegram_id"],
+        username=row["username"],
+        first_name=row["first_name"],
+        last_name=row["last_name"],
+        source_content_id=row["source_content_id"],
+        created_at=datetime.fromisoformat(row["created_at"]) if isinstance(row["created_at"], str) else row["created_at"],
+    )
+
+
+def parse_start_payload(payload: Optional[str]) -> Optional[int]:
+    """Deep-link payload -> content id. Accepts 'c123', 'post_123' or '123'; None otherwise."""
+    if not payload:
+        return None
+    digits = payload.strip().lower().removeprefix("post_").removeprefix("c")
+    return int(digits) if digits.isdigit() else None
+
+
+@db_timed
+async def upsert_user(
+    telegram_id: int,
+    username: Optional[str] = None,
+    first_name: Optional[str] = None,
+    last_name: Optional[str] = None,
+    source_content_id: Optional[int] = None,
+) -> User:
+    """
+    Insert or update the user and return it. source_content_id replaces the stored one only when given
+    (a plain /start keeps the last deep-link source).
+    """
+    async with get_read_db().execute("SELECT * FROM users WHERE telegram_id = ?", (telegram_id,)) as cur:
+        row = await cur.fetchone()
+    if row is not None:
+        known = _row_to_user(row)
+        if (known.username, known.first_name, known.last_name) == (username, first_name, last_name) and (
+            source_content_id is None or source_content_id == known.source_content_id
+        ):
+            return known
+    conn = get_db()
+    rows = await conn.execute_fetchall(
+        """INSERT INTO users (telegram_id, username, first_name, last_name, source_content_id)
+           VALUES (?, ?, ?, ?, ?)
+           ON CONFLICT(telegram_id) DO UPDATE SET
+               username = excluded.username,
+               first_name = excluded.first_name,
+               last_name = excluded.last_name,
+               source_content_id = COALESCE(excluded.source_content_id, users.source_content_id)
+           RETURNING *""",
+        (telegram_id, username, first_name, last_name, source_content_id),
+    )
+    await conn.commit()
+    return _row_to_user(rows[0])
@@ -8,9 +8,25 @@ WELCOME = (
     "Assalomu alaykum! Botimizga xush kelibsiz.\n\n"
     "Bu bot orqali mahsulot postlarini reja bo'yicha guruhga joylaysiz."
 )
-USER_SIMPLE_REPLY = (
-    "Mahsulot haqida bilmoqchi bo'lsangiz guruhimizda adminlar haqida ma'lumotlar orqali bog'laning !"
+LEAD_START_PROMPT = (
+    "Assalomu alaykum! Mahsulot bo'yicha savolingizni shu yerga yozing — adminlarimiz javob beradi."
 )
+BTN_CONTACT_ADMIN = "Admin bilan bog'lanish"
+LEAD_RECEIVED = "Xabaringiz qabul qilindi. Tez orada admin siz bilan bog'lanadi."
+LEAD_RATE_LIMITED = "Siz juda ko'p xabar yubordingiz. Iltimos, birozdan keyin qayta yozing."
+# Lead routing (admin tomoni)
+LEAD_NEW = "🆕 Lead #{lead_id}\n👤 {user}\n📌 Post: {source}\n\n{text}"
+LEAD_TAKEN_BY = "✋ Oldi: {admin}"
+LEAD_ANSWERED_MARK = "✅ Javob berildi"
+LEAD_TAKEN_OK = "Lead sizga biriktirildi. Foydalanuvchiga yozing, so'ng «Javob berildi» ni bosing."
+LEAD_ALREADY_TAKEN = "Bu leadni boshqa admin allaqachon olgan."
+LEAD_NOT_YOURS = "Bu lead sizga biriktirilmagan yoki allaqachon yopilgan."
+LEAD_CLOSED = "Lead yopildi."
+LEADS_PENDING_HEADER = "Kutilayotgan leadlar ({}):"
+LEADS_PENDING_EMPTY = "Kutilayotgan lead yo'q."
+ADMIN_GROUP_SET = "Leadlar shu guruhga yuboriladi."
+BTN_TAKE_LEAD = "✋ Leadni olish"
+BTN_LEAD_DONE = "✅ Javob berildi"
 POST_ADD_USE_BUTTON_HINT = "Post qo'shish uchun «Post qo'shish» yoki «Matnli post qo'shish» tugmasini bosing."
 BACK = "Orqaga"
 
@@ -19,7 +35,8 @@ HELP_HEADER = "Yordam"
 HELP_GUIDE = (
     "📌 Post qo'shish — «➕ Post qo'shish» tugmasi: rasm, video yoki matn yuboring, ixtiyoriy caption, «Yakunlash», "
     "so'ng nashr vaqtini (soat va minut) tanlang. «📝 Matnli post qo'shish» — faqat matn uchun alohida oqim.\n\n"
-    "📜 Postlar tarixi — oxirgi qo'shilgan postlar ro'yxati, har bir post ostida O'chirish tugmasi. Qo'shish/o'chirishda ro'yxat qayta yuborilmaydi.\n\n"
+    "📜 Postlar tarixi — oxirgi qo'shilgan postlar ro'yxati, har bir post ostida O'chirish tugmasi. Qo'shish/o'chirishda ro'yxat qayta yuborilmaydi. "
+    "Postlar ko'p bo'lsa ro'yxat sahifalab ko'rsatiladi (/posts).\n\n"
     "📢 Nashr guruhi — postlar yuboriladigan guruh. Sozlash: guruhda yoki shaxsiy chatda tegishli tugma/menyu orqali.\n\n"
     "👤 Adminlar — faqat egasi admin qo'shadi yoki olib tashlaydi (adminlar ro'yxati va tegishli tugmalar orqali)."
 )
@@ -32,6 +49,11 @@ TARGET_GROUP_PROMPT_ID = "Nashr guruhi ID sini kiriting (masalan -1001234567890)
 TARGET_GROUP_ID_RECEIVED = "ID qabul qilindi. Botni shu guruhga qo'shing va admin sifatida qo'ying. Keyin tasdiqlang."
 BTN_CONFIRM_TARGET_GROUP = "Guruhni belgilash"
 GROUP_ID_SHOULD_BE_NEGATIVE = "Guruh ID odatda manfiy bo'ladi (masalan -1001234567890). Iltimos, guruhda /set_target_group yuborib oling yoki to'g'ri manfiy ID kiriting."
+TARGET_GROUP_ADDED = "Qo'shimcha nashr guruhi qo'shildi: {}"
+TARGET_GROUP_REMOVED = "Nashr guruhi olib tashlandi: {}"
+TARGET_GROUP_NOT_FOUND = "Bunday qo'shimcha nashr guruhi topilmadi."
+TARGET_GROUPS_HEADER = "Nashr guruhlari:"
+TARGET_GROUPS_EMPTY = "Nashr guruhi sozlanmagan."
 CONTENT_SAVED = "Kontent saqlandi va aktiv post sifatida belgilandi."
 NO_ACTIVE_CONTENT = "Aktiv post yo'q. Avval kontent yuboring (rasm, video yoki matn)."
 # Post qo'shish oqimi
@@ -49,6 +71,11 @@ POST_ADD_PICK_TIME_MINUTE = "Minut tanlang"
 BTN_POST_CONFIRM = "✅ Yakunlash"
 BTN_POST_CANCEL = "❌ Bekor qilish"
 HISTORY_HEADER = "Postlar tarixi (oxirgi 10):"
+POSTS_PAGE_HEADER = "📜 Aktiv postlar:"
+POSTS_PAGE_EMPTY = "Aktiv postlar yo'q."
+POSTS_BROWSER_HINT = "Postlar ko'p — ro'yxat sahifalab ko'rsatiladi. Postni ko'rish uchun 👁 tugmasini bosing."
+BTN_PAGE_PREV = "◀️ Oldingi"
+BTN_PAGE_NEXT = "Keyingi ▶️"
 BTN_HISTORY_BACK = "◀️ Orqaga"
 POST_DELETED = "Post o'chirildi (endi nashr etilmaydi)."
 POST_NOT_FOUND = "Bunday post topilmadi yoki allaqachon o'chirilgan."
@@ -56,6 +83,7 @@ SCHEDULE_ADDED = "Vaqt qo'shildi: {}"
 SCHEDULE_REMOVED = "Vaqt olib tashlandi: {}"
 SCHEDULE_INVALID = "Vaqt noto'g'ri. Masalan: 09:00 yoki 14:30"
 CURRENT_TIMES = "Joriy post joylash vaqtlari: {}"
+SCHEDULE_MORE = "  … yana {} ta qator ko'rsatilmadi"
 SCHEDULE_ADD_TIME_HINT = "Post joylash uchun yangi vaqtni 09:00 formatida yuboring yoki /set_times 09:00 12:00 buyrug'ini ishlating."
 SCHEDULE_PICK_HOUR = "Soatni tanlang"
 SCHEDULE_PICK_MINUTE = "Minutni tanlang"
@@ -74,6 +102,13 @@ REPLY_TO_REMOVE_ADMIN = "Adminni olib tashlash uchun uning xabariga reply qiling
 OWNER_ONLY = "Bu buyruqni faqat bot egasi ishlata oladi."
 ADMIN_ONLY = "Bu buyruqni faqat adminlar ishlata oladi."
 LIST_ADMINS_HEADER = "Adminlar:"
+PROFILE_USAGE = (
+    "/profile — holat\n"
+    "/profile on [foiz] [wall|cprofile] — yoqish (default 5%)\n"
+    "/profile off — o'chirish\n"
+    "/profile_dump — eng sekin izlarni faylga yozish"
+)
+PROFILE_EMPTY = "Hali profil izlari yo'q."
 
 # Reply / Inline button labels
 BTN_HELP = "📋 Yordam"
@@ -90,7 +125,7 @@ BTN_ADD_TIME = "➕ Vaqt qo'shish"
 BTN_INLINE_HISTORY = "📜 Postlar tarixi"
 BTN_INLINE_SCHEDULE = "⏰ Nashr vaqtlari"
 BTN_POST_NOW = "Hozir joylash"
-POST_NOW_SUCCESS = "Post guruhga yuborildi."
+POST_NOW_SUCCESS = "Post guruhlarga yuborish navbatiga qo'yildi."
 POST_NOW_FAILED = "Post yuborish amalga oshmadi (guruh yoki kontent tekshiring)."
 POST_NOT_ASSIGNED = "Post tanlanmagan"
 SCHEDULE_ASSIGNED = "Post vaqtga biriktirildi."
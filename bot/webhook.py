@@ -0,0 +1,168 @@
+"""
+Webhook runtime (BOT_MODE=webhook): an aiohttp server receives Telegram updates instead of long polling.
+Each update is answered 200 right away and handled in a background task; at most WEBHOOK_MAX_INFLIGHT
+run at once — beyond that the request waits for a free slot, which slows Telegram down instead of
+piling up tasks. On shutdown new updates get 503 (Telegram re-delivers them) while the in-flight ones
+finish, up to WEBHOOK_DRAIN_SECONDS.
+"""
+import asyncio
+import hmac
+import logging
+import signal
+import time
+from typing import Optional, Set
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+from config import (
+    WEBHOOK_DRAIN_SECONDS,
+    WEBHOOK_HOST,
+    WEBHOOK_MAX_INFLIGHT,
+    WEBHOOK_PATH,
+    WEBHOOK_PORT,
+    WEBHOOK_SECRET,
+    WEBHOOK_URL,
+)
+from bot.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class WebhookServer:
+    """aiohttp app feeding updates to the dispatcher with a bounded number in flight."""
+
+    def __init__(
+        self,
+        dp: Dispatcher,
+        bot: Bot,
+        path: str = WEBHOOK_PATH,
+        secret: str = WEBHOOK_SECRET,
+        max_inflight: int = WEBHOOK_MAX_INFLIGHT,
+    ) -> None:
+        self.dp = dp
+        self.bot = bot
+        self.path = path
+        self.secret = secret
+        self.max_inflight = max(max_inflight, 1)
+        self._slots = asyncio.Semaphore(self.max_inflight)
+        self._tasks: Set[asyncio.Task] = set()
+        self._draining = False
+        self._runner: Optional[web.AppRunner] = None
+        self.received = 0
+        self.rejected = 0
+        self.failed = 0
+
+    def inflight(self) -> int:
+        return len(self._tasks)
+
+    def stats(self) -> dict:
+        return {
+            "inflight": self.inflight(),
+            "received": self.received,
+            "rejected": self.rejected,
+            "failed": self.failed,
+        }
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post(self.path, self._handle)
+        app.router.add_get("/healthz", self._health)
+        return app
+
+    async def _health(self, request: web.Request) -> web.Response:
+        if self._draining:
+            return web.Response(status=503, text="draining")
+        return web.json_response({"inflight": self.inflight(), "max_inflight": self.max_inflight})
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        if self.secret and not hmac.compare_digest(request.headers.get(SECRET_HEADER, ""), self.secret):
+            return web.Response(status=401)
+        if self._draining:
+            self.rejected += 1
+            return web.Response(status=503)
+        try:
+            update = Update.model_validate(await request.json(), context={"bot": self.bot})
+        except Exception as e:
+            logger.warning("Webhook: bad update payload: %s", e)
+            return web.Response(status=400)
+        # Backpressure: wait for a free slot before acknowledging
+        await self._slots.acquire()
+        if self._draining:
+            self._slots.release()
+            self.rejected += 1
+            return web.Response(status=503)
+        self.received += 1
+        task = asyncio.create_task(self._process(update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return web.Response()
+
+    async def _process(self, update: Update) -> None:
+        try:
+            await self.dp.feed_update(self.bot, update)
+        except Exception as e:
+            # Handler errors are already logged by the dispatcher's error handler; this is a last resort
+            self.failed += 1
+            logger.exception("Webhook: update %s failed: %s", update.update_id, e)
+        finally:
+            self._slots.release()
+
+    async def start(self, host: str = WEBHOOK_HOST, port: int = WEBHOOK_PORT) -> None:
+        self._runner = web.AppRunner(self.app(), handle_signals=False)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        logger.info("Webhook server listening on %s:%s%s (max %d in flight)", host, port, self.path, self.max_inflight)
+
+    async def drain(self, timeout: float = WEBHOOK_DRAIN_SECONDS) -> None:
+        """Stop taking updates, let in-flight ones finish (cancel what is left after timeout), close the server."""
+        self._draining = True
+        started = time.monotonic()
+        pending = set(self._tasks)
+        if pending:
+            logger.info("Webhook: draining %d in-flight update(s)", len(pending))
+            _, pending = await asyncio.wait(pending, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+                logger.warning("Webhook: %d update(s) cancelled after %.1fs drain", len(pending), timeout)
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        logger.info(
+            "Webhook stopped in %.2fs: received=%d rejected=%d failed=%d",
+            time.monotonic() - started, self.received, self.rejected, self.failed,
+        )
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot) -> None:
+    """Register the webhook with Telegram, serve until SIGINT/SIGTERM, then drain."""
+    server = WebhookServer(dp, bot)
+    registry.gauges("bot_webhook", server.stats)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            # Windows: Ctrl+C still arrives as KeyboardInterrupt/CancelledError
+            pass
+    await server.start()
+    await bot.set_webhook(
+        WEBHOOK_URL,
+        secret_token=WEBHOOK_SECRET or None,
+        # Telegram allows 1..100 parallel connections per bot
+        max_connections=min(server.max_inflight, 100),
+        allowed_updates=dp.resolve_used_update_types(),
+    )
+    logger.info("Webhook set: %s", WEBHOOK_URL)
+    await dp.emit_startup(bot=bot)
+    try:
+        await stop.wait()
+    finally:
+        await server.drain()
+        await dp.emit_shutdown(bot=bot)
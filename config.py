@@ -32,6 +32,11 @@ def is_owner(user_id: int) -> bool:
 
 # SQLite database path
 DATABASE_PATH: str = os.getenv("DATABASE_PATH", "data/bot.db")
+# Read-only connections next to the single writer (0 = everything on the writer)
+DB_READ_POOL_SIZE: int = int(os.getenv("DB_READ_POOL_SIZE", "2"))
+# SQLite page cache per connection (KiB) and memory-mapped I/O size (bytes)
+DB_CACHE_SIZE_KB: int = int(os.getenv("DB_CACHE_SIZE_KB", "16384"))
+DB_MMAP_SIZE: int = int(os.getenv("DB_MMAP_SIZE", str(128 * 1024 * 1024)))
 
 # Logging
 LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
@@ -39,6 +44,16 @@ LOG_FORMAT: str = os.getenv(
     "LOG_FORMAT",
     "%(asctime)s | %(levelname)s | %(name)s | %(message)s",
 )
+# Rotated log file, written as JSON lines by a background thread ("" = console only)
+LOG_FILE: str = os.getenv("LOG_FILE", "bot.log")
+LOG_FILE_MAX_BYTES: int = int(os.getenv("LOG_FILE_MAX_BYTES", "1000000"))
+LOG_FILE_BACKUPS: int = int(os.getenv("LOG_FILE_BACKUPS", "3"))
+# Console output: "text" (LOG_FORMAT) or "json"
+LOG_CONSOLE: str = os.getenv("LOG_CONSOLE", "text").strip().lower()
+# Identical warnings/errors (same logger, message template, exception type): at most this many per
+# window of LOG_SAMPLE_WINDOW seconds, the rest are dropped and counted; 0 = no sampling
+LOG_SAMPLE_BURST: int = int(os.getenv("LOG_SAMPLE_BURST", "5"))
+LOG_SAMPLE_WINDOW: float = float(os.getenv("LOG_SAMPLE_WINDOW", "60"))
 
 # Optional: rate limit leads per user per hour
 LEAD_RATE_LIMIT_PER_HOUR: int = int(os.getenv("LEAD_RATE_LIMIT_PER_HOUR", "10"))
@@ -46,8 +61,84 @@ LEAD_RATE_LIMIT_PER_HOUR: int = int(os.getenv("LEAD_RATE_LIMIT_PER_HOUR", "10"))
 # Domain for docs (optional)
 BOT_DOMAIN: str = os.getenv("BOT_DOMAIN", "postbot.rashidevs.uz")
 
+# Prometheus-format metrics at http://METRICS_HOST:METRICS_PORT/metrics; port 0 = off
+METRICS_HOST: str = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT: int = int(os.getenv("METRICS_PORT", "0"))
+
+# Profiling (bot/profiling.py): percent of handler calls and posting jobs traced (0 = off; the owner can
+# switch it with /profile), "wall" or "cprofile", how many of the slowest traces are kept, dump directory
+PROFILE_SAMPLE_PERCENT: float = float(os.getenv("PROFILE_SAMPLE_PERCENT", "0"))
+PROFILE_MODE: str = os.getenv("PROFILE_MODE", "wall").strip().lower()
+PROFILE_KEEP: int = int(os.getenv("PROFILE_KEEP", "20"))
+PROFILE_DIR: str = os.getenv("PROFILE_DIR", "profiles")
+
+# How updates arrive: "polling" (getUpdates) or "webhook" (aiohttp server, bot/webhook.py)
+BOT_MODE: str = os.getenv("BOT_MODE", "polling").strip().lower()
+# Webhook: public URL Telegram posts to (default https://BOT_DOMAIN/WEBHOOK_PATH), local listen address,
+# optional secret token checked on every request
+WEBHOOK_PATH: str = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_URL: str = os.getenv("WEBHOOK_URL", f"https://{BOT_DOMAIN}{WEBHOOK_PATH}")
+WEBHOOK_HOST: str = os.getenv("WEBHOOK_HOST", "127.0.0.1")
+WEBHOOK_PORT: int = int(os.getenv("WEBHOOK_PORT", "8080"))
+WEBHOOK_SECRET: str = os.getenv("WEBHOOK_SECRET", "")
+# Updates handled at once in webhook mode, and how long shutdown waits for them (seconds)
+WEBHOOK_MAX_INFLIGHT: int = int(os.getenv("WEBHOOK_MAX_INFLIGHT", "50"))
+WEBHOOK_DRAIN_SECONDS: float = float(os.getenv("WEBHOOK_DRAIN_SECONDS", "30"))
+
 # Scheduler timezone (e.g. Asia/Tashkent for Uzbekistan)
 SCHEDULER_TIMEZONE: str = os.getenv("SCHEDULER_TIMEZONE", "Asia/Tashkent")
+# "cron": one APScheduler job per schedule row; "dispatcher": one per-minute job over an in-memory timetable
+SCHEDULER_MODE: str = os.getenv("SCHEDULER_MODE", "cron").strip().lower()
+# Missed slots younger than this many minutes are replayed after downtime; 0 = no catch-up
+CATCHUP_GRACE_MINUTES: int = int(os.getenv("CATCHUP_GRACE_MINUTES", "60"))
+# How often (minutes) the catch-up sweep looks for slots that did not fire
+CATCHUP_SWEEP_MINUTES: int = int(os.getenv("CATCHUP_SWEEP_MINUTES", "5"))
+
+# Settings cache lifetime in seconds (settings_service keeps all rows in memory); 0 = until next write
+SETTINGS_CACHE_TTL: float = float(os.getenv("SETTINGS_CACHE_TTL", "300"))
+
+# Admin conversation state (FSM) kept in SQLite: entries cached in memory (LRU) and how long an
+# untouched draft lives, in seconds
+FSM_CACHE_SIZE: int = int(os.getenv("FSM_CACHE_SIZE", "1000"))
+FSM_TTL_SECONDS: float = float(os.getenv("FSM_TTL_SECONDS", "86400"))
+# How long a cached FSM entry is trusted before SQLite is read again. Polling keeps the cache by default;
+# webhook mode reads it on every update by default (0)
+FSM_CACHE_SECONDS: float = float(os.getenv("FSM_CACHE_SECONDS", "0" if BOT_MODE == "webhook" else "30"))
+
+# posts_log retention: rows are rolled up into posts_daily, and rows older than this many days are then
+# moved to the archive database (0 = keep every row in the main database); rows per transaction
+POSTS_LOG_RETENTION_DAYS: int = int(os.getenv("POSTS_LOG_RETENTION_DAYS", "90"))
+POSTS_ARCHIVE_PATH: str = os.getenv(
+    "POSTS_ARCHIVE_PATH", str(Path(DATABASE_PATH).with_name("posts_archive.db"))
+)
+RETENTION_BATCH_ROWS: int = int(os.getenv("RETENTION_BATCH_ROWS", "5000"))
+
+# Write-behind buffer for posts_log / content_admin_messages: flush after N rows or N seconds
+WRITE_BUFFER_MAX_ROWS: int = int(os.getenv("WRITE_BUFFER_MAX_ROWS", "50"))
+WRITE_BUFFER_FLUSH_SECONDS: float = float(os.getenv("WRITE_BUFFER_FLUSH_SECONDS", "1.0"))
+# Failed flushes a buffered row survives before it is dropped (and logged); constraint errors drop at once
+WRITE_BUFFER_MAX_ATTEMPTS: int = int(os.getenv("WRITE_BUFFER_MAX_ATTEMPTS", "5"))
+
+# Outbound Telegram flood limits (token buckets in bot/ratelimit.py)
+TELEGRAM_GLOBAL_RATE: float = float(os.getenv("TELEGRAM_GLOBAL_RATE", "30"))  # messages per second, all chats
+TELEGRAM_GROUP_RATE_PER_MIN: float = float(os.getenv("TELEGRAM_GROUP_RATE_PER_MIN", "20"))  # per group/channel
+TELEGRAM_PRIVATE_RATE: float = float(os.getenv("TELEGRAM_PRIVATE_RATE", "1"))  # messages per second, per private chat
+TELEGRAM_PRIVATE_BURST: int = int(os.getenv("TELEGRAM_PRIVATE_BURST", "3"))
+# How many times a request is sent in total when Telegram answers 429 (waiting retry_after in between)
+TELEGRAM_RETRY_AFTER_ATTEMPTS: int = int(os.getenv("TELEGRAM_RETRY_AFTER_ATTEMPTS", "3"))
+
+# Outbox (durable send queue): rows claimed per poll, idle poll interval (s), attempts before a send
+# is marked failed, and retry backoff base/cap in seconds (doubles per attempt, with jitter)
+OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_POLL_SECONDS: float = float(os.getenv("OUTBOX_POLL_SECONDS", "5"))
+OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+OUTBOX_BACKOFF_BASE: float = float(os.getenv("OUTBOX_BACKOFF_BASE", "5"))
+OUTBOX_BACKOFF_MAX: float = float(os.getenv("OUTBOX_BACKOFF_MAX", "600"))
+
+# Admin post browser: posts per page, and above how many active posts /start shows the browser
+# instead of sending every post as a separate preview message
+ADMIN_POSTS_PAGE_SIZE: int = int(os.getenv("ADMIN_POSTS_PAGE_SIZE", "10"))
+ADMIN_PREVIEW_MAX_POSTS: int = int(os.getenv("ADMIN_PREVIEW_MAX_POSTS", "20"))
 
 
 def validate_config() -> None:
@@ -58,3 +149,11 @@ def validate_config() -> None:
         raise ValueError(
             "OWNER_ID or OWNER_IDS is required (Telegram user ID of owner(s), comma-separated for multiple)"
         )
+    if SCHEDULER_MODE not in ("cron", "dispatcher"):
+        raise ValueError("SCHEDULER_MODE must be 'cron' or 'dispatcher'")
+    if BOT_MODE not in ("polling", "webhook"):
+        raise ValueError("BOT_MODE must be 'polling' or 'webhook'")
+    if LOG_CONSOLE not in ("text", "json"):
+        raise ValueError("LOG_CONSOLE must be 'text' or 'json'")
+    if PROFILE_MODE not in ("wall", "cprofile"):
+        raise ValueError("PROFILE_MODE must be 'wall' or 'cprofile'")
@@ -5,43 +5,135 @@ Scheduler, routers, DB init and graceful shutdown.
 """
 import asyncio
 import logging
-from logging.handlers import RotatingFileHandler
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Dict, List, Optional, Tuple, TypeVar
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.base import BaseSession
 from aiogram.enums import ParseMode
+from aiogram.fsm.storage.base import BaseStorage
 from aiogram.types import ErrorEvent
 
-from config import BOT_TOKEN, LOG_LEVEL, LOG_FORMAT, SCHEDULER_TIMEZONE, validate_config
-from bot.database import init_db, open_app_connection, close_app_connection
+from config import (
+    BOT_MODE,
+    BOT_TOKEN,
+    CATCHUP_GRACE_MINUTES,
+    CATCHUP_SWEEP_MINUTES,
+    LOG_CONSOLE,
+    LOG_FILE,
+    LOG_FILE_BACKUPS,
+    LOG_FILE_MAX_BYTES,
+    LOG_LEVEL,
+    LOG_FORMAT,
+    LOG_SAMPLE_BURST,
+    LOG_SAMPLE_WINDOW,
+    SCHEDULER_TIMEZONE,
+    validate_config,
+)
+from bot.database import SQLiteStorage, init_db, open_app_connection, close_app_connection, write_buffer
+from bot.scheduler.catchup import run_catchup
+from bot.scheduler.outbox import OutboxWorker
 from bot.scheduler.posting import post_scheduled_content
+from bot.scheduler.timetable import latest_slot
 from bot.scheduler import runner as scheduler_runner
-from bot.services import schedule_service, settings_service
-from bot.handlers import user, admin, owner
+from bot.services import admin_service, lead_service, retention_service, schedule_service, settings_service
+from bot.database.models import Schedule
+from bot.handlers import user, admin, owner, leads
+from bot import logs
 from bot.middlewares.admin import AdminOnlyMiddleware, OwnerOnlyMiddleware
+from bot.middlewares.throttling import OutboundThrottleMiddleware
+from bot.metrics import (
+    HandlerMetricsMiddleware,
+    TelegramMetricsMiddleware,
+    TimedMiddleware,
+    UpdateMetricsMiddleware,
+    registry,
+    start_metrics_server,
+)
+from bot.profiling import ProfilingMiddleware, profiler
+from bot.ratelimit import limiter
+from bot.webhook import run_webhook
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
 
 
 def setup_logging() -> None:
-    """Configure root logger and optional file handler."""
-    logging.basicConfig(level=LOG_LEVEL, format=LOG_FORMAT)
+    """Root logger -> queue -> listener thread (console, rotating JSON file); see bot/logs.py."""
+    logs.setup_logging(
+        LOG_LEVEL,
+        LOG_FORMAT,
+        log_file=LOG_FILE,
+        max_bytes=LOG_FILE_MAX_BYTES,
+        backups=LOG_FILE_BACKUPS,
+        console=LOG_CONSOLE,
+        sample_burst=LOG_SAMPLE_BURST,
+        sample_window=LOG_SAMPLE_WINDOW,
+    )
+
+
+async def _timed(name: str, aw: Awaitable[T], timings: Dict[str, float]) -> T:
+    """Await aw and record how long it took under timings[name]."""
+    started = time.monotonic()
     try:
-        fh = RotatingFileHandler(
-            "bot.log", maxBytes=1_000_000, backupCount=3, encoding="utf-8"
-        )
-        fh.setFormatter(logging.Formatter(LOG_FORMAT))
-        logging.getLogger().addHandler(fh)
-    except Exception:
-        pass
+        return await aw
+    finally:
+        timings[name] = time.monotonic() - started
+
+
+async def bootstrap_db(timings: Dict[str, float]) -> Tuple[List[Schedule], Dict[int, List[int]]]:
+    """Migrate and open the DB, warm the in-memory caches and load schedules with their posts."""
+    await _timed("init_db", init_db(), timings)
+    await _timed("open_db", open_app_connection(), timings)
+    _, _, schedules, schedule_contents = await _timed(
+        "load_caches",
+        asyncio.gather(
+            admin_service.load_admin_cache(),
+            settings_service.get_target_group_id(),
+            schedule_service.list_schedules(),
+            schedule_service.get_schedule_content_map(),
+        ),
+        timings,
+    )
+    return schedules, schedule_contents
 
 
-async def setup_scheduler(bot: Bot, bot_username: str) -> AsyncIOScheduler:
-    """Load schedules from DB and add cron jobs; each time posts its assigned content."""
-    scheduler = AsyncIOScheduler(timezone=SCHEDULER_TIMEZONE)
+def setup_scheduler(
+    bot: Bot,
+    bot_username: str,
+    schedules: List[Schedule],
+    schedule_contents: Dict[int, List[int]],
+) -> AsyncIOScheduler:
+    """Add jobs for the preloaded schedules; each time posts its assigned content."""
+    # A late job still fires once (coalesced) inside the grace window; older slots are left to catch-up
+    scheduler = AsyncIOScheduler(
+        timezone=SCHEDULER_TIMEZONE,
+        job_defaults={"coalesce": True, "misfire_grace_time": max(CATCHUP_GRACE_MINUTES, 1) * 60},
+    )
+    if CATCHUP_GRACE_MINUTES > 0:
+        async def catchup_sweep() -> None:
+            await run_catchup(bot, bot_username)
+
+        scheduler.add_job(
+            catchup_sweep,
+            IntervalTrigger(minutes=max(CATCHUP_SWEEP_MINUTES, 1)),
+            id="catchup_sweep",
+            replace_existing=True,
+        )
+
+    if scheduler_runner.is_dispatcher_mode():
+        scheduler_runner.setup_dispatcher(scheduler, bot, bot_username, schedules, schedule_contents)
+        scheduler.start()
+        scheduler_runner.set_scheduler(scheduler)
+        return scheduler
 
-    schedules = await schedule_service.list_schedules()
     for s in schedules:
         if not s.enabled:
             continue
@@ -49,8 +141,8 @@ async def setup_scheduler(bot: Bot, bot_username: str) -> AsyncIOScheduler:
         hour, minute = int(parts[0]), int(parts[1])
         schedule_id = s.id
 
-        async def job(sid: int = schedule_id) -> None:
-            await post_scheduled_content(bot, bot_username, sid)
+        async def job(sid: int = schedule_id, t: str = s.time_str) -> None:
+            await post_scheduled_content(bot, bot_username, sid, slot_at=latest_slot(t))
 
         scheduler.add_job(
             job,
@@ -64,53 +156,145 @@ async def setup_scheduler(bot: Bot, bot_username: str) -> AsyncIOScheduler:
     return scheduler
 
 
-async def main() -> None:
-    validate_config()
-    setup_logging()
-    logger = logging.getLogger(__name__)
-    logger.info("Starting Post Management Bot")
-
-    await init_db()
-    await open_app_connection()
-
+def create_bot(session: Optional[BaseSession] = None) -> Bot:
+    """Bot with the shared outbound session middlewares. session: e.g. one pointed at a local fake Bot API."""
     bot = Bot(
         token=BOT_TOKEN,
+        session=session,
         default=DefaultBotProperties(parse_mode=ParseMode.HTML),
     )
-    dp = Dispatcher()
+    # All outbound message requests share the per-chat/global flood limits and retry_after handling
+    bot.session.middleware(OutboundThrottleMiddleware())
+    # Inside the throttle: times each actual API call (every retry separately), not the flood-limit wait
+    bot.session.middleware(TelegramMetricsMiddleware())
+    return bot
+
+
+async def on_error(event: ErrorEvent) -> None:
+    logger.exception("Handler error: %s", event.exception, exc_info=True)
+    try:
+        update = event.update
+        if update.message:
+            await update.message.answer(
+                "Xatolik yuz berdi. Iltimos keyinroq urinib ko'ring."
+            )
+        elif update.callback_query:
+            await update.callback_query.answer(
+                "Xatolik yuz berdi.", show_alert=True
+            )
+    except Exception:
+        pass
+
+
+def build_dispatcher(storage: BaseStorage) -> Dispatcher:
+    """
+    Dispatcher with all routers, their access and metrics middlewares and the error handler.
+    The routers are module-level, so this can be called once per process.
+    """
+    dp = Dispatcher(storage=storage)
+    dp.update.outer_middleware(logs.LogContextMiddleware())
+    # Outer on update, so it runs inside the FSM context middleware: routing, filters and handler
+    dp.update.outer_middleware(UpdateMetricsMiddleware())
 
     dp.include_router(user.router)
-    admin.router.message.middleware(AdminOnlyMiddleware())
-    admin.router.callback_query.middleware(AdminOnlyMiddleware())
+    dp.include_router(leads.router)
+    admin.router.message.middleware(TimedMiddleware(AdminOnlyMiddleware(), admin.router.name))
+    admin.router.callback_query.middleware(TimedMiddleware(AdminOnlyMiddleware(), admin.router.name))
     dp.include_router(admin.router)
-    owner.router.message.middleware(OwnerOnlyMiddleware())
+    owner.router.message.middleware(TimedMiddleware(OwnerOnlyMiddleware(), owner.router.name))
     dp.include_router(owner.router)
+    # Registered after the access checks, so only the matched handler itself is timed (and sampled)
+    for router in (user.router, leads.router, admin.router, owner.router):
+        for observer in (router.message, router.edited_message, router.callback_query):
+            observer.middleware(ProfilingMiddleware(router.name))
+            observer.middleware(HandlerMetricsMiddleware(router.name))
 
-    @dp.error()
-    async def global_error_handler(event: ErrorEvent) -> None:
-        logger.exception("Handler error: %s", event.exception, exc_info=True)
-        try:
-            update = event.update
-            if update.message:
-                await update.message.answer(
-                    "Xatolik yuz berdi. Iltimos keyinroq urinib ko'ring."
-                )
-            elif update.callback_query:
-                await update.callback_query.answer(
-                    "Xatolik yuz berdi.", show_alert=True
-                )
-        except Exception:
-            pass
-
-    me = await bot.get_me()
+    dp.error.register(on_error)
+    return dp
+
+
+async def main() -> None:
+    validate_config()
+    setup_logging()
+    logger.info("Starting Post Management Bot")
+
+    started = time.monotonic()
+    timings: Dict[str, float] = {}
+
+    bot = create_bot()
+    # Admin conversation state (post drafts, group ID flow) lives in SQLite behind an LRU cache
+    fsm_storage = SQLiteStorage()
+    dp = build_dispatcher(fsm_storage)
+
+    # Telegram get_me (network) overlaps with DB migrations, cache warm-up and schedule loading
+    get_me = asyncio.ensure_future(_timed("get_me", bot.get_me(), timings))
+    bootstrap = asyncio.ensure_future(bootstrap_db(timings))
+    try:
+        me, (schedules, schedule_contents) = await asyncio.gather(get_me, bootstrap)
+    except Exception:
+        # gather does not cancel the other task: stop it before its connection is closed under it
+        for task in (get_me, bootstrap):
+            task.cancel()
+        await asyncio.gather(get_me, bootstrap, return_exceptions=True)
+        await close_app_connection()
+        await bot.session.close()
+        raise
     bot_username = me.username or ""
 
-    scheduler = await setup_scheduler(bot, bot_username)
+    scheduler_started = time.monotonic()
+    scheduler = setup_scheduler(bot, bot_username, schedules, schedule_contents)
+    scheduler.add_job(fsm_storage.purge_expired, IntervalTrigger(hours=1), id="fsm_purge", replace_existing=True)
+    # First run a few minutes after startup (the first rollup of a large history takes a while), then hourly
+    scheduler.add_job(
+        retention_service.run_retention,
+        IntervalTrigger(hours=1),
+        id="posts_retention",
+        next_run_time=datetime.now(timezone.utc) + timedelta(minutes=5),
+        replace_existing=True,
+    )
+    timings["scheduler"] = time.monotonic() - scheduler_started
+    logger.info(
+        "Startup finished in %.2fs (%s)",
+        time.monotonic() - started,
+        ", ".join(f"{name}={seconds:.3f}s" for name, seconds in timings.items()),
+    )
+    # Sends queued before a restart go out first, then slots missed while the bot was down are replayed
+    outbox_worker = OutboxWorker(bot, bot_username)
+    await outbox_worker.start()
+    await run_catchup(bot, bot_username)
+    await fsm_storage.purge_expired()
+
+    registry.gauges("bot_telegram_limiter", limiter.stats)
+    registry.gauges("bot_outbox", outbox_worker.stats)
+    registry.gauges("bot_settings_cache", settings_service.get_cache_stats)
+    registry.gauges("bot_lead_claims", lambda: lead_service.claim_stats)
+    registry.gauges("bot_fsm_storage", fsm_storage.stats)
+    registry.gauges("bot_profiling", profiler.stats)
+    if logs.sampler is not None:
+        registry.gauges("bot_log_sampler", logs.sampler.stats)
+    registry.gauges("bot_posts_retention", retention_service.stats)
+    registry.gauges("bot_write_buffer", write_buffer.stats)
+    metrics_runner = await start_metrics_server()
 
     try:
-        await dp.start_polling(bot)
+        if BOT_MODE == "webhook":
+            await run_webhook(dp, bot)
+        else:
+            # A webhook left over from webhook mode would make getUpdates fail
+            await bot.delete_webhook()
+            await dp.start_polling(bot)
     finally:
         scheduler.shutdown(wait=False)
+        await outbox_worker.stop()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        logger.info("Outbound rate limiter: %s", limiter.stats())
+        logger.info("FSM storage: %s", fsm_storage.stats())
+        try:
+            flushed = await write_buffer.flush()
+            logger.info("Write buffer flushed on shutdown: %d row(s)", flushed)
+        except Exception as e:
+            logger.exception("Write buffer flush on shutdown failed, %d row(s) lost: %s", len(write_buffer), e)
         await close_app_connection()
         logger.info("Bot stopped")
 